@@ -42,13 +42,17 @@ if module_exists("gurobipy"):
     avail_solvers.add(GUROBI)
 if module_exists("pyscipopt"):
     avail_solvers.add(SCIP)
+if module_exists("highspy"):
+    avail_solvers.add(HIGHS)
 
 from .solver_interface import *
 from .indicatorConstraints import *
 from .pool import *
+from .cache import *
 from .efmtool import *
 from .parse_constr import *
 from .lptools import *
+from .fluxProblem import *
 from .networktools import *
 from .strainDesignModule import *
 from .strainDesignSolutions import *
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+#
+# Copyright 2022 Max Planck Insitute Magdeburg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+#
+"""Caches for the stoichiometric matrices of models and for the results of FVA, FBA and yield optimization"""
+
+import sqlite3
+import hashlib
+from os.path import expanduser
+from io import BytesIO
+from time import time
+from functools import wraps
+from typing import Callable, Optional, Tuple, List
+from weakref import WeakKeyDictionary
+from numpy import array, savez_compressed, load as load_npz
+from scipy import sparse
+from pandas import DataFrame
+from cobra.core import Solution, Model, Reaction
+from straindesign.names import *
+
+_cache = None  # currently active ResultCache
+CACHE_IGNORED_KWARGS = (PROCESSES, 'prune')  # arguments that do not affect the results
+_stoich_cache = WeakKeyDictionary()  # model -> (version, S)
+_model_versions = WeakKeyDictionary()  # model -> number of changes to the stoichiometry
+
+
+class ResultCache:
+    """On-disk cache for LP results
+    
+    Results are stored as compressed numpy archives in an sqlite database and addressed by a hash of the
+    model (stoichiometry, bounds and objective), the function arguments and the solver. When the stored
+    data exceeds max_bytes, the least recently used results are evicted. The database may be shared by
+    several processes and sessions.
+    
+    Args:
+        path (str):
+            Path of the sqlite database file. The file is created if it does not exist.
+    
+        max_bytes (optional (int)): (Default: 1 GB)
+            Maximum size of the stored results.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 2**30):
+        self.path = expanduser(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as con:
+            con.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, data BLOB, size INTEGER, last_access REAL)')
+            con.execute('CREATE INDEX IF NOT EXISTS results_access ON results (last_access)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored data for a key or None (and count the hit or miss)"""
+        with self._connect() as con:
+            row = con.execute('SELECT data FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            con.execute('UPDATE results SET last_access = ? WHERE key = ?', (time(), key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, data: bytes):
+        """Store data under a key and evict the least recently used entries if necessary"""
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', (key, data, len(data), time()))
+            total = con.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+            for old_key, size in con.execute('SELECT key, size FROM results ORDER BY last_access').fetchall():
+                if total <= self.max_bytes:
+                    break
+                con.execute('DELETE FROM results WHERE key = ?', (old_key,))
+                total -= size
+
+    def clear(self):
+        """Remove all stored results"""
+        with self._connect() as con:
+            con.execute('DELETE FROM results')
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the number of hits, misses, entries and stored bytes"""
+        with self._connect() as con:
+            entries, size = con.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+
+
+def enable_cache(path: str, max_bytes: int = 2**30) -> ResultCache:
+    """Enable the on-disk cache for the results of fva, fba and yopt
+    
+    While the cache is enabled, the results of fva(), fba() and yopt() are stored on disk and
+    returned directly when the same function is called again for the same model (stoichiometry,
+    bounds and objective), arguments and solver, also in later sessions.
+    
+    Example:
+        sd.enable_cache('~/.straindesign_cache.sqlite', max_bytes=2**28)
+    
+    Args:
+        path (str):
+            Path of the sqlite database file that holds the results.
+    
+        max_bytes (optional (int)): (Default: 1 GB)
+            Maximum size of the stored results. Least recently used results are evicted first.
+    
+    Returns:
+        (ResultCache):
+            The active cache.
+    """
+    global _cache
+    _cache = ResultCache(path, max_bytes)
+    return _cache
+
+
+def disable_cache():
+    """Disable the on-disk result cache. The stored results are kept on disk."""
+    global _cache
+    _cache = None
+
+
+def cache_stats() -> dict:
+    """Return hit and miss counts and the size of the active result cache (or None if disabled)"""
+    if _cache is None:
+        return None
+    return _cache.stats()
+
+
+def model_fingerprint(model) -> str:
+    """Hash of the stoichiometry, the bounds and the objective of a model
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+    
+    Returns:
+        (str):
+            A hexadecimal sha256 digest.
+    """
+    h = hashlib.sha256()
+    h.update(repr(model.objective_direction).encode())
+    for r in model.reactions:
+        stoich = sorted((m.id, c) for m, c in r.metabolites.items())
+        h.update(repr((r.id, r.lower_bound, r.upper_bound, r.objective_coefficient, stoich)).encode())
+    return h.hexdigest()
+
+
+def result_key(func_name: str, model, kwargs: dict, solver: str) -> str:
+    """Key of a result in the cache, computed from function name, model, arguments and solver"""
+    h = hashlib.sha256()
+    h.update(model_fingerprint(model).encode())
+    args = sorted((k, repr(v)) for k, v in kwargs.items() if k not in CACHE_IGNORED_KWARGS and k != SOLVER)
+    h.update(repr((func_name, args, solver)).encode())
+    return h.hexdigest()
+
+
+def dump_result(result) -> bytes:
+    """Serialize a data frame or a cobra.Solution into a compressed numpy archive"""
+    buffer = BytesIO()
+    if isinstance(result, DataFrame):
+        savez_compressed(buffer,
+                         kind='frame',
+                         index=array(result.index, dtype=str),
+                         columns=array(result.columns, dtype=str),
+                         values=result.values)
+    else:
+        fluxes = dict(result.fluxes)
+        # yield optimization marks solutions whose flux vector may be scaled arbitrarily
+        extra = {'scalable': bool(result.scalable)} if hasattr(result, 'scalable') else {}
+        savez_compressed(buffer,
+                         kind='solution',
+                         objective_value=result.objective_value,
+                         status=result.status,
+                         ids=array(list(fluxes.keys()), dtype=str),
+                         fluxes=array(list(fluxes.values()), dtype=float),
+                         **extra)
+    return buffer.getvalue()
+
+
+def load_result(data: bytes):
+    """Restore a data frame or a cobra.Solution from a compressed numpy archive"""
+    with load_npz(BytesIO(data), allow_pickle=False) as npz:
+        if str(npz['kind']) == 'frame':
+            return DataFrame(npz['values'], index=npz['index'].tolist(), columns=npz['columns'].tolist())
+        fluxes = dict(zip(npz['ids'].tolist(), npz['fluxes'].tolist()))
+        sol = Solution(objective_value=float(npz['objective_value']), status=str(npz['status']), fluxes=fluxes)
+        if 'scalable' in npz.files:
+            sol.scalable = bool(npz['scalable'])
+        return sol
+
+
+def cached(func: Callable) -> Callable:
+    """Decorator that looks up the results of an LP function func(model, **kwargs) in the active cache"""
+
+    @wraps(func)
+    def wrapper(model, **kwargs):
+        if _cache is None:
+            return func(model, **kwargs)
+        from straindesign import select_solver
+        key = result_key(func.__name__, model, kwargs, select_solver(kwargs.get(SOLVER), model))
+        data = _cache.get(key)
+        if data is not None:
+            return load_result(data)
+        result = func(model, **kwargs)
+        _cache.put(key, dump_result(result))
+        return result
+
+    return wrapper
+
+
+def invalidate_stoichiometry(model):
+    """Mark the stoichiometry of a model as changed, such that get_stoichiometry() rebuilds the matrix
+    
+    Changes through the cobra API (adding or removing reactions and metabolites, changing the
+    coefficients of reactions) are tracked automatically. This function is only needed after
+    coefficients were written directly into the _metabolites dictionary of a reaction.
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+    """
+    if model is not None:
+        _model_versions[model] = _model_versions.get(model, 0) + 1
+
+
+def model_version(model) -> int:
+    """Counter of the changes to the metabolites, reactions and stoichiometric coefficients of a model
+    
+    The counter is only valid within the running session. Reading it takes constant time.
+    """
+    return _model_versions.get(model, 0)
+
+
+def _track_changes(method, get_model):
+    """Wrap a method of a cobra class such that it marks the stoichiometry of the affected model as changed"""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        invalidate_stoichiometry(get_model(self))
+        return result
+
+    return wrapper
+
+
+# All changes of the stoichiometry through the cobra API pass through these methods
+# (e.g., subtract_metabolites, +=, -= and remove_from_model call them).
+for _cls, _method, _get_model in [(Reaction, 'add_metabolites', lambda r: r._model), (Reaction, '__imul__', lambda r: r._model),
+                                  (Model, 'add_reactions', lambda m: m), (Model, 'remove_reactions', lambda m: m),
+                                  (Model, 'add_metabolites', lambda m: m), (Model, 'remove_metabolites', lambda m: m)]:
+    setattr(_cls, _method, _track_changes(getattr(_cls, _method), _get_model))
+
+
+def get_stoichiometry(model) -> Tuple[sparse.csr_matrix, List, List, List]:
+    """Sparse stoichiometric matrix, bounds and reaction identifiers of a model
+    
+    The matrix is cached for each model object and rebuilt only when the stoichiometry has
+    changed (see model_version()). A copy of the cached matrix is returned, such that callers
+    (and the LPs built from it) may modify it. The bounds and reaction identifiers are read from
+    the model on every call.
+    
+    Example:
+        S, lb, ub, reaction_ids = get_stoichiometry(model)
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+    
+    Returns:
+        (Tuple[sparse.csr_matrix, List, List, List]):
+            stoichiometric_matrix, lower_bounds, upper_bounds, reaction_ids
+    """
+    version = model_version(model)
+    entry = _stoich_cache.get(model)
+    if entry is None or entry[0] != version:
+        met_index = {m: i for i, m in enumerate(model.metabolites)}
+        rows, cols, data = [], [], []
+        for j, r in enumerate(model.reactions):
+            for m, v in r._metabolites.items():
+                rows.append(met_index[m])
+                cols.append(j)
+                data.append(float(v))
+        S = sparse.csr_matrix((data, (rows, cols)), shape=(len(model.metabolites), len(model.reactions)))
+        S.eliminate_zeros()
+        entry = (version, S)
+        _stoich_cache[model] = entry
+    return entry[1].copy(), [r._lower_bound for r in model.reactions], [r._upper_bound for r in model.reactions], [r.id for r in model.reactions]
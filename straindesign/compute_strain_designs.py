@@ -29,7 +29,7 @@ from copy import deepcopy
 import logging
 from cobra import Model
 from cobra.manipulation import rename_genes
-from straindesign import SDModule, SDSolutions, select_solver, fva, DisableLogger, SDProblem, SDMILP
+from straindesign import SDModule, SDSolutions, select_solver, find_essential_reactions, DisableLogger, SDProblem, SDMILP
 from straindesign.names import *
 from straindesign.networktools import   remove_ext_mets, remove_dummy_bounds, bound_blocked_or_irrevers_fva, \
                                         remove_irrelevant_genes, extend_model_gpr, extend_model_regulatory, \
@@ -73,7 +73,7 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
 
         solver (optional (str)): (Default: same as defined in model / COBRApy)
             The solver that should be used for preparing and carrying out the strain design computation.
-            Allowed values are 'cplex', 'gurobi', 'scip' and 'glpk'.
+            Allowed values are 'cplex', 'gurobi', 'scip', 'glpk' and 'highs'.
 
         max_cost (optional (int)): (Default: inf):
             The maximum cost threshold for interventions. Every possible intervention is associated with a
@@ -134,7 +134,11 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
             that is, MCS with the fewest number of interventions, OptKnock strain designs with the highest possible production
             rate, OptCouple strain designs with the hightest growth coupling potential etc.. 'populate' does the same as 'best',
             but makes use of CPLEX' and Gurobi's populate function to generate multiple strain designs. It is identical to 'best'
-            when used with SCIP or GLPK.
+            when used with SCIP or GLPK. 'lazy' enumerates all MCS in a single MILP solve, in which every solution found by
+            CPLEX or Gurobi is verified and excluded (with its supersets) through a lazy constraint. This avoids restarting the
+            MILP after each solution and is the fastest option for enumerating many MCS. The returned MCS are irreducible, but
+            are only guaranteed to be the cheapest ones if all MCS are enumerated (max_solutions=inf). For other strain design
+            problems or solvers, 'lazy' is identical to 'best'.
             Attention:
             If 'any' used with OptKnock, for instance, the MILP may return the wild type as a possible immediately. Technically,
             the wiltype fulfills the criterion of maximal growth (inner objective) and maximality of the global objective is
@@ -144,6 +148,10 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
         time_limit (optional (int)): (Default: inf)
             The time limit in seconds for the MILP-solver.
 
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for FVAs and for bounding the MILP. Overrides the number of processes
+            of an active parallel session (see parallel_session()).
+
         advanced, use_scenario (optional (bool)):
             Dummy parameters used for the CNApy interface.
 
@@ -156,7 +164,7 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
     """
     allowed_keys = {
         MODULES, SETUP, SOLVER, MAX_COST, MAX_SOLUTIONS, 'M', 'compress', 'gene_kos', KOCOST, KICOST, GKOCOST, GKICOST, REGCOST,
-        SOLUTION_APPROACH, 'advanced', 'use_scenario', T_LIMIT
+        SOLUTION_APPROACH, 'advanced', 'use_scenario', T_LIMIT, PROCESSES
     }
     logging.info('Preparing strain design computation.')
     if SETUP in kwargs:
@@ -178,6 +186,9 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
     else:
         kwargs[SOLVER] = select_solver(None, model)
 
+    if PROCESSES not in kwargs:
+        kwargs[PROCESSES] = None
+
     if MAX_COST in kwargs:
         kwargs.update({MAX_COST: float(kwargs.pop(MAX_COST))})
     else:
@@ -283,16 +294,16 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
     remove_dummy_bounds(model)
     # FVAs to identify blocked, irreversible and essential reactions, as well as non-bounding bounds
     logging.info('  FVA to identify blocked reactions and irreversibilities.')
-    bound_blocked_or_irrevers_fva(model, solver=kwargs[SOLVER])
-    logging.info('  FVA(s) to identify essential reactions.')
+    bound_blocked_or_irrevers_fva(model, solver=kwargs[SOLVER], processes=kwargs[PROCESSES])
+    logging.info('  Identifying essential reactions.')
     essential_reacs = set()
     for m in sd_modules:
         if m[MODULE_TYPE] != SUPPRESS:  # Essential reactions can only be determined from desired
             # or opt-/robustknock modules
-            flux_limits = fva(cmp_model, solver=kwargs[SOLVER], constraints=m[CONSTRAINTS])
-            for (reac_id, limits) in flux_limits.iterrows():
-                if np.min(abs(limits)) > 1e-10 and np.prod(np.sign(limits)) > 0:  # find essential
-                    essential_reacs.add(reac_id)
+            essential_reacs |= find_essential_reactions(cmp_model,
+                                                        constraints=m[CONSTRAINTS],
+                                                        solver=kwargs[SOLVER],
+                                                        processes=kwargs[PROCESSES])
     # remove ko-costs (and thus knockability) of essential reactions
     [uncmp_ko_cost.pop(er) for er in essential_reacs if er in uncmp_ko_cost]
     # If computation of gene-gased intervention strategies, (optionally) compress gpr are rules and extend stoichimetric network with genes
@@ -354,16 +365,16 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
     else:
         cmp_mapReac = []
 
-    # An FVA to identify essentials before building and launching MILP (not sure if this has an effect)
-    logging.info('  FVA(s) in compressed model to identify essential reactions.')
+    # Identify essential reactions before building and launching MILP (not sure if this has an effect)
+    logging.info('  Identifying essential reactions in compressed model.')
     essential_reacs = set()
     for m in sd_modules:
         if m[MODULE_TYPE] != SUPPRESS:  # Essential reactions can only be determined from desired
             # or opt-/robustknock modules
-            flux_limits = fva(cmp_model, solver=kwargs[SOLVER], constraints=m[CONSTRAINTS])
-            for (reac_id, limits) in flux_limits.iterrows():
-                if np.min(abs(limits)) > 1e-10 and np.prod(np.sign(limits)) > 0:  # find essential
-                    essential_reacs.add(reac_id)
+            essential_reacs |= find_essential_reactions(cmp_model,
+                                                        constraints=m[CONSTRAINTS],
+                                                        solver=kwargs[SOLVER],
+                                                        processes=kwargs[PROCESSES])
     # remove ko-costs (and thus knockability) of essential reactions
     [cmp_ko_cost.pop(er) for er in essential_reacs if er in cmp_ko_cost]
     essential_kis = set(cmp_ki_cost[er] for er in essential_reacs if er in cmp_ki_cost)
@@ -380,7 +391,7 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
     if REGCOST in kwargs1:
         kwargs1.pop(REGCOST)
 
-    kwargs_milp = {k: v for k, v in kwargs.items() if k in [SOLVER, MAX_COST, 'M']}
+    kwargs_milp = {k: v for k, v in kwargs.items() if k in [SOLVER, MAX_COST, 'M', PROCESSES]}
     kwargs_milp.update({KOCOST: cmp_ko_cost})
     kwargs_milp.update({KICOST: cmp_ki_cost})
     kwargs_milp.update({'essential_kis': essential_kis})
@@ -409,6 +420,8 @@ def compute_strain_designs(model: Model, **kwargs: dict) -> SDSolutions:
         cmp_sd_solution = sd_milp.compute_optimal(**kwargs_computation)
     elif solution_approach == POPULATE:
         cmp_sd_solution = sd_milp.enumerate(**kwargs_computation)
+    elif solution_approach == LAZY:
+        cmp_sd_solution = sd_milp.compute_lazy(**kwargs_computation)
 
     logging.info('  Decompressing.')
     if cmp_sd_solution.status in [OPTIMAL, TIME_LIMIT_W_SOL]:
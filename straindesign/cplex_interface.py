@@ -19,9 +19,11 @@
 """CPLEX solver interface for LP and MILP"""
 
 from random import randint
+from threading import Lock
 from scipy import sparse
 from numpy import nan, inf, isinf
-from cplex import Cplex, infinity, _const
+from cplex import Cplex, SparsePair, infinity, _const
+from cplex.callbacks import Context
 from cplex.exceptions import CplexError
 from typing import Tuple, List
 import logging
@@ -153,6 +155,9 @@ class Cplex_MILP_LP(Cplex):
             self.parameters.mip.pool.intensity.set(4)
             # no integrality tolerance
             self.parameters.mip.tolerances.integrality.set(0.0)
+        else:
+            # solve continuous problems as LPs, so that the simplex basis is kept for warm starts
+            self.set_problem_type(self.problem_type.LP)
 
     def solve(self) -> Tuple[List, float, float]:
         """Solve the MILP or LP
@@ -181,9 +186,19 @@ class Cplex_MILP_LP(Cplex):
                 min_cx = nan
                 status = INFEASIBLE
                 return x, min_cx, status
-            elif status in [11, 107]:  # timeout with solution
+            elif status in [11, 107, 113]:  # timeout (or abort), possibly with solution
+                if not self.solution.is_primal_feasible():
+                    x = [nan] * self.variables.get_num()
+                    min_cx = nan
+                    status = TIME_LIMIT
+                    return x, min_cx, status
                 min_cx = self.solution.get_objective_value()
                 status = TIME_LIMIT_W_SOL
+            elif status == 114:  # abort without solution
+                x = [nan] * self.variables.get_num()
+                min_cx = nan
+                status = TIME_LIMIT
+                return x, min_cx, status
             elif status in [2, 4, 118, 119]:  # solution unbounded
                 x = [nan] * self.variables.get_num()
                 min_cx = -inf
@@ -219,9 +234,11 @@ class Cplex_MILP_LP(Cplex):
             status = self.solution.get_status()
             if status in [1, 101, 102, 107, 115, 128, 129, 130]:  # solution integer optimal (tolerance)
                 opt = self.solution.get_objective_value()
-            elif status in [118, 119]:  # solution unbounded (or inf or unbdd)
+            elif status in [2, 4, 118, 119]:  # solution unbounded (or inf or unbdd)
                 opt = -inf
-            elif status in [103, 108]:  # infeasible
+            elif status == 11 and self.solution.is_primal_feasible():  # timeout with solution
+                opt = self.solution.get_objective_value()
+            elif status in [3, 11, 103, 108]:  # infeasible or timeout without solution
                 opt = nan
             else:
                 logging.exception(status)
@@ -376,3 +393,60 @@ class Cplex_MILP_LP(Cplex):
             b_ineq = infinity
         self.linear_constraints.set_coefficients(zip([idx] * len(a_ineq), range(len(a_ineq)), a_ineq))
         self.linear_constraints.set_rhs([[idx, b_ineq]])
+
+    def get_basis(self) -> Tuple[List, List]:
+        """Retrieve the simplex basis from CPLEX (or None if there is no basis)"""
+        try:
+            var_stat, constr_stat = self.solution.basis.get_basis()
+        except CplexError:
+            return None
+        status = self.solution.basis.status
+        var_map = {status.basic: BASIC, status.at_lower_bound: AT_LOWER, status.at_upper_bound: AT_UPPER, status.free_nonbasic: FREE}
+        # CPLEX reports the status of the slack variables, a nonbasic slack corresponds to an active constraint
+        return [var_map[v] for v in var_stat], [BASIC if v == status.basic else AT_UPPER for v in constr_stat]
+
+    def set_basis(self, var_stat, constr_stat):
+        """Set a starting basis for the next simplex solve"""
+        status = self.solution.basis.status
+        var_map = {BASIC: status.basic, AT_LOWER: status.at_lower_bound, AT_UPPER: status.at_upper_bound, FREE: status.free_nonbasic}
+        constr_stat = [status.basic if v == BASIC else status.at_lower_bound for v in constr_stat]
+        self.start.set_start([var_map[v] for v in var_stat], constr_stat, [], [], [], [])
+
+    def solve_lazy(self, separate) -> Tuple[List, float, float]:
+        """Solve the MILP and pass every new incumbent to a function that may reject it with lazy constraints
+        
+        separate(x) returns a list of cuts (a, b) with a sparse row vector a that reject the candidate x through
+        a * x <= b, an empty list to accept x or None to stop the solution process.
+        """
+        self.set_callback(CplexLazyCallback(separate), Context.id.candidate)
+        try:
+            return self.solve()
+        finally:
+            self.set_callback()
+
+    def set_mip_start(self, x):
+        """Replace the MIP start by the integer part of a solution vector"""
+        idx = [i for i, t in enumerate(self.variables.get_types()) if t in 'BI']
+        self.MIP_starts.delete()
+        self.MIP_starts.add(SparsePair(ind=idx, val=[float(x[i]) for i in idx]), self.MIP_starts.effort_level.solve_fixed)
+
+
+class CplexLazyCallback(object):
+    """Generic CPLEX callback that checks candidate solutions and rejects them with lazy constraints (see solve_lazy)"""
+
+    def __init__(self, separate):
+        self.separate = separate
+        self.lock = Lock()  # CPLEX may invoke the callback from several threads
+
+    def invoke(self, context):
+        if not context.in_candidate() or not context.is_candidate_point():
+            return
+        with self.lock:
+            cuts = self.separate(context.get_candidate_point())
+        if cuts is None:
+            context.reject_candidate()
+            context.abort()
+        elif cuts:
+            context.reject_candidate(constraints=[SparsePair(ind=a.indices.tolist(), val=a.data.tolist()) for a, _ in cuts],
+                                     senses='L' * len(cuts),
+                                     rhs=[float(b) for _, b in cuts])
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+#
+# Copyright 2022 Max Planck Insitute Magdeburg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+#
+"""Prepared LP of a metabolic model for repeated FBA, pFBA and yield optimization (FluxProblem)"""
+
+from cobra.core import Solution, Model, Reaction, Metabolite
+from scipy import sparse
+from numpy import nan, isnan, isinf, inf
+from straindesign import MILP_LP, select_solver, parse_constraints, lineqlist2mat, linexpr2mat, linexprdict2mat, yopt, \
+                        get_stoichiometry
+from straindesign.names import *
+import logging
+
+
+class FluxProblem:
+    """Prepared LP of a metabolic model for repeated FBA, pFBA and yield optimization
+    
+    The functions fba() and yopt() parse the constraints, build the stoichiometric matrix and
+    construct a new solver instance in every call. A FluxProblem does this only once. Additional
+    constraints can be pushed onto and popped from a stack and the objective function can be
+    swapped. All optimizations reuse the live solver instances (one for FBA, one for pFBA and one
+    for yield optimization, each built on first use), so that solvers can warm-start from the
+    previous basis. This is much faster when many LPs are solved for the same model, e.g. for
+    flux space plots, parameter scans or the validation of strain design modules.
+    
+    Changes of the model after the construction of the FluxProblem are not reflected.
+    
+    Example:
+        problem = FluxProblem(model, solver='glpk')
+        for o2 in range(10):
+            problem.push_constraints('EX_o2_e >= ' + str(-o2))
+            sol = problem.fba(obj='BIOMASS_Ecoli_core_w_GAM', obj_sense='max')
+            problem.pop_constraints()
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+    
+        solver (optional (str)):
+            The solver that should be used.
+    
+        constraints (optional (str) or (list of str) or (list of [dict,str,float])): (Default: None)
+            *Linear* constraints that are pushed onto the constraint stack right away (see fba()).
+    """
+
+    def __init__(self, model, solver=None, constraints=None):
+        S, lb, ub, reaction_ids = get_stoichiometry(model)
+        self._prepare(model, S, lb, ub, reaction_ids, select_solver(solver, model), [r.objective_coefficient for r in model.reactions],
+                      'maximize' if model.objective_direction == 'max' else 'minimize', constraints)
+
+    @classmethod
+    def from_matrices(cls, S, lb, ub, reaction_ids, solver=None, constraints=None):
+        """Prepare the LPs from a stoichiometric matrix and flux bounds instead of a model
+        
+        The workers of parallel computations use this constructor, so that they only receive the
+        matrix and the bounds instead of a pickled copy of the whole model. The default objective
+        is empty.
+        
+        Args:
+            S (sparse.csr_matrix), lb (list of float), ub (list of float), reaction_ids (list of str):
+                The stoichiometric matrix, the flux bounds and the reaction identifiers (see get_stoichiometry()).
+        
+            solver (optional (str)), constraints (optional (list)):
+                The solver and the constraints (see FluxProblem).
+        
+        Returns:
+            (FluxProblem):
+                The prepared problem.
+        """
+        problem = cls.__new__(cls)
+        problem._prepare(None, S, lb, ub, reaction_ids, select_solver(solver), [0.0] * len(reaction_ids), 'maximize', constraints)
+        return problem
+
+    def _prepare(self, model, S, lb, ub, reaction_ids, solver, c, obj_sense, constraints):
+        self.model = model
+        self.S, self.lb, self.ub, self.reaction_ids = S, lb, ub, reaction_ids
+        self._reaction_index = {r: i for i, r in enumerate(self.reaction_ids)}
+        self.solver = solver
+        # objective of the model, restored by set_objective()
+        self._model_c = c
+        self._model_obj_sense = obj_sense
+        self.c = list(c)
+        self.obj_sense = obj_sense
+        # stack of constraint lists and of the corresponding inequality rows (a, b) with a*x <= b
+        self.constraints = []
+        self._rows = []
+        # prepared LPs: Each LP has two reserved inequality rows (0 and 1) to fix a linear expression to a
+        # value. Rows of popped constraints are replaced by 0 <= 0 and reused for the next constraints.
+        self._lps = {}
+        self._capacity = 16
+        self._get_lp('fba')
+        if constraints:
+            self.push_constraints(constraints)
+
+    def push_constraints(self, constraints):
+        """Add *linear* constraints on top of the model and the previously pushed constraints
+        
+        Args:
+            constraints ((str) or (list of str) or (list of [dict,str,float])):
+                The constraints in any of the formats accepted by fba().
+        """
+        constraints = parse_constraints(constraints, self.reaction_ids)
+        A_ineq, b_ineq, A_eq, b_eq = lineqlist2mat(constraints, self.reaction_ids)
+        rows = [(A_ineq[[i], :].toarray()[0].tolist(), b_ineq[i]) for i in range(A_ineq.shape[0])]
+        for i in range(A_eq.shape[0]):
+            a = A_eq[[i], :].toarray()[0].tolist()
+            rows += [(a, b_eq[i]), ([-v for v in a], -b_eq[i])]
+        self.constraints.append(constraints)
+        self._rows.append(rows)
+        for kind in list(self._lps):
+            self._push_rows(kind, rows)
+
+    def replace_constraints(self, constraints):
+        """Replace the constraints that were pushed last by constraints of the same form
+        
+        Faster than popping and pushing constraints, because the constraints are not parsed and the rows of
+        the prepared LPs are overwritten in place. This is useful to move a point along an axis, e.g., by
+        changing the right hand side of an equality.
+        
+        Args:
+            constraints (list of [dict,str,float]):
+                The new constraints in the list of lists format, e.g., [[{'EX_o2_e': 1.0}, '=', -5.0]]. They must
+                have the same senses ('<=', '>=' or '=') as the constraints that were pushed last.
+        """
+        if not self.constraints:
+            raise Exception('No constraints to replace.')
+        if [c[1] for c in constraints] != [c[1] for c in self.constraints[-1]]:
+            raise Exception('The constraints must have the same senses as the constraints that were pushed last.')
+        ineq_rows = []
+        eq_rows = []
+        for expr, sense, rhs in constraints:
+            a = [0.0] * len(self.reaction_ids)
+            for r, v in expr.items():
+                a[self._reaction_index[r]] = v
+            if sense == '=':
+                eq_rows += [(a, rhs), ([-v for v in a], -rhs)]
+            elif sense == '<=':
+                ineq_rows += [(a, rhs)]
+            else:
+                ineq_rows += [([-v for v in a], -rhs)]
+        rows = ineq_rows + eq_rows  # same order as in push_constraints
+        self.constraints[-1] = constraints
+        self._rows[-1] = rows
+        for kind, prep in self._lps.items():
+            for i, (a, b) in zip(prep['rows'][-1], rows):
+                prep['lp'].set_ineq_constraint(i, *self._map_row(kind, a, b))
+
+    def pop_constraints(self):
+        """Remove the constraints that were pushed last"""
+        if not self.constraints:
+            raise Exception('No constraints to pop.')
+        self.constraints.pop()
+        self._rows.pop()
+        for prep in self._lps.values():
+            idx = prep['rows'].pop()
+            numvars = len(prep['lp'].c)
+            for i in idx:
+                prep['lp'].set_ineq_constraint(i, [0.0] * numvars, 0.0)
+            prep['free'] += idx
+
+    def set_objective(self, obj=None, obj_sense=None):
+        """Replace the default objective function used by fba() and pfba()
+        
+        Args:
+            obj (optional (str) or (dict)): (Default: None)
+                A linear expression, e.g., 'BIOMASS_Ecoli_core_w_GAM' or {'EX_etoh_e': 1}. If None, the
+                objective of the model is used.
+        
+            obj_sense (optional (str)): (Default: None)
+                'maximize' (or 'max') or 'minimize' (or 'min'). If None, the sense of the model is used.
+        """
+        self.c = self._linexpr2list(obj) if obj is not None else list(self._model_c)
+        if obj_sense is None:
+            obj_sense = self._model_obj_sense
+        self.obj_sense = 'minimize' if obj_sense in ['min', 'minimize'] else 'maximize'
+
+    def fba(self, obj=None, obj_sense=None) -> Solution:
+        """Flux Balance Analysis (FBA) on the prepared LP
+        
+        Args:
+            obj (optional (str) or (dict)): (Default: None)
+                A linear objective function. By default, the objective set with set_objective() is used.
+        
+            obj_sense (optional (str)): (Default: None)
+                'maximize' (or 'max') or 'minimize' (or 'min'). By default, the sense set with set_objective()
+                is used.
+        
+        Returns:
+            (cobra.core.Solution):
+                A solution object that contains the objective value, an optimal flux vector and the
+                optmization status.
+        """
+        x, value, status, _, _ = self._fba(obj, obj_sense)
+        return self._solution(value, status, x)
+
+    def pfba(self, obj=None, obj_sense=None) -> Solution:
+        """Parsimonious Flux Balance Analysis (pFBA) on the prepared LPs
+        
+        Among all optimal flux vectors, returns one with the minimal total sum of absolute fluxes.
+        
+        Args:
+            obj (optional (str) or (dict)), obj_sense (optional (str)):
+                The objective function and the optimization direction (see fba()).
+        
+        Returns:
+            (cobra.core.Solution):
+                A solution object that contains the objective value, a parsimonious optimal flux vector and
+                the optmization status.
+        """
+        x, value, status, c, opt_cx = self._fba(obj, obj_sense)
+        if status == OPTIMAL:
+            numr = len(self.reaction_ids)
+            lp = self._get_lp('pfba')
+            c_pfba = c + [-v for v in c]
+            self._fix_expression(lp, c_pfba, opt_cx)
+            z, _, _ = lp.solve()
+            self._release_expression(lp)
+            x = [z[i] - z[j] for i, j in enumerate(range(numr, 2 * numr))]
+        return self._solution(value, status, x)
+
+    def yopt(self, obj_num, obj_den, obj_sense='maximize') -> Solution:
+        """Yield optimization (YOpt) on the prepared LPs
+        
+        Args:
+            obj_num ((str) or (dict)), obj_den ((str) or (dict)):
+                Numerator and denominator of the fractional objective function (see yopt()).
+        
+            obj_sense (optional (str)): (Default: 'maximize')
+                The optimization direction can be set either to 'maximize' (or 'max') or 'minimize' (or 'min').
+        
+        Returns:
+            (cobra.core.Solution):
+                A solution object that contains the objective value, an optimal flux vector and the optmization
+                status.
+        """
+        num = self._linexpr2list(obj_num)
+        den = self._linexpr2list(obj_den)
+        maximize = obj_sense not in ['min', 'minimize']
+        if not maximize:
+            num = [-v for v in num]
+        # Analyze maximum and minimum value of denominator function to decide whether to fix it to +1 or -1
+        lp = self._get_lp('fba')
+        lp.set_objective(den)
+        _, min_denx, status = lp.solve()
+        if status not in [OPTIMAL, UNBOUNDED]:
+            return self._solution(nan, INFEASIBLE, [nan] * len(self.reaction_ids))
+        den_sign = []
+        if min_denx < 0:
+            den_sign += [-1]
+        lp.set_objective([-v for v in den])
+        _, max_denx, _ = lp.solve()
+        if max_denx < 0:
+            den_sign += [1]
+        if not den_sign:
+            logging.error('Denominator term can only take the value 0. Yield computation impossible.')
+            return self._solution(nan, INFEASIBLE, [nan] * len(self.reaction_ids))
+        # linear fractional program with the scaling variable t as last variable
+        lfp = self._get_lp('yopt')
+        opt_cx = inf
+        status = INFEASIBLE
+        for d in den_sign:
+            self._fix_expression(lfp, den + [0.0], d)
+            lfp.set_objective([-d * v for v in num] + [0.0])
+            x_i, opt_i, status_i = lfp.solve()
+            if opt_i < opt_cx:
+                x = x_i
+                opt_cx = opt_i
+                status = status_i
+        self._release_expression(lfp)
+        if status == OPTIMAL:
+            factor = x[-1] if x[-1] != 0 else 1
+            sol = self._solution(-opt_cx if maximize else opt_cx, status, [v / factor for v in x[:-1]])
+            sol.scalable = x[-1] == 0
+            return sol
+        elif status == UNBOUNDED:
+            # the denominator can become zero, treat this rare case with the full yield optimization
+            return yopt(self._get_model(),
+                        obj_num=obj_num,
+                        obj_den=obj_den,
+                        obj_sense=obj_sense,
+                        constraints=[c for constraints in self.constraints for c in constraints],
+                        solver=self.solver)
+        return self._solution(nan, INFEASIBLE, [nan] * len(self.reaction_ids))
+
+    def _get_model(self):
+        """Return the model, or build a model from the matrices if the problem was prepared without one"""
+        if self.model is None:
+            model = Model()
+            metabolites = [Metabolite('M' + str(i)) for i in range(self.S.shape[0])]
+            S = sparse.csc_matrix(self.S)
+            reactions = []
+            for j, r_id in enumerate(self.reaction_ids):
+                reaction = Reaction(r_id, lower_bound=self.lb[j], upper_bound=self.ub[j])
+                col = slice(S.indptr[j], S.indptr[j + 1])
+                reaction.add_metabolites({metabolites[i]: v for i, v in zip(S.indices[col], S.data[col])})
+                reactions.append(reaction)
+            model.add_reactions(reactions)
+            self.model = model
+        return self.model
+
+    def _fba(self, obj, obj_sense):
+        c = self._linexpr2list(obj) if obj is not None else self.c
+        if obj_sense is None:
+            obj_sense = self.obj_sense
+        maximize = obj_sense not in ['min', 'minimize']
+        if maximize:
+            c = [-v for v in c]
+        lp = self._get_lp('fba')
+        lp.set_objective(c)
+        x, opt_cx, status = lp.solve()
+        if status == UNBOUNDED:
+            lp.set_objective([-v for v in c])
+            min_cx = lp.slim_solve()
+            self._fix_expression(lp, c, -1.0 if min_cx <= 0 or isnan(min_cx) else min_cx)
+            x, _, _ = lp.solve()
+            self._release_expression(lp)
+        elif status not in [OPTIMAL, UNBOUNDED]:
+            status = INFEASIBLE
+        return x, -opt_cx if maximize else opt_cx, status, c, opt_cx
+
+    def _get_lp(self, kind):
+        """Return the prepared LP for 'fba', 'pfba' or 'yopt' and build it on first use"""
+        if kind not in self._lps:
+            numr = len(self.reaction_ids)
+            numm = self.S.shape[0]
+            numvars = {'fba': numr, 'pfba': 2 * numr, 'yopt': numr + 1}[kind]
+            # Rows for the pushed constraints are allocated in advance, because solvers only allow to
+            # replace inequalities that are part of the initial problem.
+            rows = [self._map_row(kind, a, b) for rows in self._rows for a, b in rows]
+            num_free = max(self._capacity, 2 * len(rows)) - len(rows)
+            A_rows = sparse.vstack([sparse.csr_matrix([a], shape=(1, numvars)) for a, _ in rows] +
+                                   [sparse.csr_matrix((num_free, numvars))])
+            b_rows = [b for _, b in rows] + [0.0] * num_free
+            if kind == 'fba':
+                A_fixed = sparse.csr_matrix((0, numr))
+                lp_kwargs = {'A_eq': self.S, 'lb': self.lb, 'ub': self.ub}
+            elif kind == 'pfba':
+                # split all reactions into a forward and a backward part and minimize the total flux
+                A_fixed = sparse.csr_matrix((0, 2 * numr))
+                lp_kwargs = {
+                    'c': [1.0] * 2 * numr,
+                    'A_eq': sparse.hstack((self.S, -self.S)),
+                    'lb': [max((0, l)) for l in self.lb] + [max((0, -u)) for u in self.ub],
+                    'ub': [max((0, u)) for u in self.ub] + [max((0, -l)) for l in self.lb]
+                }
+            elif kind == 'yopt':
+                # bounds are integrated into the inequality constraints and scaled with the last variable t
+                real_lb = [i for i, v in enumerate(self.lb) if not isinf(v)]
+                real_ub = [i for i, v in enumerate(self.ub) if not isinf(v)]
+                A_fixed = sparse.vstack(
+                    (sparse.coo_matrix(([-1.0] * len(real_lb) + [self.lb[i] for i in real_lb],
+                                        (list(range(len(real_lb))) * 2, real_lb + [numr] * len(real_lb))),
+                                       (len(real_lb), numr + 1)),
+                     sparse.coo_matrix(([1.0] * len(real_ub) + [-self.ub[i] for i in real_ub],
+                                        (list(range(len(real_ub))) * 2, real_ub + [numr] * len(real_ub))),
+                                       (len(real_ub), numr + 1))))
+                lp_kwargs = {'A_eq': sparse.hstack((self.S, sparse.csr_matrix((numm, 1))))}
+            lp = MILP_LP(A_ineq=sparse.vstack((sparse.csr_matrix((2, numvars)), A_fixed, A_rows), 'csr'),
+                         b_ineq=[0.0, 0.0] + [0.0] * A_fixed.shape[0] + b_rows,
+                         b_eq=[0.0] * numm,
+                         solver=self.solver,
+                         **lp_kwargs)
+            first = 2 + A_fixed.shape[0]
+            prep = {'lp': lp, 'rows': [], 'free': list(range(first + len(rows), first + len(rows) + num_free))[::-1]}
+            for rows in self._rows:
+                prep['rows'].append(list(range(first, first + len(rows))))
+                first += len(rows)
+            self._lps[kind] = prep
+        return self._lps[kind]['lp']
+
+    def _map_row(self, kind, a, b):
+        """Translate an inequality a*x <= b into the variables of one of the prepared LPs"""
+        if kind == 'pfba':
+            return a + [-v for v in a], b
+        elif kind == 'yopt':
+            return a + [-b], 0.0
+        return a, b
+
+    def _push_rows(self, kind, rows):
+        """Add the inequality rows (a, b) of the latest constraint set to one of the prepared LPs"""
+        prep = self._lps[kind]
+        if len(prep['free']) < len(rows):
+            # not enough free rows, rebuild the LP with a larger number of rows
+            self._capacity = 2 * (self._capacity + len(rows))
+            del self._lps[kind]
+            self._get_lp(kind)
+            return
+        idx = []
+        for a, b in rows:
+            idx += [prep['free'].pop()]
+            prep['lp'].set_ineq_constraint(idx[-1], *self._map_row(kind, a, b))
+        prep['rows'].append(idx)
+
+    def _fix_expression(self, lp, a, value):
+        """Fix a*x to a value using the two reserved rows of an LP"""
+        lp.set_ineq_constraint(0, a, value)
+        lp.set_ineq_constraint(1, [-v for v in a], -value)
+
+    def _release_expression(self, lp):
+        """Reset the two reserved rows of an LP to 0 <= 0"""
+        lp.set_ineq_constraint(0, [0.0] * len(lp.c), 0.0)
+        lp.set_ineq_constraint(1, [0.0] * len(lp.c), 0.0)
+
+    def _linexpr2list(self, expr):
+        if type(expr) is str:
+            expr = linexpr2mat(expr, self.reaction_ids)
+        elif type(expr) is dict:
+            expr = linexprdict2mat(expr, self.reaction_ids)
+        return sparse.csr_matrix(expr).toarray()[0].tolist()
+
+    def _solution(self, value, status, x):
+        x = [v if abs(v) >= 1e-11 or isnan(v) else 0.0 for v in x]  # cut off for very small absolute values
+        return Solution(objective_value=value, status=status, fluxes={r: x[i] for i, r in enumerate(self.reaction_ids)})
@@ -19,13 +19,29 @@
 """GLPK solver interface for LP and MILP"""
 
 from scipy import sparse
-from numpy import nan, isnan, inf, isinf, sum
+from numpy import nan, isnan, inf, isinf, sum, array, nonzero
+from numpy.ctypeslib import as_array
+from ctypes import cast, POINTER, c_int, c_double
 from straindesign.names import *
 from typing import Tuple, List
 from swiglpk import *
 import logging
 
 
+def glpk_int_array(values) -> intArray:
+    """GLPK array of integers filled with the values of a numpy array (GLPK indexing starts with 1)"""
+    arr = intArray(len(values) + 1)
+    as_array(cast(int(arr.this), POINTER(c_int)), shape=(len(values) + 1,))[1:] = values
+    return arr
+
+
+def glpk_double_array(values) -> doubleArray:
+    """GLPK array of doubles filled with the values of a numpy array (GLPK indexing starts with 1)"""
+    arr = doubleArray(len(values) + 1)
+    as_array(cast(int(arr.this), POINTER(c_double)), shape=(len(values) + 1,))[1:] = values
+    return arr
+
+
 class GLPK_MILP_LP():
     """GLPK interface for MILP and LP
     
@@ -121,8 +137,7 @@ class GLPK_MILP_LP():
         if numvars > 0:
             glp_add_cols(self.glpk, numvars)
         for i, v in enumerate(vtype):
-            if v == 'C':
-                glp_set_col_kind(self.glpk, i + 1, GLP_CV)
+            # new columns are continuous by default
             if v == 'I':
                 glp_set_col_kind(self.glpk, i + 1, GLP_IV)
             if v == 'B':
@@ -145,38 +160,18 @@ class GLPK_MILP_LP():
         # set objective
         glp_set_obj_dir(self.glpk, GLP_MIN)
         for i, c_i in enumerate(c):
-            glp_set_obj_coef(self.glpk, i + 1, float(c_i))
+            if c_i:
+                glp_set_obj_coef(self.glpk, i + 1, float(c_i))
 
         # add indicator constraints
-        A_indic = sparse.lil_matrix((0, numvars))
+        A_indic = sparse.csr_matrix((0, numvars))
         b_indic = []
         if not indic_constr == None:
             if not M:
                 M = 1e3
             logging.warning('There is no native support of indicator constraints with GLPK.')
             logging.warning('Indicator constraints are translated to big-M constraints with M=' + str(M) + '.')
-            num_ic = len(indic_constr.binv)
-
-            eq_type_indic = []  # [GLP_UP]*len(b_ineq)+[GLP_FX]*len(b_eq)
-            for i in range(num_ic):
-                binv = indic_constr.binv[i]
-                indicval = indic_constr.indicval[i]
-                A = indic_constr.A[i]
-                b = float(indic_constr.b[i])
-                sense = indic_constr.sense[i]
-                if sense == 'E':
-                    A = sparse.vstack((A, -A)).tolil()
-                    b = [b, -b]
-                else:
-                    A = A.tolil()
-                    b = [b]
-                if indicval:
-                    A[:, binv] = M
-                    b = [v + M for v in b]
-                else:
-                    A[:, binv] = -M
-                A_indic = sparse.vstack((A_indic, A))
-                b_indic = b_indic + b
+            A_indic, b_indic = indic_constr.to_bigM(M)
 
         # stack all problem rows and add constraints
         if A_ineq.shape[0] + A_eq.shape[0] + A_indic.shape[0] > 0:
@@ -186,22 +181,19 @@ class GLPK_MILP_LP():
                 glp_set_row_bnds(self.glpk, i + 1, t, b, b)
 
             A = sparse.vstack((A_ineq, A_eq, A_indic), 'coo')
-            ia = intArray(A.nnz + 1)
-            ja = intArray(A.nnz + 1)
-            ar = doubleArray(A.nnz + 1)
-            for i, row, col, data in zip(range(A.nnz), A.row, A.col, A.data):
-                ia[i + 1] = int(row) + 1
-                ja[i + 1] = int(col) + 1
-                ar[i + 1] = float(data)
+            A.sum_duplicates()
             if A.nnz:
-                glp_load_matrix(self.glpk, A.nnz, ia, ja, ar)
+                glp_load_matrix(self.glpk, A.nnz, glpk_int_array(A.row + 1), glpk_int_array(A.col + 1), glpk_double_array(A.data))
 
         # not sure if the parameter setup is okay
         # LP simplex parameters
         self.lp_params = glp_smcp()
         glp_init_smcp(self.lp_params)
         self.max_tlim = self.lp_params.tm_lim
-        self.lp_params.tol_bnd = 1e-9
+        # GLPK's default bound tolerance. With a tighter tolerance, the small bound violations that remain
+        # after the simplex removes its anti-degeneracy perturbation make the basis count as infeasible.
+        # Warm-started solves from this basis then report feasible LPs as infeasible.
+        self.lp_params.tol_bnd = 1e-7
         self.lp_params.msg_lev = 0
         # MILP parameters
         if self.ismilp:
@@ -401,17 +393,11 @@ class GLPK_MILP_LP():
             b_ineq (list of float):
                 The right hand side vector
         """
-        numvars = glp_get_num_cols(self.glpk)
         numrows = glp_get_num_rows(self.glpk)
         num_newrows = A_ineq.shape[0]
-        col = intArray(numvars + 1)
-        val = doubleArray(numvars + 1)
         glp_add_rows(self.glpk, num_newrows)
+        self.set_mat_rows(numrows, A_ineq)
         for j in range(num_newrows):
-            for i, v in enumerate(A_ineq[j].toarray()[0]):
-                col[i + 1] = i + 1
-                val[i + 1] = float(v)
-            glp_set_mat_row(self.glpk, numrows + j + 1, numvars, col, val)
             if isinf(b_ineq[j]):
                 glp_set_row_bnds(self.glpk, numrows + j + 1, GLP_FR, -inf, b_ineq[j])
             else:
@@ -431,17 +417,11 @@ class GLPK_MILP_LP():
             b_eq (list of float):
                 The right hand side vector
         """
-        numvars = glp_get_num_cols(self.glpk)
         numrows = glp_get_num_rows(self.glpk)
         num_newrows = A_eq.shape[0]
-        col = intArray(numvars + 1)
-        val = doubleArray(numvars + 1)
         glp_add_rows(self.glpk, num_newrows)
+        self.set_mat_rows(numrows, A_eq)
         for j in range(num_newrows):
-            for i, v in enumerate(A_eq[j].toarray()[0]):
-                col[i + 1] = i + 1
-                val[i + 1] = float(v)
-            glp_set_mat_row(self.glpk, numrows + j + 1, numvars, col, val)
             glp_set_row_bnds(self.glpk, numrows + j + 1, GLP_FX, b_eq[j], b_eq[j])
 
     def set_ineq_constraint(self, idx, a_ineq, b_ineq):
@@ -459,18 +439,46 @@ class GLPK_MILP_LP():
             b_ineq (float):
                 The right hand side value
         """
-        numvars = glp_get_num_cols(self.glpk)
-        col = intArray(numvars + 1)
-        val = doubleArray(numvars + 1)
-        for i, v in enumerate(a_ineq):
-            col[i + 1] = i + 1
-            val[i + 1] = float(v)
-        glp_set_mat_row(self.glpk, idx + 1, numvars, col, val)
+        a_ineq = array(a_ineq, dtype=float)
+        cols = nonzero(a_ineq)[0]
+        glp_set_mat_row(self.glpk, idx + 1, len(cols), glpk_int_array(cols + 1), glpk_double_array(a_ineq[cols]))
         if isinf(b_ineq):
             glp_set_row_bnds(self.glpk, idx + 1, GLP_FR, -inf, b_ineq)
         else:
             glp_set_row_bnds(self.glpk, idx + 1, GLP_UP, -inf, b_ineq)
 
+    def get_basis(self) -> Tuple[List, List]:
+        """Retrieve the simplex basis from GLPK"""
+        stat_map = {GLP_BS: BASIC, GLP_NL: AT_LOWER, GLP_NU: AT_UPPER, GLP_NF: FREE, GLP_NS: AT_UPPER}
+        var_stat = [stat_map[glp_get_col_stat(self.glpk, j + 1)] for j in range(glp_get_num_cols(self.glpk))]
+        constr_stat = [stat_map[glp_get_row_stat(self.glpk, i + 1)] for i in range(glp_get_num_rows(self.glpk))]
+        return var_stat, constr_stat
+
+    def set_basis(self, var_stat, constr_stat):
+        """Set a starting basis for the next simplex solve
+        
+        GLPK replaces a status that does not match the bounds of a variable or constraint (e.g., AT_UPPER
+        for an equality) with an appropriate one. Constraints that are not covered by constr_stat (such as
+        big-M rows of indicator constraints) become basic."""
+        stat_map = {BASIC: GLP_BS, AT_LOWER: GLP_NL, AT_UPPER: GLP_NU, FREE: GLP_NF}
+        for j, v in enumerate(var_stat):
+            glp_set_col_stat(self.glpk, j + 1, stat_map[v])
+        for i in range(glp_get_num_rows(self.glpk)):
+            glp_set_row_stat(self.glpk, i + 1, stat_map[constr_stat[i]] if i < len(constr_stat) else GLP_BS)
+
+    def set_mip_start(self, x):
+        """MIP starts are not supported by GLPK. The start is ignored."""
+        pass
+
+    def set_mat_rows(self, first, A):
+        """Set the coefficients of the rows first+1, first+2, ... (GLPK indexing) to the rows of a sparse matrix"""
+        A = sparse.csr_matrix(A)
+        A.sum_duplicates()
+        for j in range(A.shape[0]):
+            cols = A.indices[A.indptr[j]:A.indptr[j + 1]]
+            vals = A.data[A.indptr[j]:A.indptr[j + 1]]
+            glp_set_mat_row(self.glpk, first + j + 1, len(cols), glpk_int_array(cols + 1), glpk_double_array(vals))
+
     def getSolution(self, status) -> list:
         """Retrieve solution from GLPK backend"""
         if self.ismilp and status in [OPTIMAL, UNBOUNDED, TIME_LIMIT_W_SOL]:
@@ -495,6 +503,10 @@ class GLPK_MILP_LP():
             prelim_status = glp_simplex(self.glpk, self.lp_params)
             self.lp_params.presolve = 0
             self.lp_params.meth = 1
+        # After constraints were replaced, the basis of the previous solve may be invalid or singular.
+        if prelim_status in [GLP_EBADB, GLP_ESING, GLP_ECOND]:
+            glp_std_basis(self.glpk)
+            prelim_status = glp_simplex(self.glpk, self.lp_params)
         status = glp_get_status(self.glpk)
         if self.ismilp and status not in [GLP_INFEAS, GLP_NOFEAS]:
             glp_intopt(self.glpk, self.milp_params)
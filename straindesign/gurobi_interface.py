@@ -19,6 +19,8 @@
 """Gurobi solver interface for LP and MILP"""
 
 from random import randint
+from os import getpid
+from threading import local
 from scipy import sparse
 from numpy import nan, inf, isinf, sum, array
 import gurobipy as gp
@@ -28,6 +30,27 @@ from typing import Tuple, List
 import logging
 
 gstatus = gp.StatusConstClass
+_env = local()  # process id (pid) and gurobi environment (env) shared by all models of a thread
+
+
+def gurobi_env() -> gp.Env:
+    """Gurobi environment that is shared by all Gurobi_MILP_LP instances of the current thread
+    
+    Starting a Gurobi environment (and checking out the license) is expensive compared to the
+    construction of small LPs. The environment is therefore started once and then reused. Gurobi
+    environments must not be used by several threads at the same time, so each thread (e.g., of
+    a thread pool for FVA) and each forked worker process starts its own environment.
+    
+    Returns:
+        (gp.Env):
+            A started Gurobi environment with disabled console output.
+    """
+    if getattr(_env, 'pid', None) != getpid():
+        env = gp.Env(empty=True)
+        env.setParam('OutputFlag', 0)
+        env.start()
+        _env.pid, _env.env = getpid(), env
+    return _env.env
 
 
 class Gurobi_MILP_LP(gp.Model):
@@ -94,7 +117,7 @@ class Gurobi_MILP_LP(gp.Model):
     """
 
     def __init__(self, c, A_ineq, b_ineq, A_eq, b_eq, lb, ub, vtype, indic_constr):
-        super().__init__()
+        super().__init__(env=gurobi_env())
         try:
             numvars = A_ineq.shape[1]
         except:
@@ -112,22 +135,25 @@ class Gurobi_MILP_LP(gp.Model):
                 b_ineq[i] = grb.INFINITY
         # concatenate right hand sides
         # construct Gurobi problem. Add variables and linear constraints
+        # the sparse matrices are passed to Gurobi without building expressions
         x = self.addMVar(len(c), obj=c, lb=lb, ub=ub, vtype=[k for k in vtype])
-        self.setObjective(array(c) @ x, grb.MINIMIZE)
+        self.ModelSense = grb.MINIMIZE
         if A_ineq.shape[0]:
-            self.addConstr(A_ineq @ x <= array(b_ineq))
+            self.addMConstr(sparse.csr_matrix(A_ineq), x, grb.LESS_EQUAL, array(b_ineq, dtype=float))
         if A_eq.shape[0]:
-            self.addConstr(A_eq @ x == array(b_eq))
+            self.addMConstr(sparse.csr_matrix(A_eq), x, grb.EQUAL, array(b_eq, dtype=float))
+        self.update()
 
         # add indicator constraints
         if not indic_constr == None:
+            vars = self._Model__vars
+            A_indic = sparse.csr_matrix(indic_constr.A)
             for i in range(len(indic_constr.sense)):
-                self.addGenConstrIndicator(x[indic_constr.binv[i]],
-                                        bool(indic_constr.indicval[i]),
-                                        sum([indic_constr.A[i,j] * x[j] \
-                                            for j in range(len(c)) if not indic_constr.A[i,j] == 0.0]),
-                                        '=' if indic_constr.sense[i] =='E' else '<',
-                                        indic_constr.b[i])
+                cols = A_indic.indices[A_indic.indptr[i]:A_indic.indptr[i + 1]]
+                vals = A_indic.data[A_indic.indptr[i]:A_indic.indptr[i + 1]]
+                self.addGenConstrIndicator(vars[indic_constr.binv[i]], bool(indic_constr.indicval[i]),
+                                           gp.LinExpr(vals.tolist(), [vars[j] for j in cols]),
+                                           grb.EQUAL if indic_constr.sense[i] == 'E' else grb.LESS_EQUAL, float(indic_constr.b[i]))
 
         # set parameters
         self.params.OutputFlag = 0
@@ -313,9 +339,8 @@ class Gurobi_MILP_LP(gp.Model):
             b_ineq (list of float):
                 The right hand side vector
         """
-        vars = self._Model__vars
-        for i in range(A_ineq.shape[0]):
-            self.addConstr(sum([A_ineq[i, j] * vars[j] for j in range(len(vars)) if not A_ineq[i, j] == 0.0]) <= b_ineq[i])
+        b_ineq = array([grb.INFINITY if isinf(b) else b for b in b_ineq], dtype=float)
+        self.addMConstr(sparse.csr_matrix(A_ineq), None, grb.LESS_EQUAL, b_ineq)
         self.update()
 
     def add_eq_constraints(self, A_eq, b_eq):
@@ -332,9 +357,7 @@ class Gurobi_MILP_LP(gp.Model):
             b_eq (list of float):
                 The right hand side vector
         """
-        vars = self._Model__vars
-        for i in range(A_eq.shape[0]):
-            self.addConstr(sum([A_eq[i, j] * vars[j] for j in range(len(vars)) if not A_eq[i, j] == 0.0]) == b_eq[i])
+        self.addMConstr(sparse.csr_matrix(A_eq), None, grb.EQUAL, array(b_eq, dtype=float))
         self.update()
 
     def set_ineq_constraint(self, idx, a_ineq, b_ineq):
@@ -360,6 +383,67 @@ class Gurobi_MILP_LP(gp.Model):
             constr.rhs = b_ineq
         self.update()
 
+    def get_basis(self) -> Tuple[List, List]:
+        """Retrieve the simplex basis from Gurobi (or None if there is no basis)"""
+        try:
+            var_stat = self.getAttr('VBasis', self.getVars())
+            constr_stat = self.getAttr('CBasis', self.getConstrs())
+        except gp.GurobiError:
+            return None
+        var_map = {0: BASIC, -1: AT_LOWER, -2: AT_UPPER, -3: FREE}
+        # Gurobi reports the status of the slack variables, a nonbasic slack corresponds to an active constraint
+        return [var_map[v] for v in var_stat], [BASIC if v == 0 else AT_UPPER for v in constr_stat]
+
+    def set_basis(self, var_stat, constr_stat):
+        """Set a starting basis for the next simplex solve"""
+        var_map = {BASIC: 0, AT_LOWER: -1, AT_UPPER: -2, FREE: -3}
+        self.setAttr('VBasis', self.getVars(), [var_map[v] for v in var_stat])
+        self.setAttr('CBasis', self.getConstrs(), [0 if v == BASIC else -1 for v in constr_stat])
+        self.update()
+
+    def solve_lazy(self, separate) -> Tuple[List, float, float]:
+        """Solve the MILP and pass every new incumbent to a function that may reject it with lazy constraints
+        
+        separate(x) returns a list of cuts (a, b) with a sparse row vector a that reject the candidate x through
+        a * x <= b, an empty list to accept x or None to stop the solution process.
+        """
+        vars = self.getVars()
+
+        def callback(model, where):
+            if where == grb.Callback.MIPSOL:
+                cuts = separate(model.cbGetSolution(vars))
+                if cuts is None:
+                    model.terminate()
+                    return
+                for a, b in cuts:
+                    model.cbLazy(gp.LinExpr(a.data.tolist(), [vars[j] for j in a.indices]) <= b)
+
+        self.params.LazyConstraints = 1
+        try:
+            self.optimize(callback)
+        except gp.GurobiError as e:
+            logging.error('Error code ' + str(e.errno) + ": " + str(e))
+            return [nan] * self.NumVars, nan, ERROR
+        finally:
+            self.params.LazyConstraints = 0
+        status = self.Status
+        if status == gstatus.OPTIMAL:
+            return self.getSolution(), self.ObjVal, OPTIMAL
+        elif status == gstatus.INFEASIBLE:
+            return [nan] * self.NumVars, nan, INFEASIBLE
+        elif status in [gstatus.TIME_LIMIT, gstatus.INTERRUPTED] and self.SolCount > 0:
+            return self.getSolution(), self.ObjVal, TIME_LIMIT_W_SOL
+        elif status in [gstatus.TIME_LIMIT, gstatus.INTERRUPTED]:
+            return [nan] * self.NumVars, nan, TIME_LIMIT
+        else:
+            raise Exception('Status code ' + str(status) + " not yet handeld.")
+
+    def set_mip_start(self, x):
+        """Set the integer part of a solution vector as MIP start, Gurobi completes the continuous part"""
+        vars = self.getVars()
+        self.setAttr('Start', vars, [grb.UNDEFINED if v.VType == grb.CONTINUOUS else float(x_i) for v, x_i in zip(vars, x)])
+        self.update()
+
     def getSolution(self) -> list:
         """Retrieve solution from Gurobi backend"""
         return [x.X for x in self._Model__vars]
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+#
+# Copyright 2022 Max Planck Insitute Magdeburg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+#
+"""HiGHS solver interface for LP and MILP"""
+
+from scipy import sparse
+from numpy import nan, isnan, inf, isinf, sum, array, arange, nonzero, union1d
+from random import randint
+from time import time
+from straindesign.names import *
+from typing import Tuple, List
+import highspy
+import logging
+
+HighsModelStatus = highspy.HighsModelStatus
+HighsBasisStatus = highspy.HighsBasisStatus
+
+
+class HiGHS_MILP_LP():
+    """HiGHS interface for MILP and LP
+
+    This class is a wrapper for the HiGHS-Python API (highspy) to offer bindings and namings
+    for functions for the construction and manipulation of MILPs and LPs in an
+    vector-matrix-based manner that are consistent with those of the other solver
+    interfaces in the StrainDesign package. The purpose is to unify the instructions
+    for operating with MILPs and LPs throughout StrainDesign.
+
+    The problem is passed to HiGHS as a whole in row-wise sparse format. HiGHS keeps
+    the simplex basis of the last solve when the objective, bounds or constraints are
+    changed, such that sequences of related LPs (e.g., in FVA) are warm-started.
+
+    The HiGHS interface does not natively support indicator constraints. They are
+    hence translated to bigM-constraints when passed to the HiGHS constructor
+    (see docstring of IndicatorConstraints). The HiGHS interface does not natively
+    support the populate function. A high level implementation emulates the behavior
+    of populate.
+
+    Accepts a (mixed integer) linear problem in the form:
+        minimize(c),
+        subject to:
+        A_ineq * x <= b_ineq,
+        A_eq * x  = b_eq,
+        lb <= x <= ub,
+        forall(i) type(x_i) = vtype(i) (continous, binary, integer),
+        indicator constraints:
+        x(j) = [0|1] -> a_indic * x [<=|=|>=] b_indic
+
+    Please ensure that the number of variables and (in)equalities is consistent
+
+    Example:
+        highs = HiGHS_MILP_LP(c, A_ineq, b_ineq, A_eq, b_eq, lb, ub, vtype, indic_constr, M)
+
+    Args:
+        c (list of float): (Default: None)
+            The objective vector (Objective sense: minimization).
+
+        A_ineq (sparse.csr_matrix): (Default: None)
+            A coefficient matrix of the static inequalities.
+
+        b_ineq (list of float): (Default: None)
+            The right hand side of the static inequalities.
+
+        A_eq (sparse.csr_matrix): (Default: None)
+            A coefficient matrix of the static equalities.
+
+        b_eq (list of float): (Default: None)
+            The right hand side of the static equalities.
+
+        lb (list of float): (Default: None)
+            The lower variable bounds.
+
+        ub (list of float): (Default: None)
+            The upper variable bounds.
+
+        vtype (str): (Default: None)
+            A character string that specifies the type of each variable:
+            'c'ontinous, 'b'inary or 'i'nteger
+
+        indic_constr (IndicatorConstraints): (Default: None)
+            A set of indicator constraints stored in an object of IndicatorConstraints.
+            To make HiGHS compatible with indicator constraints, they are translated into
+            bigM-constraints (see reference manual or docstring of IndicatorConstraints).
+
+        M (int): (Default: None)
+            A large value that is used in the translation of indicator constraints to
+            bigM-constraints. If no value is provided, 1000 is used.
+
+        Returns:
+            (HiGHS_MILP_LP):
+
+            A HiGHS MILP/LP interface class.
+    """
+
+    def __init__(self, c, A_ineq, b_ineq, A_eq, b_eq, lb, ub, vtype, indic_constr, M=None):
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue('output_flag', False)
+        try:
+            numvars = A_ineq.shape[1]
+        except:
+            numvars = A_eq.shape[1]
+        # prepare coefficient matrix
+        if isinstance(A_eq, list):
+            if not A_eq:
+                A_eq = sparse.csr_matrix((0, numvars))
+        if isinstance(A_ineq, list):
+            if not A_ineq:
+                A_ineq = sparse.csr_matrix((0, numvars))
+
+        if all([v == 'C' for v in vtype]):
+            self.ismilp = False
+        else:
+            self.ismilp = True
+
+        # add indicator constraints
+        A_indic = sparse.csr_matrix((0, numvars))
+        b_indic = []
+        if not indic_constr == None:
+            if not M:
+                M = 1e3
+            logging.warning('There is no native support of indicator constraints with HiGHS.')
+            logging.warning('Indicator constraints are translated to big-M constraints with M=' + str(M) + '.')
+            A_indic, b_indic = indic_constr.to_bigM(M)
+
+        # build the problem in row-wise format and pass it to HiGHS at once
+        A = sparse.vstack((A_ineq, A_eq, A_indic), 'csr')
+        A.sum_duplicates()
+        lp = highspy.HighsLp()
+        lp.num_col_ = numvars
+        lp.num_row_ = A.shape[0]
+        lp.col_cost_ = array(c, dtype=float)
+        # binary variables are integer variables with bounds [0,1]
+        lp.col_lower_ = array([max(l, 0.0) if v == 'B' else l for l, v in zip(lb, vtype)], dtype=float)
+        lp.col_upper_ = array([min(u, 1.0) if v == 'B' else u for u, v in zip(ub, vtype)], dtype=float)
+        lp.row_lower_ = array([-inf] * len(b_ineq) + list(b_eq) + [-inf] * len(b_indic), dtype=float)
+        lp.row_upper_ = array(list(b_ineq) + list(b_eq) + list(b_indic), dtype=float)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = numvars
+        lp.a_matrix_.num_row_ = A.shape[0]
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+        if self.ismilp:
+            lp.integrality_ = [highspy.HighsVarType.kContinuous if v == 'C' else highspy.HighsVarType.kInteger for v in vtype]
+        self.highs.passModel(lp)
+        # keep costs, lower bounds and integer variables at hand, such that they need not be read back from HiGHS
+        self.c = array(lp.col_cost_, dtype=float)
+        self.lb = array(lp.col_lower_, dtype=float)
+        self.intvars = array([i for i, v in enumerate(vtype) if v != 'C'], dtype='int32')
+
+        # set parameters
+        self.highs.setOptionValue('primal_feasibility_tolerance', 1e-9)
+        self.highs.setOptionValue('dual_feasibility_tolerance', 1e-9)
+        if self.ismilp:
+            seed = randint(0, 2**31 - 1)
+            # logging.info('  MILP Seed: '+str(seed))
+            self.highs.setOptionValue('random_seed', seed)
+            self.highs.setOptionValue('mip_feasibility_tolerance', 1e-9)
+            self.highs.setOptionValue('mip_rel_gap', 0.0)
+        self.tlim = inf
+
+    def solve(self) -> Tuple[List, float, float]:
+        """Solve the MILP or LP
+
+        Example:
+            sol_x, optim, status = highs.solve()
+
+        Returns:
+            (Tuple[List, float, float])
+
+            solution_vector, optimal_value, optimization_status
+        """
+        try:
+            status = self.solve_MILP_LP()
+            numvars = self.highs.getNumCol()
+            has_sol = self.highs.getInfo().primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+            if status in [HighsModelStatus.kOptimal, HighsModelStatus.kModelEmpty]:  # solution
+                status = OPTIMAL
+            elif status == HighsModelStatus.kInfeasible:  # infeasible
+                return [nan] * numvars, nan, INFEASIBLE
+            elif status == HighsModelStatus.kTimeLimit and has_sol:  # timeout with solution
+                status = TIME_LIMIT_W_SOL
+            elif status == HighsModelStatus.kTimeLimit:  # timeout without solution
+                return [nan] * numvars, nan, TIME_LIMIT
+            elif status in [HighsModelStatus.kUnbounded, HighsModelStatus.kUnboundedOrInfeasible]:  # solution unbounded
+                if self.ismilp and has_sol:
+                    x = [round(y, 12) for y in self.highs.getSolution().col_value]
+                    return x, -inf, UNBOUNDED
+                return [nan] * numvars, -inf, UNBOUNDED
+            else:
+                raise Exception('Status code ' + str(status) + " not yet handeld.")
+            x = [round(y, 12) for y in self.highs.getSolution().col_value]  # workaround, round to 12 decimals
+            min_cx = round(self.highs.getInfo().objective_function_value, 12)
+            return x, min_cx, status
+        except:
+            logging.error('Error while running HiGHS.')
+            return [nan] * self.highs.getNumCol(), nan, -1
+
+    def slim_solve(self) -> float:
+        """Solve the MILP or LP, but return only the optimal value
+
+        Example:
+            optim = highs.slim_solve()
+
+        Returns:
+            (float)
+
+            Optimum value of the objective function.
+        """
+        try:
+            status = self.solve_MILP_LP()
+            if status in [HighsModelStatus.kOptimal, HighsModelStatus.kModelEmpty]:  # solution optimal (tolerance)
+                opt = self.highs.getInfo().objective_function_value
+            elif status in [HighsModelStatus.kUnbounded, HighsModelStatus.kUnboundedOrInfeasible]:  # solution unbounded
+                opt = -inf
+            elif status in [HighsModelStatus.kInfeasible, HighsModelStatus.kTimeLimit]:  # infeasible or timeout
+                opt = nan
+            else:
+                raise Exception('Status code ' + str(status) + " not yet handeld.")
+            opt = round(opt, 12)  # workaround, round to 12 decimals
+            return opt
+        except:
+            logging.error('Error while running HiGHS.')
+            return nan
+
+    def populate(self, pool_limit) -> Tuple[List, float, float]:
+        """Generate a solution pool for MILPs
+
+        This is only a high-level implementation of the populate function.
+        There is no native support in HiGHS.
+
+        Example:
+            sols_x, optim, status = highs.populate()
+
+        Returns:
+            (Tuple[List of lists, float, float])
+
+            solution_vectors, optimal_value, optimization_status
+        """
+        numvars = self.highs.getNumCol()
+        numrows = self.highs.getNumRow()
+        tlim = self.tlim
+        try:
+            if pool_limit > 0:
+                sols = []
+                stoptime = time() + tlim
+                # 1. find optimal solution
+                x, min_cx, status = self.solve()
+                if status not in [OPTIMAL, UNBOUNDED]:
+                    return sols, min_cx, status
+                sols = [x]
+                # 2. constrain problem to optimality
+                self.add_ineq_constraints(sparse.csr_matrix(self.c), [min_cx])
+                # 3. exclude first solution pool
+                self.addExclusionConstraintsIneq(x)
+                # 4. loop solve and exclude until problem becomes infeasible
+                while status in [OPTIMAL,UNBOUNDED] and not isnan(x[0]) \
+                  and stoptime - time() > 0 and pool_limit > len(sols):
+                    self.set_time_limit(stoptime - time())
+                    x, _, status = self.solve()
+                    if status in [OPTIMAL, UNBOUNDED]:
+                        self.addExclusionConstraintsIneq(x)
+                        sols += [x]
+                if stoptime - time() < 0:
+                    status = TIME_LIMIT_W_SOL
+                elif status == INFEASIBLE:
+                    status = OPTIMAL
+                # 5. remove auxiliary constraints
+                totrows = self.highs.getNumRow()
+                self.highs.deleteRows(totrows - numrows, arange(numrows, totrows, dtype='int32'))
+                self.set_time_limit(tlim)
+                return sols, min_cx, status
+        except:
+            logging.error('Error while running HiGHS.')
+            x = []
+            min_cx = nan
+            return x, min_cx, ERROR
+
+    def set_objective(self, c):
+        """Set the objective function with a vector"""
+        self.c[:len(c)] = c
+        self.highs.changeColsCost(len(c), arange(len(c), dtype='int32'), self.c[:len(c)])
+
+    def set_objective_idx(self, C):
+        """Set the objective function with index-value pairs
+
+        e.g.: C=[[1, 1.0], [4,-0.2]]"""
+        idx = array([c[0] for c in C], dtype='int32')
+        self.c[idx] = [c[1] for c in C]
+        self.highs.changeColsCost(len(C), idx, self.c[idx])
+
+    def set_ub(self, ub):
+        """Set the upper bounds to a given vector"""
+        setvars = array([ub[i][0] for i in range(len(ub))], dtype='int32')
+        self.highs.changeColsBounds(len(setvars), setvars, self.lb[setvars], array([ub[i][1] for i in range(len(ub))], dtype=float))
+
+    def set_time_limit(self, t):
+        """Set the computation time limit (in seconds)"""
+        self.tlim = t
+        self.highs.setOptionValue('time_limit', float(t) if t > 0 else 0.0)
+
+    def add_ineq_constraints(self, A_ineq, b_ineq):
+        """Add inequality constraints to the model
+
+        Additional inequality constraints have the form A_ineq * x <= b_ineq.
+        The number of columns in A_ineq must match with the number of variables x
+        in the problem.
+
+        Args:
+            A_ineq (sparse.csr_matrix):
+                The coefficient matrix
+
+            b_ineq (list of float):
+                The right hand side vector
+        """
+        self.add_rows(A_ineq, [-inf] * len(b_ineq), b_ineq)
+
+    def add_eq_constraints(self, A_eq, b_eq):
+        """Add equality constraints to the model
+
+        Additional equality constraints have the form A_eq * x = b_eq.
+        The number of columns in A_eq must match with the number of variables x
+        in the problem.
+
+        Args:
+            A_eq (sparse.csr_matrix):
+                The coefficient matrix
+
+            b_eq (list of float):
+                The right hand side vector
+        """
+        self.add_rows(A_eq, b_eq, b_eq)
+
+    def set_ineq_constraint(self, idx, a_ineq, b_ineq):
+        """Replace a specific inequality constraint
+
+        Replace the constraint with the index idx with the constraint a_ineq*x ~ b_ineq
+
+        Args:
+            idx (int):
+                Index of the constraint
+
+            a_ineq (list of float):
+                The coefficient vector
+
+            b_ineq (float):
+                The right hand side value
+        """
+        a_ineq = array(a_ineq, dtype=float)
+        _, prev_cols, _ = self.highs.getRowEntries(idx)
+        for j in union1d(prev_cols, nonzero(a_ineq)[0]):
+            self.highs.changeCoeff(idx, int(j), float(a_ineq[j]))
+        self.highs.changeRowBounds(idx, -inf, float(b_ineq))
+
+    def get_basis(self) -> Tuple[List, List]:
+        """Retrieve the simplex basis from HiGHS (None if no valid basis is available)"""
+        basis = self.highs.getBasis()
+        if not basis.valid:
+            return None
+        stat_map = {
+            HighsBasisStatus.kBasic: BASIC,
+            HighsBasisStatus.kLower: AT_LOWER,
+            HighsBasisStatus.kUpper: AT_UPPER,
+            HighsBasisStatus.kZero: FREE,
+            HighsBasisStatus.kNonbasic: AT_LOWER
+        }
+        return [stat_map[s] for s in basis.col_status], [stat_map[s] for s in basis.row_status]
+
+    def set_basis(self, var_stat, constr_stat):
+        """Set a starting basis for the next simplex solve
+
+        Constraints that are not covered by constr_stat (such as big-M rows of indicator constraints)
+        become basic. If HiGHS rejects the basis, the next solve starts from scratch."""
+        stat_map = {
+            BASIC: HighsBasisStatus.kBasic,
+            AT_LOWER: HighsBasisStatus.kLower,
+            AT_UPPER: HighsBasisStatus.kUpper,
+            FREE: HighsBasisStatus.kZero
+        }
+        numrows = self.highs.getNumRow()
+        basis = highspy.HighsBasis()
+        basis.col_status = [stat_map[v] for v in var_stat]
+        basis.row_status = [stat_map[constr_stat[i]] if i < len(constr_stat) else HighsBasisStatus.kBasic for i in range(numrows)]
+        if self.highs.setBasis(basis) != highspy.HighsStatus.kOk:
+            logging.debug('HiGHS did not accept the starting basis.')
+
+    def set_mip_start(self, x):
+        """Pass the values of the integer variables as a starting solution to HiGHS"""
+        self.highs.setSolution(len(self.intvars), self.intvars, array([x[i] for i in self.intvars], dtype=float))
+
+    def add_rows(self, A, lower, upper):
+        """Add the rows of a sparse matrix with the given row bounds to the problem"""
+        A = sparse.csr_matrix(A, dtype=float)
+        A.sum_duplicates()
+        self.highs.addRows(A.shape[0], array(lower, dtype=float), array(upper, dtype=float), A.nnz, A.indptr[:-1].astype('int32'),
+                           A.indices.astype('int32'), A.data)
+
+    def solve_MILP_LP(self) -> HighsModelStatus:
+        """Trigger HiGHS solution through backend"""
+        self.highs.run()
+        status = self.highs.getModelStatus()
+        # Presolve does not distinguish between infeasible and unbounded problems. Solve again without
+        # presolve to determine which is the case.
+        if status == HighsModelStatus.kUnboundedOrInfeasible:
+            self.highs.setOptionValue('presolve', 'off')
+            self.highs.run()
+            status = self.highs.getModelStatus()
+            self.highs.setOptionValue('presolve', 'choose')
+        return status
+
+    def addExclusionConstraintsIneq(self, x):
+        """Function to add exclusion constraint (HiGHS compatibility function)"""
+        numvars = self.highs.getNumCol()
+        binvars = self.intvars
+        data = [1.0 if x[i] else -1.0 for i in binvars]
+        row = [0] * len(binvars)
+        A_ineq = sparse.csr_matrix((data, (row, binvars)), (1, numvars))
+        b_ineq = sum([x[i] for i in binvars]) - 1
+        self.add_ineq_constraints(A_ineq, [b_ineq])
@@ -18,6 +18,9 @@
 #
 """Class for indicator contraints (IndicatorConstraints)"""
 
+from scipy import sparse
+from typing import Tuple, List
+
 
 class IndicatorConstraints:
     """A class for storing indicator contraints
@@ -77,3 +80,27 @@ class IndicatorConstraints:
         self.b = b  # right hand side for indicator constraint
         self.sense = sense  # sense of the indicator constraint can be 'L', 'E', 'G' (lower-equal, equal, greater-equal)
         self.indicval = indicval  # value the binary variable takes when constraint is fulfilled
+
+    def to_bigM(self, M) -> Tuple[sparse.lil_matrix, List]:
+        """Translate the indicator constraints into bigM-constraints A * x <= b
+        
+        Equality constraints are split into two inequalities. This translation is used for solvers
+        without native support of indicator constraints (GLPK, HiGHS).
+        
+        Args:
+            M (float):
+                A large value that bounds the left hand sides of all constraints.
+        
+        Returns:
+            (Tuple[sparse.lil_matrix, List]):
+            
+            A_bigM, b_bigM
+        """
+        eqs = [i for i, sense in enumerate(self.sense) if sense == 'E']
+        A = sparse.vstack((self.A, -self.A[eqs])).tolil()
+        b = [float(b) for b in self.b] + [-float(self.b[i]) for i in eqs]
+        binv = list(self.binv) + [self.binv[i] for i in eqs]
+        indicval = list(self.indicval) + [self.indicval[i] for i in eqs]
+        A[list(range(len(binv))), binv] = [M if v else -M for v in indicval]
+        b = [b_i + M if v else b_i for b_i, v in zip(b, indicval)]
+        return A, b
@@ -19,24 +19,23 @@
 """A collection of functions for the LP-based analysis of metabolic networks"""
 
 from cobra.core import Solution
-from cobra.util import create_stoichiometric_matrix
 from cobra import Configuration
 from scipy import sparse
-from scipy.spatial import Delaunay  #, ConvexHull
+from scipy.spatial import Delaunay, ConvexHull
 from straindesign import MILP_LP, parse_constraints, parse_linexpr, lineqlist2mat, linexpr2dict, \
-                         linexprdict2mat, SDPool, IndicatorConstraints, avail_solvers
+                         linexprdict2mat, parallel_pool, get_processes, run_on_solver_thread, suppress_output, SessionPhase, \
+                         IndicatorConstraints, avail_solvers, cached, get_stoichiometry
 from re import search
 from straindesign.names import *
 from typing import Dict, Tuple
 from pandas import DataFrame
 from numpy import floor, sign, mod, nan, isnan, unique, inf, isinf, full, linspace, \
-                  prod, array, mean, flip, ceil, floor
-from numpy.linalg import matrix_rank
-from contextlib import redirect_stdout, redirect_stderr
-from io import StringIO
-import matplotlib.pyplot as plt
-from matplotlib.cm import get_cmap
-from matplotlib import use as set_matplotlib_backend
+                  prod, array, ceil, floor, ndarray, nonzero, maximum, minimum, vstack, cross, \
+                  concatenate, zeros, ones, argsort, cumsum, where, column_stack
+from numpy.linalg import matrix_rank, svd, norm
+from itertools import islice
+from queue import Queue
+from threading import local
 import logging
 
 from straindesign.parse_constr import linexpr2mat, linexprdict2str
@@ -49,7 +48,7 @@ def select_solver(solver=None, model=None) -> str:
     argument is provided, this function will try to determine the currently selected solver from the
     COBRA configuration. If unavailable, the solver will be inferred from the packages available at
     package initialization and one of the solvers will be picked and retured in the prioritized 
-    order: 'glpk', 'cplex', 'gurobi', 'scip'
+    order: 'glpk', 'cplex', 'gurobi', 'scip', 'highs'
     One may provide a solver or a model manually. This function then checks if the selected solver 
     is available, or else, if the solver indicated in the model is available. If yes, this function 
     returns the name of the solver as a str. If both arguments are specified, the function prefers
@@ -62,7 +61,7 @@ def select_solver(solver=None, model=None) -> str:
         solver (optional (str)):
         
             A user preferred solver, that should be checked for availability: 'glpk', 'cplex',
-            'gurobi' or 'scip'.
+            'gurobi', 'scip' or 'highs'.
             
         model (optional (cobra.Model)):
         
@@ -72,7 +71,7 @@ def select_solver(solver=None, model=None) -> str:
     Returns:
         (str):
         
-            The selected solver name as a str (one of the following: 'glpk', 'cplex', 'gurobi', 'scip').
+            The selected solver name as a str (one of the following: 'glpk', 'cplex', 'gurobi', 'scip', 'highs').
             
     """
     # first try to use selected solver
@@ -104,6 +103,29 @@ def select_solver(solver=None, model=None) -> str:
     return avail_solvers[0]
 
 
+fva_glob = local()  # LP (lp) and scenario data (batch) of an FVA worker, separate for each worker thread
+yopt_glob = local()  # LFPs (lps) of a yield optimization worker, separate for each worker thread
+flux_space_glob = local()  # problem, axes and axis types of a flux space worker, separate for each worker thread
+
+
+def solve_on_threads(solver) -> bool:
+    """Decide if the LPs of a parallel computation are solved on worker threads instead of worker processes
+    
+    CPLEX and Gurobi release the global interpreter lock while solving. Their LPs can therefore be
+    solved in parallel on threads of the main process, where each thread owns a copy of the problem.
+    This avoids spawning processes and pickling the problem data. Other solvers use worker processes.
+    
+    Args:
+        solver (str):
+            The selected solver.
+            
+    Returns:
+        (bool):
+            True, if worker threads should be used.
+    """
+    return solver in [CPLEX, GUROBI]
+
+
 def idx2c(i, prev) -> 'list':
     """Helper function for parallel FVA
     
@@ -128,25 +150,38 @@ def idx2c(i, prev) -> 'list':
     return C
 
 
-def fva_worker_init(A_ineq, b_ineq, A_eq, b_eq, lb, ub, solver):
+def fva_worker_init(A_ineq, b_ineq, A_eq, b_eq, lb, ub, solver, basis=None):
     """Helper function for parallel FVA
     
     Initialize the LP that will be solved iteratively. Is executed on workers, not on main thread.
+    GLPK problems cannot be used from other threads than the one that created them. They are
+    therefore built and solved on the solver thread of the worker process (see run_on_solver_thread).
+    The LP is stored in fva_glob, which is separate for each worker thread.
     
     Args:
         A_ineq, b_ineq, A_eq, b_eq, lb, ub:
             The LP.
         solver (str):
             Solver to be used.
+        basis (optional (tuple)): (Default: None)
+            A simplex basis of the same LP (see MILP_LP.get_basis()) that is used as a warm start.
     """
-    global lp_glob
-    # redirect output to empty stream. Perhaps avoids some multithreading issues
-    with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
-        lp_glob = MILP_LP(A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, solver=solver)
-        if lp_glob.solver == 'cplex':
-            lp_glob.backend.parameters.threads.set(1)
-            #lp_glob.backend.parameters.lpmethod.set(1)
-        lp_glob.prev = 0
+
+    def build():
+        # redirect output to empty stream. Perhaps avoids some multithreading issues
+        with suppress_output():
+            lp = MILP_LP(A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, solver=solver)
+            if lp.solver == 'cplex':
+                lp.backend.parameters.threads.set(1)
+                #lp.backend.parameters.lpmethod.set(1)
+            lp.set_basis(basis)
+            lp.prev = 0
+            return lp
+
+    if solver == GLPK:
+        fva_glob.lp = run_on_solver_thread(build)
+    else:
+        fva_glob.lp = build()
 
 
 def fva_worker_compute(i) -> Tuple[int, float]:
@@ -158,67 +193,195 @@ def fva_worker_compute(i) -> Tuple[int, float]:
         i (int):
             Index of the computation step.
     """
-    global lp_glob
-    with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
-        C = idx2c(i, lp_glob.prev)
-        if lp_glob.solver in ['cplex', 'gurobi']:
-            lp_glob.backend.set_objective_idx(C)
-            min_cx = lp_glob.backend.slim_solve()
-        else:
-            lp_glob.set_objective_idx(C)
-            min_cx = lp_glob.slim_solve()
-        lp_glob.prev = C[0][0]
-        return i, min_cx
 
+    lp = fva_glob.lp
 
-# GLPK needs a workaround, because problems cannot be solved in a different thread
-# which apparently happens with the multiprocess
+    def compute():
+        with suppress_output():
+            C = idx2c(i, lp.prev)
+            if lp.solver in ['cplex', 'gurobi']:
+                lp.backend.set_objective_idx(C)
+                min_cx = lp.backend.slim_solve()
+            else:
+                lp.set_objective_idx(C)
+                min_cx = lp.slim_solve()
+            lp.prev = C[0][0]
+            return i, min_cx
 
+    if lp.solver == GLPK:
+        return run_on_solver_thread(compute)
+    return compute()
 
-def fva_worker_init_glpk(A_ineq, b_ineq, A_eq, b_eq, lb, ub):
-    """Helper function for parallel FVA
+
+def fva_worker_compute_x(i) -> Tuple[int, float, ndarray]:
+    """Helper function for parallel FVA with solution pruning
+    
+    Run a single LP as a step of FVA and return the optimal flux vector alongside the optimal value.
+    Is executed on workers, not on main thread.
+    
+    Args:
+        i (int):
+            Index of the computation step.
+    """
+
+    lp = fva_glob.lp
+
+    def compute():
+        with suppress_output():
+            C = idx2c(i, lp.prev)
+            if lp.solver in ['cplex', 'gurobi']:
+                lp.backend.set_objective_idx(C)
+                x, min_cx, _ = lp.backend.solve()
+            else:
+                lp.set_objective_idx(C)
+                x, min_cx, _ = lp.solve()
+            lp.prev = C[0][0]
+            return i, min_cx, array(x, dtype=float)
+
+    if lp.solver == GLPK:
+        return run_on_solver_thread(compute)
+    return compute()
+
+
+def fva_prune_steps(x, lb, ub) -> list:
+    """Helper function for FVA with solution pruning
     
-    Initialize the LP for GLPK that will be solved iteratively. Is executed on workers, not on main thread.
+    Determine the FVA steps (LPs) that become obsolete because a given flux vector
+    already attains the lower or upper bound of a reaction. Step 2*j corresponds to the
+    maximization and step 2*j+1 to the minimization of the flux through reaction j.
+    
+    Args:
+        x (numpy.ndarray):
+            A feasible flux vector.
+        lb, ub (numpy.ndarray):
+            The lower and upper bounds of all reactions.
+    Returns:
+        (list):
+            Indices of the FVA steps whose optimal value equals a bound attained by x.
+    """
+    if any(isnan(x)):
+        return []
+    at_ub = nonzero(abs(x - ub) <= 1e-9 * maximum(1.0, abs(ub)))[0]
+    at_lb = nonzero(abs(x - lb) <= 1e-9 * maximum(1.0, abs(lb)))[0]
+    return [2 * int(j) for j in at_ub] + [2 * int(j) + 1 for j in at_lb]
+
+
+def fva_batch_worker_init(A_ineq, b_ineq, A_eq, b_eq, lb, ub, solver, scenarios, bases=None):
+    """Helper function for parallel multi-scenario FVA
+    
+    Store the base LP and the additional constraints of all scenarios. The LP of a
+    scenario is only built when the first step of this scenario is computed on the worker.
+    Is executed on workers, not on main thread.
     
     Args:
         A_ineq, b_ineq, A_eq, b_eq, lb, ub:
-            The LP.
+            The base LP.
+        solver (str):
+            Solver to be used.
+        scenarios (list of tuples):
+            The constraints (A_ineq, b_ineq, A_eq, b_eq) that are added to the base LP in each scenario.
+        bases (optional (list)): (Default: None)
+            A simplex basis for the LP of each scenario (or None) that is used as a warm start.
     """
-    global lp_glob
-    lp_glob = {}
-    lp_glob['A_ineq'] = A_ineq
-    lp_glob['b_ineq'] = b_ineq
-    lp_glob['A_eq'] = A_eq
-    lp_glob['b_eq'] = b_eq
-    lp_glob['lb'] = lb
-    lp_glob['ub'] = ub
+    fva_glob.batch = {'A_ineq': A_ineq, 'b_ineq': b_ineq, 'A_eq': A_eq, 'b_eq': b_eq, 'lb': lb, 'ub': ub, 'solver': solver}
+    fva_glob.batch['scenarios'] = scenarios
+    fva_glob.batch['bases'] = bases if bases is not None else [None] * len(scenarios)
+    fva_glob.lp = None
 
 
-def fva_worker_compute_glpk(i) -> Tuple[int, float]:
-    """Helper function for parallel FVA
+def fva_batch_set_scenario(s):
+    """Helper function for parallel multi-scenario FVA
     
-    Run a single LP for GLPK as a step of FVA. Is executed on workers, not on main thread.
+    Make sure that the LP on the worker contains the constraints of scenario s.
+    Is executed on workers, not on main thread.
     
     Args:
-        i (int):
-            Index of the computation step.
+        s (int):
+            Index of the scenario.
     """
-    global lp_glob
-    with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
-        lp_i = MILP_LP(A_ineq=lp_glob['A_ineq'],
-                       b_ineq=lp_glob['b_ineq'],
-                       A_eq=lp_glob['A_eq'],
-                       b_eq=lp_glob['b_eq'],
-                       lb=lp_glob['lb'],
-                       ub=lp_glob['ub'],
-                       solver=GLPK)
-        col = int(floor(i / 2))
-        sig = sign(mod(i, 2) - 0.5)
-        lp_i.set_objective_idx([[col, sig]])
-        min_cx = lp_i.slim_solve()
-    return i, min_cx
+    if fva_glob.lp is None or fva_glob.lp.scenario != s:
+        batch = fva_glob.batch
+        A_ineq_s, b_ineq_s, A_eq_s, b_eq_s = batch['scenarios'][s]
+        fva_worker_init(sparse.vstack((batch['A_ineq'], A_ineq_s)),
+                        list(batch['b_ineq']) + list(b_ineq_s), sparse.vstack((batch['A_eq'], A_eq_s)),
+                        list(batch['b_eq']) + list(b_eq_s), batch['lb'], batch['ub'], batch['solver'], batch['bases'][s])
+        fva_glob.lp.scenario = s
 
 
+def fva_batch_worker_compute(task) -> Tuple[int, int, float]:
+    """Helper function for parallel multi-scenario FVA
+    
+    Run a single LP as a step of FVA in a given scenario. Is executed on workers, not on main thread.
+    
+    Args:
+        task (tuple):
+            Index of the scenario and index of the computation step.
+    """
+    s, i = task
+    fva_batch_set_scenario(s)
+    _, min_cx = fva_worker_compute(i)
+    return s, i, min_cx
+
+
+def fva_batch_worker_compute_x(task) -> Tuple[int, int, float, ndarray]:
+    """Helper function for parallel multi-scenario FVA with solution pruning
+    
+    Run a single LP as a step of FVA in a given scenario and return the optimal flux vector alongside
+    the optimal value. Is executed on workers, not on main thread.
+    
+    Args:
+        task (tuple):
+            Index of the scenario and index of the computation step.
+    """
+    s, i = task
+    fva_batch_set_scenario(s)
+    _, min_cx, x = fva_worker_compute_x(i)
+    return s, i, min_cx, x
+
+
+def fva_solve_pruned(pool, steps, skip, record, window=1) -> None:
+    """Helper function for FVA with solution pruning
+    
+    Solve the LPs of the given FVA steps in the given order and pass each result to a callback function,
+    which may use the returned flux vector to mark further steps as obsolete. Obsolete steps are skipped.
+    On a process pool, only a limited number of LPs is kept in flight, so that returned flux vectors
+    can prune the steps that have not been submitted yet. The workers (or the main process, if no pool
+    is used) must be initialized with fva_batch_worker_init.
+    
+    Args:
+        pool (SDPool or SessionPhase or None):
+            A process pool or None, if the LPs should be solved on the main process.
+        steps (list of tuples):
+            Index of the scenario and index of the computation step for each LP.
+        skip (function):
+            Function skip(s, i) that returns True, if a step has become obsolete.
+        record (function):
+            Function record(s, i, min_cx, x) that receives the optimal value and flux vector of each step.
+        window (optional (int)): (Default: 1)
+            Maximum number of LPs in flight.
+    """
+    if pool is None:
+        for s, i in steps:
+            if not skip(s, i):
+                record(*fva_batch_worker_compute_x((s, i)))
+        return
+    queue = iter(steps)
+    pending = []
+
+    def submit():
+        for s, i in queue:
+            if not skip(s, i):
+                pending.append(pool.apply_async(fva_batch_worker_compute_x, ((s, i),)))
+                return
+
+    for _ in range(window):
+        submit()
+    while pending:
+        record(*pending.pop(0).get())
+        submit()
+
+
+@cached
 def fva(model, **kwargs) -> DataFrame:
     """Flux Variability Analysis (FVA)
     
@@ -245,90 +408,551 @@ def fva(model, **kwargs) -> DataFrame:
             constraints=['-EX_o2_e <= 5', 'ATPM = 20'] or
             constraints=[[{'EX_o2_e':-1},'<=',5], [{'ATPM':1},'=',20]]
             
+        prune (optional (bool)): (Default: False)
+            If True, the full flux vector of every solved LP is inspected and all LPs whose
+            optimum is already attained by a seen flux vector (a reaction rate at its lower
+            or upper bound) are skipped. Reactions with finite bounds are treated first.
+            This can reduce the number of LPs drastically for genome-scale models.
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for the FVA. Overrides the number of processes of an active
+            parallel session (see parallel_session()). With CPLEX and Gurobi, the LPs are solved on
+            as many threads of the calling process instead (see solve_on_threads()).
+            
     Returns:
         (pandas.DataFrame):
             A data frame containing the minimum and maximum attainable flux rates for all reactions.
     """
-    reaction_ids = model.reactions.list_attr("id")
+    if CONSTRAINTS in kwargs and kwargs[CONSTRAINTS]:
+        constraints = kwargs.pop(CONSTRAINTS)
+    else:
+        constraints = []
+    return fva_batch(model, [constraints], **kwargs)[0]
+
+
+def fva_batch(model, constraints_list, **kwargs) -> list:
+    """Flux Variability Analysis (FVA) for multiple scenarios
+    
+    Runs an FVA for each set of constraints in constraints_list. The stoichiometric LP is built only
+    once and all scenarios share the same worker pool. Each worker only adds the constraints of the
+    scenario it currently computes. This is considerably faster than calling fva() repeatedly when
+    many scenarios (e.g., media or growth conditions) are evaluated.
+    
+    Example:
+        flux_ranges = fva_batch(model, ['EX_o2_e=0', 'EX_o2_e>=-5', ''], solver='cplex')
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        constraints_list (list):
+            A list of scenarios. Each entry specifies the *linear* constraints of one scenario in any
+            of the formats accepted by the constraints argument of fva(), e.g.,
+            ['EX_o2_e = 0', ['-EX_o2_e <= 5', 'ATPM = 20'], ''].
+            
+        solver (optional (str)):
+            The solver that should be used for FVA.
+            
+        prune (optional (bool)): (Default: False)
+            Skip LPs whose optimum is already attained by a seen flux vector (see fva()).
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for the FVA (see fva()).
+            
+    Returns:
+        (list of pandas.DataFrame):
+            One data frame per scenario containing the minimum and maximum attainable flux rates for all 
+            reactions. If a scenario is infeasible, its data frame contains only NaN.
+    """
+    A_eq, lb, ub, reaction_ids = get_stoichiometry(model)
     numr = len(model.reactions)
 
-    if CONSTRAINTS in kwargs and kwargs[CONSTRAINTS]:
-        kwargs[CONSTRAINTS] = parse_constraints(kwargs[CONSTRAINTS], reaction_ids)
-        A_ineq, b_ineq, A_eq, b_eq = lineqlist2mat(kwargs[CONSTRAINTS], reaction_ids)
+    if SOLVER not in kwargs:
+        kwargs[SOLVER] = None
+    solver = select_solver(kwargs[SOLVER], model)
+    prune = 'prune' in kwargs and kwargs['prune']
+
+    # prepare vectors and matrices of the base LP
+    b_eq = [0] * len(model.metabolites)
+    A_ineq = sparse.csr_matrix((0, numr))
+    b_ineq = []
+    lb_arr = array(lb, dtype=float)
+    ub_arr = array(ub, dtype=float)
+
+    # translate the constraints of each scenario into matrices
+    scenarios = []
+    for constraints in constraints_list:
+        if constraints:
+            constraints = parse_constraints(constraints, reaction_ids)
+            A_ineq_s, b_ineq_s, A_eq_s, b_eq_s = lineqlist2mat(constraints, reaction_ids)
+        else:
+            A_ineq_s, b_ineq_s, A_eq_s, b_eq_s = sparse.csr_matrix((0, numr)), [], sparse.csr_matrix((0, numr)), []
+        scenarios.append((A_ineq_s, b_ineq_s, A_eq_s, b_eq_s))
+
+    # check feasibility of each scenario and, if pruning is enabled, collect flux vectors that
+    # push all fluxes towards their bounds
+    x = [[nan] * 2 * numr for _ in scenarios]
+    feasible = [False] * len(scenarios)
+    bases = [None] * len(scenarios)  # the optimal basis of each scenario is used to warm-start the FVA LPs
+    solved = [full(2 * numr, False) for _ in scenarios]
+
+    def prune_with(s, v):
+        for k in fva_prune_steps(v, lb_arr, ub_arr):
+            if not solved[s][k]:
+                x[s][k] = -ub_arr[k // 2] if mod(k, 2) == 0 else lb_arr[k // 2]
+                solved[s][k] = True
+
+    def record(s, i, min_cx, x_i):
+        x[s][i] = min_cx
+        solved[s][i] = True
+        prune_with(s, x_i)
+
+    for s, (A_ineq_s, b_ineq_s, A_eq_s, b_eq_s) in enumerate(scenarios):
+        lp = MILP_LP(A_ineq=sparse.vstack((A_ineq, A_ineq_s)),
+                     b_ineq=b_ineq + b_ineq_s,
+                     A_eq=sparse.vstack((A_eq, A_eq_s)),
+                     b_eq=b_eq + b_eq_s,
+                     lb=lb,
+                     ub=ub,
+                     solver=solver)
+        x0, _, status = lp.solve()
+        if status not in [OPTIMAL, UNBOUNDED]:  # if problem not feasible or unbounded
+            logging.error('FVA problem not feasible.')
+            continue
+        feasible[s] = True
+        bases[s] = lp.get_basis()
+        if prune:
+            prune_with(s, array(x0, dtype=float))
+            for c in ([-1.0 if not isinf(u) else 0.0 for u in ub_arr], [1.0 if not isinf(l) else 0.0 for l in lb_arr]):
+                if any(c):
+                    lp.set_objective(c)
+                    x_sum, _, status_sum = lp.solve()
+                    if status_sum == OPTIMAL:
+                        prune_with(s, array(x_sum, dtype=float))
+
+    # Solution-vector pruning: LPs that may hit a finite bound are solved first. Every flux vector
+    # that is returned is checked for reactions that attain their lower or upper bound and
+    # the corresponding LPs are skipped. Steps with infinite bounds cannot be pruned.
+    if prune:
+        bounded = [not isinf(ub_arr[i // 2] if mod(i, 2) == 0 else lb_arr[i // 2]) for i in range(2 * numr)]
+        steps_bounded = [(s, i) for s in range(len(scenarios)) if feasible[s] for i in range(2 * numr) if bounded[i]]
+        steps_other = [(s, i) for s in range(len(scenarios)) if feasible[s] for i in range(2 * numr) if not bounded[i]]
+    else:
+        steps_bounded = []
+        steps_other = [(s, i) for s in range(len(scenarios)) if feasible[s] for i in range(2 * numr)]
+
+    processes = get_processes(kwargs[PROCESSES] if PROCESSES in kwargs else None)
+    processes = min(processes, numr)
+
+    if processes > 1 and len(steps_bounded) + len(steps_other) > 600:
+        # matrices and bound vectors are passed to worker processes through shared memory-mapped files
+        # and shared with worker threads
+        initargs = (A_ineq, array(b_ineq, dtype=float), A_eq, array(b_eq, dtype=float), lb_arr, ub_arr, solver, scenarios, bases)
+        with parallel_pool(processes, initializer=fva_batch_worker_init, initargs=initargs,
+                           threads=solve_on_threads(solver)) as pool:
+            fva_solve_pruned(pool, steps_bounded, lambda s, i: solved[s][i], record, window=2 * processes)
+            chunk_size = max(1, len(steps_other) // processes)
+            for s, i, value in pool.imap_unordered(fva_batch_worker_compute, steps_other, chunksize=chunk_size):
+                x[s][i] = value
+    else:
+        fva_batch_worker_init(A_ineq, b_ineq, A_eq, b_eq, lb, ub, solver, scenarios, bases)
+        fva_solve_pruned(None, steps_bounded, lambda s, i: solved[s][i], record)
+        for s, i in steps_other:
+            _, _, x[s][i] = fva_batch_worker_compute((s, i))
+
+    fva_results = []
+    for x_s, feasible_s in zip(x, feasible):
+        if feasible_s:
+            x_s = [v if abs(v) >= 1e-11 else 0.0 for v in x_s]  # cut off for very small absolute values
+        fva_results += [
+            DataFrame(
+                {
+                    "minimum": [x_s[i] for i in range(1, 2 * numr, 2)],
+                    "maximum": [-x_s[i] for i in range(0, 2 * numr, 2)],
+                },
+                index=reaction_ids,
+            )
+        ]
+    return fva_results
+
+
+def iter_fva(model, reactions=None, **kwargs):
+    """Flux Variability Analysis (FVA) as a generator
+    
+    Yields the flux range of each reaction as soon as its minimum and maximum are computed, in the
+    order in which the LPs finish. The FVA can be restricted to a subset of reactions and the
+    consumer can stop the iteration at any time (e.g., with break). In this case, no further LPs
+    are submitted to the workers and a process pool that was started for the FVA is terminated.
+    
+    Example:
+        blocked = False
+        for reac_id, minimum, maximum in iter_fva(model, reactions=['PGK', 'PFL'], solver='glpk'):
+            if minimum == 0.0 and maximum == 0.0:
+                blocked = True
+                break
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        reactions (optional (list of str)): (Default: None)
+            Identifiers of the reactions whose flux ranges should be computed. By default, all
+            reactions are analyzed.
+            
+        solver (optional (str)):
+            The solver that should be used for FVA.
+            
+        constraints (optional (str) or (list of str) or (list of [dict,str,float])): (Default: '')
+            List of *linear* constraints to be applied on top of the model (see fva()).
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for the FVA (see fva()).
+            
+    Yields:
+        (tuple):
+            Reaction identifier, minimum and maximum flux rate. If the problem is infeasible, the
+            minimum and maximum of all reactions are NaN.
+    """
+    A_eq, lb, ub, reaction_ids = get_stoichiometry(model)
+    numr = len(model.reactions)
+    if reactions is None:
+        reactions = reaction_ids
+    idx = list(dict.fromkeys(reaction_ids.index(r) for r in reactions))
 
     if SOLVER not in kwargs:
         kwargs[SOLVER] = None
     solver = select_solver(kwargs[SOLVER], model)
 
-    # prepare vectors and matrices
-    A_eq_base = sparse.csr_matrix(create_stoichiometric_matrix(model))
-    b_eq_base = [0] * len(model.metabolites)
-    if 'A_eq' in locals():
-        A_eq = sparse.vstack((A_eq_base, A_eq))
-        b_eq = b_eq_base + b_eq
+    b_eq = [0] * len(model.metabolites)
+    A_ineq = sparse.csr_matrix((0, numr))
+    b_ineq = []
+    if CONSTRAINTS in kwargs and kwargs[CONSTRAINTS]:
+        constraints = parse_constraints(kwargs[CONSTRAINTS], reaction_ids)
+        A_ineq_s, b_ineq_s, A_eq_s, b_eq_s = lineqlist2mat(constraints, reaction_ids)
     else:
-        A_eq = A_eq_base
-        b_eq = b_eq_base
-    if 'A_ineq' not in locals():
-        A_ineq = sparse.csr_matrix((0, numr))
-        b_ineq = []
-    lb = [v.lower_bound for v in model.reactions]
-    ub = [v.upper_bound for v in model.reactions]
-
-    # build LP
-    lp = MILP_LP(A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, solver=solver)
+        A_ineq_s, b_ineq_s, A_eq_s, b_eq_s = sparse.csr_matrix((0, numr)), [], sparse.csr_matrix((0, numr)), []
+
+    lp = MILP_LP(A_ineq=sparse.vstack((A_ineq, A_ineq_s)),
+                 b_ineq=b_ineq + b_ineq_s,
+                 A_eq=sparse.vstack((A_eq, A_eq_s)),
+                 b_eq=b_eq + b_eq_s,
+                 lb=lb,
+                 ub=ub,
+                 solver=solver)
     _, _, status = lp.solve()
     if status not in [OPTIMAL, UNBOUNDED]:  # if problem not feasible or unbounded
         logging.error('FVA problem not feasible.')
-        return DataFrame(
-            {
-                "minimum": [nan for i in range(1, 2 * numr, 2)],
-                "maximum": [nan for i in range(0, 2 * numr, 2)],
-            },
-            index=reaction_ids,
-        )
-
-    processes = Configuration().processes
-    num_reactions = len(reaction_ids)
-    processes = min(processes, num_reactions)
-
-    x = [nan] * 2 * numr
-
-    # Dummy to check if optimization runs
-    # worker_init(A_ineq,b_ineq,A_eq,b_eq,lb,ub,solver)
-    # worker_compute(1)
-    if processes > 1 and numr > 300:  #and solver != 'GLPK': # activate alternative routine with GLPK, if issues arise
-        # with Pool(processes,initializer=worker_init,initargs=(A_ineq,b_ineq,A_eq,b_eq,lb,ub,solver)) as pool:
-        with SDPool(processes, initializer=fva_worker_init, initargs=(A_ineq, b_ineq, A_eq, b_eq, lb, ub, solver)) as pool:
-            chunk_size = len(reaction_ids) // processes
-            # x = pool.imap_unordered(worker_compute, range(2*numr), chunksize=chunk_size)
-            for i, value in pool.imap_unordered(fva_worker_compute, range(2 * numr), chunksize=chunk_size):
-                x[i] = value
-    # GLPK works better when reinitializing the LP in every iteration. Unfortunately, this is slow
-    # but for now by far the most stable solution.
-    elif processes > 1 and numr > 500 and solver == GLPK:
-        with SDPool(processes, initializer=fva_worker_init_glpk, initargs=(A_ineq, b_ineq, A_eq, b_eq, lb, ub)) as pool:
-            chunk_size = len(reaction_ids) // processes
-            # # x = pool.imap_unordered(worker_compute, range(2*numr), chunksize=chunk_size)
-            for i, value in pool.imap_unordered(fva_worker_compute_glpk, range(2 * numr), chunksize=chunk_size):
-                x[i] = value
+        for j in idx:
+            yield reaction_ids[j], nan, nan
+        return
+
+    # Step 2*j is the maximization and step 2*j+1 the minimization of reaction j (see fva()). A
+    # reaction is yielded as soon as both of its steps are finished.
+    steps = [(0, i) for j in idx for i in (2 * j, 2 * j + 1)]
+    limits = {}
+
+    def finish(i, min_cx):
+        limits[i] = min_cx if abs(min_cx) >= 1e-11 else 0.0  # cut off for very small absolute values
+        if i ^ 1 in limits:
+            j = i // 2
+            return reaction_ids[j], limits.pop(2 * j + 1), -limits.pop(2 * j)
+
+    processes = min(get_processes(kwargs[PROCESSES] if PROCESSES in kwargs else None), numr)
+    lp_data = (A_ineq, array(b_ineq, dtype=float), A_eq, array(b_eq, dtype=float), array(lb, dtype=float), array(ub, dtype=float),
+               solver, [(A_ineq_s, b_ineq_s, A_eq_s, b_eq_s)])
+    if processes > 1 and len(steps) > 600:
+        with parallel_pool(processes, initializer=fva_batch_worker_init, initargs=lp_data, threads=solve_on_threads(solver)) as pool:
+            # Only a limited number of LPs is submitted ahead, so that stopping the iteration
+            # does not leave the workers with a backlog of obsolete LPs.
+            remaining = iter(steps)
+            finished = Queue()
+            in_flight = 0
+            for task in islice(remaining, 2 * processes):
+                pool.apply_async(fva_batch_worker_compute, (task,), callback=finished.put, error_callback=finished.put)
+                in_flight += 1
+            try:
+                while in_flight:
+                    value = finished.get()
+                    in_flight -= 1
+                    if isinstance(value, BaseException):
+                        raise value
+                    for task in islice(remaining, 1):
+                        pool.apply_async(fva_batch_worker_compute, (task,), callback=finished.put, error_callback=finished.put)
+                        in_flight += 1
+                    result = finish(value[1], value[2])
+                    if result is not None:
+                        yield result
+            finally:
+                # the workers of a parallel session are kept alive, wait for the submitted LPs
+                if isinstance(pool, SessionPhase):
+                    for _ in range(in_flight):
+                        finished.get()
     else:
-        fva_worker_init(A_ineq, b_ineq, A_eq, b_eq, lb, ub, solver)
-        for i in range(2 * numr):
-            _, x[i] = fva_worker_compute(i)
+        fva_batch_worker_init(*lp_data)
+        for task in steps:
+            _, i, min_cx = fva_batch_worker_compute(task)
+            result = finish(i, min_cx)
+            if result is not None:
+                yield result
 
-    x = [v if abs(v) >= 1e-11 else 0.0 for v in x]  # cut off for very small absolute values
-    fva_result = DataFrame(
-        {
-            "minimum": [x[i] for i in range(1, 2 * numr, 2)],
-            "maximum": [-x[i] for i in range(0, 2 * numr, 2)],
-        },
-        index=reaction_ids,
-    )
 
-    return fva_result
+def find_essential_reactions(model, constraints=None, solver=None, processes=None) -> set:
+    """Identify essential reactions
+    
+    A reaction is essential if its flux range excludes zero, i.e., if both, its minimal and its maximal flux
+    are strictly positive or strictly negative (with a tolerance of 1e-10). The result is identical to checking
+    the sign of the flux ranges from a full FVA, but far fewer LPs are needed: A reaction that was seen
+    carrying zero flux or flux in both directions in any computed flux vector cannot be essential. For the
+    remaining reactions, a single LP (minimization or maximization towards zero) decides essentiality, and
+    every flux vector returned by these LPs is used to exclude further reactions.
+    
+    Example:
+        essential_reacs = find_essential_reactions(model, constraints='EX_o2_e=0', solver='cplex')
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        constraints (optional (str) or (list of str) or (list of [dict,str,float])): (Default: None)
+            List of *linear* constraints to be applied on top of the model (see fva()).
+            
+        solver (optional (str)):
+            The solver that should be used.
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for the LPs (see fva()).
+            
+    Returns:
+        (set):
+            The identifiers of all essential reactions. If the constraints are infeasible, the set is empty.
+    """
+    A_eq, lb, ub, reaction_ids = get_stoichiometry(model)
+    numr = len(model.reactions)
+    solver = select_solver(solver, model)
+
+    b_eq = [0] * len(model.metabolites)
+    A_ineq = sparse.csr_matrix((0, numr))
+    b_ineq = []
+    if constraints:
+        constraints = parse_constraints(constraints, reaction_ids)
+        A_ineq_s, b_ineq_s, A_eq_s, b_eq_s = lineqlist2mat(constraints, reaction_ids)
+    else:
+        A_ineq_s, b_ineq_s, A_eq_s, b_eq_s = sparse.csr_matrix((0, numr)), [], sparse.csr_matrix((0, numr)), []
+
+    lp = MILP_LP(A_ineq=sparse.vstack((A_ineq, A_ineq_s)),
+                 b_ineq=b_ineq + b_ineq_s,
+                 A_eq=sparse.vstack((A_eq, A_eq_s)),
+                 b_eq=b_eq + b_eq_s,
+                 lb=lb,
+                 ub=ub,
+                 solver=solver)
+    x0, _, status = lp.solve()
+    if status not in [OPTIMAL, UNBOUNDED]:  # if problem not feasible or unbounded
+        logging.error('Problem not feasible.')
+        return set()
+
+    # Reactions whose bounds exclude zero are essential. All other reactions are candidates. A candidate
+    # is excluded as soon as it is seen carrying zero flux or flux in both directions.
+    essential = set(j for j in range(numr) if lb[j] > 1e-10 or ub[j] < -1e-10)
+    seen_pos = full(numr, False)
+    seen_neg = full(numr, False)
+    excluded = full(numr, False)
+
+    def exclude_with(v):
+        if any(isnan(v)):
+            return
+        seen_pos[v > 1e-10] = True
+        seen_neg[v < -1e-10] = True
+        excluded[abs(v) <= 1e-10] = True
+        excluded[seen_pos & seen_neg] = True
+
+    def candidates():
+        return [j for j in range(numr) if j not in essential and not excluded[j]]
+
+    exclude_with(array(x0, dtype=float))
+    # Push the flux through all remaining candidates towards zero at once, as long as this excludes
+    # further candidates.
+    num_cand = numr + 1
+    while 0 < len(candidates()) < num_cand:
+        num_cand = len(candidates())
+        c = [0.0] * numr
+        for j in candidates():
+            c[j] = 1.0 if seen_pos[j] else -1.0
+        lp.set_objective(c)
+        x_push, _, status_push = lp.solve()
+        if status_push != OPTIMAL:
+            break
+        exclude_with(array(x_push, dtype=float))
+
+    # For each remaining candidate, minimize (positive flux) or maximize (negative flux) the flux.
+    # Step 2*j+1 is the minimization and step 2*j the maximization of reaction j (see fva()).
+    steps = [(0, 2 * j + 1 if seen_pos[j] else 2 * j) for j in candidates()]
+
+    def evaluate(s, i, min_cx, x_i):
+        # min_cx is the minimum flux of reaction i//2 (odd i) or the negative maximum flux (even i)
+        if not excluded[i // 2]:
+            if min_cx > 1e-10:
+                essential.add(i // 2)
+            else:
+                excluded[i // 2] = True
+        exclude_with(x_i)
+
+    processes = min(get_processes(processes), len(steps))
+    lp_data = (A_ineq, array(b_ineq, dtype=float), A_eq, array(b_eq, dtype=float), array(lb, dtype=float), array(ub, dtype=float),
+               solver, [(A_ineq_s, b_ineq_s, A_eq_s, b_eq_s)])
+    if processes > 1 and len(steps) > 300:
+        with parallel_pool(processes, initializer=fva_batch_worker_init, initargs=lp_data, threads=solve_on_threads(solver)) as pool:
+            fva_solve_pruned(pool, steps, lambda s, i: excluded[i // 2], evaluate, window=2 * processes)
+    else:
+        fva_batch_worker_init(*lp_data)
+        fva_solve_pruned(None, steps, lambda s, i: excluded[i // 2], evaluate)
+    return set(reaction_ids[j] for j in essential)
 
 
+def effective_bounds(model, solver=None, processes=None, tol=0.0) -> DataFrame:
+    """Determine the effective flux bounds of all reactions
+    
+    Computes the bounds that result from relaxing all bounds that can never be attained and from tightening the
+    bounds of reactions that turn out to be blocked or irreversible: A negative lower bound is replaced by -inf if
+    the minimal flux exceeds it by more than tol. It is replaced by 0 if the minimal flux is not below tol. The
+    upper bounds are treated accordingly. The result is identical to applying these rules to the flux ranges from
+    a full FVA, but far fewer LPs are needed. Following the idea of the consistency check FASTCC, a few LPs that
+    maximize the (capped) flux through a whole batch of reactions at once (and LPs that push a batch of fluxes
+    towards their bounds) are solved first. Every flux vector found decides the rules for many reactions at once.
+    FVA steps are only solved for the remaining, undecided reactions.
+    
+    Example:
+        bounds = effective_bounds(model, solver='cplex')
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        solver (optional (str)):
+            The solver that should be used.
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for the remaining FVA steps (see fva()).
+            
+        tol (optional (float)): (Default: 0.0)
+            Tolerance for comparing flux limits with bounds and with zero.
+            
+    Returns:
+        (pandas.DataFrame):
+            A data frame containing the effective lower and upper bounds of all reactions. If the model is
+            infeasible, the original bounds are returned.
+    """
+    A_eq, lb, ub, reaction_ids = get_stoichiometry(model)
+    numr = len(model.reactions)
+    solver = select_solver(solver, model)
+    eps = 1e-3  # flux that is requested through each reaction in the batch LPs
+
+    b_eq = [0] * len(model.metabolites)
+    A_ineq = sparse.csr_matrix((0, numr))
+    b_ineq = []
+    lb = array(lb, dtype=float)
+    ub = array(ub, dtype=float)
+    new_lb = lb.copy()
+    new_ub = ub.copy()
+
+    # LP with the additional variables z_pos <= x, z_neg <= -x that are capped at eps. Maximizing the sum of
+    # the z-variables of a batch of reactions returns a flux vector in which as many reactions as possible
+    # of that batch carry flux in positive (z_pos) or negative (z_neg) direction.
+    I = sparse.identity(numr, format='csr')
+    Z = sparse.csr_matrix((numr, numr))
+    lp = MILP_LP(A_ineq=sparse.vstack((sparse.hstack((-I, I, Z)), sparse.hstack((I, Z, I)))),
+                 b_ineq=[0.0] * 2 * numr,
+                 A_eq=sparse.hstack((A_eq, sparse.csr_matrix((A_eq.shape[0], 2 * numr)))),
+                 b_eq=b_eq,
+                 lb=list(lb) + [-inf] * 2 * numr,
+                 ub=list(ub) + [eps] * 2 * numr,
+                 solver=solver)
+    x0, _, status = lp.solve()
+    if status not in [OPTIMAL, UNBOUNDED]:  # if problem not feasible or unbounded
+        logging.error('Problem not feasible.')
+        return DataFrame({"lower_bound": lb, "upper_bound": ub}, index=reaction_ids)
+
+    # Only negative lower bounds and positive upper bounds may change. For each of these bounds, the smallest
+    # (largest) flux seen so far is an upper (lower) estimate of the minimal (maximal) flux. The rules are
+    # decided as soon as these estimates refute them. Otherwise, the minimal (maximal) flux is computed.
+    v_min = full(numr, inf)
+    v_max = full(numr, -inf)
+    open_lb = lb < 0.0
+    open_ub = ub > 0.0
+
+    def decide_with(v):
+        if any(isnan(v)):
+            return
+        v_min[:] = minimum(v_min, v)
+        v_max[:] = maximum(v_max, v)
+        # lower bound is kept if the minimal flux is below tol and if it is attained (or infinite)
+        open_lb[(v_min < tol - 1e-9) & (isinf(lb) | (v_min <= lb + tol))] = False
+        open_ub[(v_max > -tol + 1e-9) & (isinf(ub) | (v_max >= ub - tol))] = False
+
+    def apply_rules(v_cut, j, minimize):
+        # apply the rules with the exact minimal or maximal flux of reaction j
+        if minimize:
+            if v_cut - tol > lb[j]:
+                new_lb[j] = -inf
+            if v_cut >= tol:
+                new_lb[j] = max([0.0, new_lb[j]])
+        else:
+            if v_cut + tol < ub[j]:
+                new_ub[j] = inf
+            if v_cut <= -tol:
+                new_ub[j] = min([0.0, new_ub[j]])
+
+    decide_with(array(x0[:numr], dtype=float))
+    num_open = 2 * numr + 1
+    while 0 < sum(open_lb) + sum(open_ub) < num_open:
+        num_open = sum(open_lb) + sum(open_ub)
+        objectives = []
+        # maximize the number of reactions in the batch that carry negative or positive flux
+        if any(open_lb & (v_min >= tol - 1e-9)):
+            objectives += [[0.0] * 2 * numr + [-1.0 if k else 0.0 for k in open_lb & (v_min >= tol - 1e-9)]]
+        if any(open_ub & (v_max <= -tol + 1e-9)):
+            objectives += [[0.0] * numr + [-1.0 if k else 0.0 for k in open_ub & (v_max <= -tol + 1e-9)] + [0.0] * numr]
+        # push the fluxes of the batch towards their finite bounds
+        if any(open_lb & ~isinf(lb)):
+            objectives += [[1.0 if k else 0.0 for k in open_lb & ~isinf(lb)] + [0.0] * 2 * numr]
+        if any(open_ub & ~isinf(ub)):
+            objectives += [[-1.0 if k else 0.0 for k in open_ub & ~isinf(ub)] + [0.0] * 2 * numr]
+        for c in objectives:
+            lp.set_objective(c)
+            x_batch, _, status_batch = lp.solve()
+            if status_batch == OPTIMAL:
+                decide_with(array(x_batch[:numr], dtype=float))
+
+    # Solve the FVA steps of all bounds that are still undecided. Step 2*j+1 is the minimization and step
+    # 2*j the maximization of reaction j (see fva()).
+    steps = [(0, 2 * j + 1) for j in range(numr) if open_lb[j]] + [(0, 2 * j) for j in range(numr) if open_ub[j]]
+
+    def evaluate(s, i, min_cx, x_i):
+        j = i // 2
+        if mod(i, 2) == 1 and open_lb[j]:
+            open_lb[j] = False
+            apply_rules(min_cx if abs(min_cx) >= 1e-11 else 0.0, j, True)
+        elif mod(i, 2) == 0 and open_ub[j]:
+            open_ub[j] = False
+            apply_rules(-min_cx if abs(min_cx) >= 1e-11 else 0.0, j, False)
+        decide_with(x_i)
+
+    def skip(s, i):
+        return not (open_lb[i // 2] if mod(i, 2) == 1 else open_ub[i // 2])
+
+    processes = min(get_processes(processes), len(steps))
+    lp_data = (A_ineq, array(b_ineq, dtype=float), A_eq, array(b_eq, dtype=float), lb, ub, solver,
+               [(sparse.csr_matrix((0, numr)), [], sparse.csr_matrix((0, numr)), [])])
+    if processes > 1 and len(steps) > 300:
+        with parallel_pool(processes, initializer=fva_batch_worker_init, initargs=lp_data, threads=solve_on_threads(solver)) as pool:
+            fva_solve_pruned(pool, steps, skip, evaluate, window=2 * processes)
+    else:
+        fva_batch_worker_init(*lp_data)
+        fva_solve_pruned(None, steps, skip, evaluate)
+    return DataFrame({"lower_bound": new_lb, "upper_bound": new_ub}, index=reaction_ids)
+
+
+@cached
 def fba(model, **kwargs) -> Solution:
     """Flux Balance Analysis (FBA), parsimonius Flux Balance Analysis (pFBA),
     
@@ -412,8 +1036,7 @@ def fba(model, **kwargs) -> Solution:
     solver = select_solver(kwargs[SOLVER], model)
 
     # prepare vectors and matrices
-    A_eq_base = create_stoichiometric_matrix(model)
-    A_eq_base = sparse.csr_matrix(A_eq_base)
+    A_eq_base, lb, ub, _ = get_stoichiometry(model)
     b_eq_base = [0.0] * len(model.metabolites)
     if 'A_eq' in locals():
         A_eq = sparse.vstack((A_eq_base, A_eq))
@@ -424,8 +1047,6 @@ def fba(model, **kwargs) -> Solution:
     if 'A_ineq' not in locals():
         A_ineq = sparse.csr_matrix((0, len(model.reactions)))
         b_ineq = []
-    lb = [v.lower_bound for v in model.reactions]
-    ub = [v.upper_bound for v in model.reactions]
 
     # build LP
     fba_prob = MILP_LP(c=c, A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, solver=solver)
@@ -499,6 +1120,7 @@ def fba(model, **kwargs) -> Solution:
     return sol
 
 
+@cached
 def yopt(model, **kwargs) -> Solution:
     """Yield optmization (YOpt)
     
@@ -594,8 +1216,7 @@ def yopt(model, **kwargs) -> Solution:
     solver = select_solver(kwargs[SOLVER], model)
 
     # prepare vectors and matrices for base problem
-    A_eq_base = create_stoichiometric_matrix(model)
-    A_eq_base = sparse.csr_matrix(A_eq_base)
+    A_eq_base, lb, ub, _ = get_stoichiometry(model)
     b_eq_base = [0] * len(model.metabolites)
     if 'A_eq' in locals():
         A_eq = sparse.vstack((A_eq_base, A_eq), 'csr')
@@ -607,13 +1228,13 @@ def yopt(model, **kwargs) -> Solution:
         A_ineq = sparse.csr_matrix((0, len(model.reactions)))
         b_ineq = []
     # Integrate upper and lower bounds into A_ineq and b_ineq
-    real_lb = [i for i, v in enumerate(model.reactions.list_attr('lower_bound')) if not isinf(v)]
-    real_ub = [i for i, v in enumerate(model.reactions.list_attr('upper_bound')) if not isinf(v)]
+    real_lb = [i for i, v in enumerate(lb) if not isinf(v)]
+    real_ub = [i for i, v in enumerate(ub) if not isinf(v)]
     sparse_lb = sparse.coo_matrix(([-1] * len(real_lb), (range(len(real_lb)), real_lb)), (len(real_lb), A_ineq.shape[1]))
     sparse_ub = sparse.coo_matrix(([1] * len(real_ub), (range(len(real_ub)), real_ub)), (len(real_ub), A_ineq.shape[1]))
     A_ineq = sparse.vstack((A_ineq, sparse_lb, sparse_ub), 'csr')
-    b_ineq = b_ineq + [-model.reactions[i].lower_bound for i in real_lb] + \
-                      [ model.reactions[i].upper_bound for i in real_ub]
+    b_ineq = b_ineq + [-lb[i] for i in real_lb] + \
+                      [ ub[i] for i in real_ub]
     # Analyze maximum and minimum value of denominator function to decide whether to fix it to +1 or -1 or abort computation
     den_sign = []
     den_prob = MILP_LP(c=obj_den.todense().tolist()[0], A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, solver=solver)
@@ -722,18 +1343,574 @@ def yopt(model, **kwargs) -> Solution:
         status = INFEASIBLE
 
 
-def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
-    """Plot projections of the space of steady-state flux vectors onto two or three dimensions.
+def yopt_worker_init(A_ineq, b_ineq, A_eq, b_eq, obj_den, den_sign, solver):
+    """Helper function for parallel yield optimization
     
-    This function uses LP and matplotlib to generate lower dimensional representations of the 
-    flux space. Custom *linear* or *fractional-linear* expressions can be used for the plot
-    axis. The most commonly used flux space reprentations are the *production envelope* that
-    plots the growth rate (x) vs the product synthesis rate (y) and the *yield space plot*
-    that plots the biomass yield (x) vs the product yiel (y). One may specify additional
-    constraints to investigate subspaces of the metabolic steady-state flux space.
+    Build the linear fractional program (LFP) for each sign of the denominator. The LFPs are
+    reused for all numerators. Is executed on workers, not on main thread. The LFPs are stored
+    in yopt_glob, which is separate for each worker thread.
+    
+    Args:
+        A_ineq, b_ineq, A_eq, b_eq:
+            The base LP with the variable bounds integrated into the inequalities.
+        obj_den (sparse.csr_matrix):
+            The denominator of the fractional objective function.
+        den_sign (list of int):
+            The values (+1 or -1) to which the denominator is fixed.
+        solver (str):
+            Solver to be used.
+    """
+
+    def build():
+        # A variable is added here to scale the right hand side of the original problem
+        A_ineq_lfp = sparse.hstack((A_ineq, sparse.csr_matrix([-b for b in b_ineq]).transpose()), 'csr')
+        A_eq_lfp = sparse.vstack((sparse.hstack((A_eq, sparse.csr_matrix([-b for b in b_eq]).transpose())), sparse.hstack(
+            (obj_den, sparse.csr_matrix((1, 1))))), 'csr')
+        lps = []
+        with suppress_output():
+            for d in den_sign:
+                lp = MILP_LP(A_ineq=A_ineq_lfp,
+                             b_ineq=[0.0] * len(b_ineq),
+                             A_eq=A_eq_lfp,
+                             b_eq=[0.0] * len(b_eq) + [d],
+                             solver=solver)
+                if lp.solver == 'cplex':
+                    lp.backend.parameters.threads.set(1)
+                lp.den_sign = d
+                lps += [lp]
+        return lps
+
+    if solver == GLPK:
+        yopt_glob.lps = run_on_solver_thread(build)
+    else:
+        yopt_glob.lps = build()
+
+
+def yopt_worker_compute(task) -> Tuple[int, float, str, bool]:
+    """Helper function for parallel yield optimization
+    
+    Solve the LFPs for one numerator. Is executed on workers, not on main thread.
+    
+    Args:
+        task (tuple):
+            Index of the numerator and the numerator coefficient vector (negated for maximization).
+    """
+    i, num = task
+    lps = yopt_glob.lps
+
+    def compute():
+        opt_cx = inf
+        status = INFEASIBLE
+        scalable = False
+        with suppress_output():
+            for lp in lps:
+                lp.set_objective([-lp.den_sign * v for v in num] + [0.0])
+                x_i, opt_i, status_i = lp.solve()
+                if opt_i < opt_cx:
+                    opt_cx = opt_i
+                    status = status_i
+                    scalable = status_i == OPTIMAL and x_i[-1] == 0
+        return i, opt_cx, status, scalable
+
+    if lps[0].solver == GLPK:
+        return run_on_solver_thread(compute)
+    return compute()
+
+
+def yopt_batch(model, obj_nums, obj_den, **kwargs) -> DataFrame:
+    """Yield optimization (YOpt) for many numerators and a common denominator
+    
+    Computes the optimal yields of a list of numerators (e.g., product exchange fluxes) with respect
+    to the same denominator (e.g., the substrate uptake). The analysis of the denominator and the
+    linear fractional program (LFP) are set up only once. Only the objective function of the LFP is
+    exchanged for each numerator. The numerators are distributed over a process pool if the number of
+    LPs is large. Numerators whose LFP is unbounded (infinite yield or denominator that can become
+    zero) are passed on to yopt().
     
     Example:
-        plot_flux_space(model,('BIOMASS_Ecoli_core_w_GAM','EX_etoh_e'))
+        yields = yopt_batch(model, ['EX_etoh_e', 'EX_ac_e', 'EX_lac__D_e'], '-EX_glc__D_e', constraints='EX_o2_e=0')
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        obj_nums (list of str or list of dict):
+            The numerators of the fractional objective functions, provided as linear expressions
+            (see yopt()).
+            
+        obj_den ((str) or (dict)):
+            The denominator that is shared by all fractional objective functions (see yopt()).
+            
+        obj_sense (optional (str)): (Default: 'maximize')
+            The optimization direction can be set either to 'maximize' (or 'max') or 'minimize' (or 'min').
+            
+        solver (optional (str)):
+            The solver that should be used for YOpt.
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            The number of processes that should be used for the computation.
+            
+        constraints (optional (str) or (list of str) or (list of [dict,str,float])): (Default: '')
+            List of *linear* constraints to be applied on top of the model (see yopt()).
+
+    Returns:
+        (pandas.DataFrame):
+            A data frame with the optimal yield, the optimization status and the scalability for each
+            numerator. The column 'scalable' is True if the optimal flux vector may be scaled with an
+            arbitrary factor (see yopt()). If the model is infeasible or the denominator is fixed to
+            zero, all yields are NaN.
+    """
+    A_eq, lb, ub, reaction_ids = get_stoichiometry(model)
+    numr = len(reaction_ids)
+    labels = [n if type(n) is str else linexprdict2str(n) for n in obj_nums]
+    nums = [(linexpr2mat(n, reaction_ids) if type(n) is str else linexprdict2mat(n, reaction_ids)).toarray()[0] for n in obj_nums]
+    if type(obj_den) is not dict:
+        den = linexpr2mat(obj_den, reaction_ids)
+    else:
+        den = linexprdict2mat(obj_den, reaction_ids)
+    maximize = 'obj_sense' not in kwargs or kwargs['obj_sense'] not in ['min', 'minimize']
+    if not maximize:
+        nums = [-n for n in nums]
+    solver = select_solver(kwargs[SOLVER] if SOLVER in kwargs else None, model)
+
+    # base problem with the variable bounds integrated into the inequality constraints
+    b_eq = [0.0] * len(model.metabolites)
+    if CONSTRAINTS in kwargs and kwargs[CONSTRAINTS]:
+        constraints = parse_constraints(kwargs[CONSTRAINTS], reaction_ids)
+        A_ineq, b_ineq, A_eq_s, b_eq_s = lineqlist2mat(constraints, reaction_ids)
+        A_eq = sparse.vstack((A_eq, A_eq_s), 'csr')
+        b_eq = b_eq + b_eq_s
+    else:
+        constraints = []
+        A_ineq, b_ineq = sparse.csr_matrix((0, numr)), []
+    real_lb = [i for i, v in enumerate(lb) if not isinf(v)]
+    real_ub = [i for i, v in enumerate(ub) if not isinf(v)]
+    sparse_lb = sparse.coo_matrix(([-1] * len(real_lb), (range(len(real_lb)), real_lb)), (len(real_lb), numr))
+    sparse_ub = sparse.coo_matrix(([1] * len(real_ub), (range(len(real_ub)), real_ub)), (len(real_ub), numr))
+    A_ineq = sparse.vstack((A_ineq, sparse_lb, sparse_ub), 'csr')
+    b_ineq = b_ineq + [-lb[i] for i in real_lb] + [ub[i] for i in real_ub]
+
+    # Analyze maximum and minimum value of denominator function once for all numerators
+    yields = [nan] * len(nums)
+    status = [INFEASIBLE] * len(nums)
+    scalable = [False] * len(nums)
+    den_prob = MILP_LP(c=den.toarray()[0].tolist(), A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, solver=solver)
+    _, min_denx, status_den = den_prob.solve()
+    den_sign = []
+    if status_den in [OPTIMAL, UNBOUNDED]:
+        if min_denx < 0:
+            den_sign += [-1]
+        den_prob.set_objective((-den).toarray()[0].tolist())
+        _, max_denx, _ = den_prob.solve()
+        if max_denx < 0:
+            den_sign += [1]
+        if not den_sign:
+            logging.error('Denominator term can only take the value 0. Yield computation impossible.')
+
+    if den_sign:
+        tasks = [(i, n.tolist()) for i, n in enumerate(nums)]
+        processes = get_processes(kwargs[PROCESSES] if PROCESSES in kwargs else None)
+        processes = min(processes, len(tasks))
+        if processes > 1 and len(tasks) * len(den_sign) > 600:
+            initargs = (A_ineq, array(b_ineq, dtype=float), A_eq, array(b_eq, dtype=float), den, den_sign, solver)
+            with parallel_pool(processes, initializer=yopt_worker_init, initargs=initargs, threads=solve_on_threads(solver)) as pool:
+                chunk_size = max(1, len(tasks) // processes)
+                results = list(pool.imap_unordered(yopt_worker_compute, tasks, chunksize=chunk_size))
+        else:
+            yopt_worker_init(A_ineq, b_ineq, A_eq, b_eq, den, den_sign, solver)
+            results = [yopt_worker_compute(t) for t in tasks]
+        for i, opt_cx, status_i, scalable_i in results:
+            if status_i == OPTIMAL:
+                yields[i] = -opt_cx if maximize else opt_cx
+                status[i] = OPTIMAL
+                scalable[i] = scalable_i
+            elif status_i == UNBOUNDED:
+                # infinite yield or denominator can become zero, treat these cases with the full yield optimization
+                sol = yopt(model,
+                           obj_num=obj_nums[i],
+                           obj_den=obj_den,
+                           obj_sense='maximize' if maximize else 'minimize',
+                           constraints=constraints,
+                           solver=solver)
+                yields[i] = sol.objective_value
+                status[i] = sol.status
+                scalable[i] = getattr(sol, 'scalable', False)
+    yields = [v if abs(v) >= 1e-11 or isnan(v) else 0.0 for v in yields]  # cut off for very small absolute values
+    return DataFrame({"yield": yields, "status": status, "scalable": scalable}, index=labels)
+
+
+def flux_space_fix(axes, ax_type, coords) -> list:
+    """Helper function for flux space plots
+    
+    Constraints that fix the first axes to the given coordinates.
+    
+    Args:
+        axes (list of lists), ax_type (list of str):
+            The parsed axes and their types ('rate' or 'yield').
+        coords (list of float):
+            The coordinates of the point on the first axes.
+    
+    Returns:
+        (list of [dict,str,float]):
+            One equality for each coordinate.
+    """
+    fix = []
+    for ax, t, v in zip(axes, ax_type, coords):
+        if t == 'rate':
+            fix += [[ax[0], '=', v]]
+        elif t == 'yield':
+            fix += [[{**ax[0], **{k: -c * v for k, c in ax[1].items()}}, '=', 0]]
+    return fix
+
+
+def flux_space_point(problem, axes, ax_type, coords) -> Tuple[float, float]:
+    """Helper function for flux space plots
+    
+    Fix the first axes to the given coordinates and compute the minimum and maximum of the next axis.
+    
+    Args:
+        problem (FluxProblem):
+            The prepared problem of the model (including the constraints of the plot). The constraints
+            that fix the first axes (see flux_space_fix()) must have been pushed last. Only their values
+            are replaced.
+        axes (list of lists), ax_type (list of str):
+            The parsed axes and their types ('rate' or 'yield').
+        coords (list of float):
+            The coordinates of the point on the first axes.
+    
+    Returns:
+        (Tuple):
+            The minimum (rounded up) and the maximum (rounded down) of the next axis.
+    """
+    problem.replace_constraints(flux_space_fix(axes, ax_type, coords))
+    ax = axes[len(coords)]
+    if ax_type[len(coords)] == 'rate':
+        sol_vmin = problem.fba(obj=ax[0], obj_sense='minimize')
+        sol_vmax = problem.fba(obj=ax[0], obj_sense='maximize')
+    elif ax_type[len(coords)] == 'yield':
+        sol_vmin = problem.yopt(ax[0], ax[1], obj_sense='minimize')
+        sol_vmax = problem.yopt(ax[0], ax[1], obj_sense='maximize')
+    return ceil_dec(sol_vmin.objective_value, 9), floor_dec(sol_vmax.objective_value, 9)
+
+
+def flux_space_adaptive(problem, axes, ax_type, x_limits, y_limits, points) -> Tuple[list, list, list]:
+    """Helper function for flux space plots
+    
+    Sample the lower and upper envelope of the second axis along the first axis adaptively. Each
+    interval between two samples is refined until three consecutive samples are collinear (which
+    proves linearity for the convex lower and the concave upper envelope of rate axes). New samples
+    are placed at the intersection of the linear pieces next to the interval, such that the
+    breakpoints of piecewise linear envelopes are hit exactly, or otherwise in the middle of the interval.
+    
+    Args:
+        problem (FluxProblem):
+            The prepared problem of the model (including the constraints of the plot and, pushed last, the
+            constraint that fixes the first axis).
+        axes (list of lists), ax_type (list of str):
+            The parsed axes and their types ('rate' or 'yield').
+        x_limits, y_limits (list of float):
+            The minimum and maximum values of the first and the second axis.
+        points (int):
+            The number of equidistant steps that the adaptive sampling replaces. Limits the refinement
+            of nonlinear envelopes.
+    
+    Returns:
+        (Tuple):
+            (x_space, lb, ub). The sampled values of the first axis and the lower and upper envelope.
+    """
+    piecewise_linear = ax_type[0] == 'rate' and ax_type[1] == 'rate'
+    width = x_limits[1] - x_limits[0]
+    if piecewise_linear:
+        tol = 1e-8 * max(1.0, y_limits[1] - y_limits[0])  # values are rounded to 9 decimals
+        min_width = 1e-6 * width
+    else:
+        tol = 1e-3 * (y_limits[1] - y_limits[0])
+        min_width = width / (4 * points)
+    if width <= 0:
+        f = flux_space_point(problem, axes, ax_type, [x_limits[0]])
+        return ([x_limits[0]],) + tuple([v] for v in f)
+    xs = [x_limits[0], (x_limits[0] + x_limits[1]) / 2, x_limits[1]]
+    fs = [flux_space_point(problem, axes, ax_type, [x]) for x in xs]
+    # linear[j][g] is True, if envelope g (0: lower, 1: upper) is linear between xs[j] and xs[j+1]
+    linear = [[False, False], [False, False]]
+
+    def on_line(x_a, f_a, x_b, f_b, x_c, f_c):
+        if isnan(f_a) or isnan(f_b) or isnan(f_c):
+            return True  # infeasible samples cannot be refined
+        return abs(f_a + (f_c - f_a) * (x_b - x_a) / (x_c - x_a) - f_b) <= tol
+
+    def mark(j):
+        # mark the intervals j-1 and j as linear if the samples j-1, j and j+1 are collinear
+        if 0 < j < len(xs) - 1:
+            for g in range(2):
+                if on_line(xs[j - 1], fs[j - 1][g], xs[j], fs[j][g], xs[j + 1], fs[j + 1][g]):
+                    linear[j - 1][g] = linear[j][g] = True
+
+    mark(1)
+    passes = 0
+    while True:
+        # split all intervals in which one of the envelopes is not yet known to be linear
+        todo = [j for j in range(len(xs) - 1) if not all(linear[j]) and xs[j + 1] - xs[j] > min_width]
+        if not todo:
+            break
+        passes += 1
+        for j in reversed(todo):
+            x_new = (xs[j] + xs[j + 1]) / 2
+            g = 0 if not linear[j][0] else 1
+            if 0 < j < len(xs) - 2 and not any(isnan([fs[k][g] for k in range(j - 1, j + 3)])):
+                # intersection of the lines through the neighboring samples left and right of the interval.
+                # If both lines are known to be pieces of the envelope, the intersection is a breakpoint.
+                # Otherwise, it is only an estimate and every second pass bisects the interval instead.
+                slope_l = (fs[j][g] - fs[j - 1][g]) / (xs[j] - xs[j - 1])
+                slope_r = (fs[j + 2][g] - fs[j + 1][g]) / (xs[j + 2] - xs[j + 1])
+                if abs(slope_l - slope_r) > 1e-12 and (linear[j - 1][g] and linear[j + 1][g] or passes % 2):
+                    x_kink = (fs[j + 1][g] - fs[j][g] + slope_l * xs[j] - slope_r * xs[j + 1]) / (slope_l - slope_r)
+                    if xs[j] + min_width / 2 < x_kink < xs[j + 1] - min_width / 2:
+                        x_new = x_kink
+            xs.insert(j + 1, x_new)
+            fs.insert(j + 1, flux_space_point(problem, axes, ax_type, [x_new]))
+            linear.insert(j + 1, list(linear[j]))
+        for j in range(1, len(xs) - 1):
+            mark(j)
+    if piecewise_linear:
+        # only keep the breakpoints of the envelopes
+        keep = [0] + [j for j in range(1, len(xs) - 1) if not all(
+            on_line(xs[j - 1], fs[j - 1][g], xs[j], fs[j][g], xs[j + 1], fs[j + 1][g]) for g in range(2))] + [len(xs) - 1]
+        xs = [xs[j] for j in keep]
+        fs = [fs[j] for j in keep]
+    return xs, [f[0] for f in fs], [f[1] for f in fs]
+
+
+def flux_space_worker_init(S, lb, ub, reaction_ids, solver, constraints, axes, ax_type):
+    """Helper function for parallel flux space plots
+    
+    Prepare the problem on which the grid points are computed. Is executed on workers, not on main thread.
+    The problem is stored in flux_space_glob, which is separate for each worker thread.
+    
+    Args:
+        S (sparse.csr_matrix), lb (array), ub (array), reaction_ids (list of str):
+            The stoichiometric matrix, the flux bounds and the reaction identifiers of the model.
+        solver (str), constraints (list):
+            The solver and the constraints of the plot.
+        axes (list of lists), ax_type (list of str):
+            The parsed axes and their types ('rate' or 'yield').
+    """
+
+    def build():
+        from straindesign.fluxProblem import FluxProblem
+        with suppress_output():
+            problem = FluxProblem.from_matrices(S, lb, ub, reaction_ids, solver=solver, constraints=constraints)
+            problem.push_constraints(flux_space_fix(axes, ax_type, [0.0] * (len(axes) - 1)))
+            return problem
+
+    if solver == GLPK:
+        flux_space_glob.problem = run_on_solver_thread(build)
+    else:
+        flux_space_glob.problem = build()
+    flux_space_glob.axes = axes
+    flux_space_glob.ax_type = ax_type
+
+
+def flux_space_worker_compute(task) -> Tuple[int, float, float]:
+    """Helper function for parallel flux space plots
+    
+    Compute the minimum and maximum of the last axis in one grid point. Is executed on workers, not on main thread.
+    
+    Args:
+        task (tuple):
+            Index and coordinates of the grid point.
+    """
+    k, coords = task
+    problem, axes, ax_type = flux_space_glob.problem, flux_space_glob.axes, flux_space_glob.ax_type
+
+    def compute():
+        with suppress_output():
+            return (k,) + flux_space_point(problem, axes, ax_type, coords)
+
+    if problem.solver == GLPK:
+        return run_on_solver_thread(compute)
+    return compute()
+
+
+def flux_space_progress(done, total):
+    """Log the progress of a flux space computation in steps of 10 %"""
+    if done and (done == total or done * 10 // total > (done - 1) * 10 // total):
+        logging.info('Flux space: ' + str(done) + ' of ' + str(total) + ' points computed.')
+
+
+def flux_space_axes(axes, reaction_ids) -> Tuple[list, list, list]:
+    """Helper function for flux space plots
+    
+    Parse the axes of a flux space plot into linear expressions.
+    
+    Args:
+        axes ((list of lists) or (list of str)):
+            The axes as given to plot_flux_space().
+        reaction_ids (list of str):
+            The reaction identifiers of the model.
+    
+    Returns:
+        (Tuple):
+            (axes, ax_type, ax_name). The axes as lists of one (rate) or two (yield) linear expressions
+            (dicts), their types ('rate' or 'yield') and their labels.
+    """
+    axes = [list(ax) if not isinstance(ax, str) else [ax] for ax in axes]  # cast to list of lists
+    if len(axes) not in [2, 3]:
+        raise Exception('Please define 2 or 3 axes as a list of tuples [ax1, ax2, (optional) ax3] with ax1 = (den,num).\n'+\
+                        '"den" and "num" being linear expressions.')
+    ax_type = ["" for _ in axes]
+    ax_name = ["" for _ in axes]
+    for i, ax in enumerate(axes):
+        if len(ax) == 1:
+            ax_type[i] = 'rate'
+            ax[0] = parse_linexpr(ax[0], reaction_ids)[0]
+            ax_name[i] = linexprdict2str(ax[0])
+        elif len(ax) == 2:
+            ax_type[i] = 'yield'
+            ax[0] = parse_linexpr(ax[0], reaction_ids)[0]
+            ax[1] = parse_linexpr(ax[1], reaction_ids)[0]
+            ax_name[i] = '(' + linexprdict2str(ax[0]) + ') / (' + linexprdict2str(ax[1]) + ')'
+    return axes, ax_type, ax_name
+
+
+def flux_space_projectable(axes, ax_type) -> bool:
+    """Check if the projection of the flux space onto the axes is a polytope
+    
+    This is the case if all axes are rates or if all axes are yields with the same denominator.
+    """
+    if all(t == 'rate' for t in ax_type):
+        return True
+    return all(t == 'yield' for t in ax_type) and all(ax[1] == axes[0][1] for ax in axes)
+
+
+def flux_space_projection(problem, axes, ax_type, tol=1e-8) -> Tuple[list, list]:
+    """Helper function for flux space plots
+    
+    Compute the exact vertices of the projection of the flux space onto the axes with the support
+    function method (Bretl and Lall, 2008). Starting from the points that minimize and maximize the
+    single axes, the inner approximation of the projection is refined by optimizing in the direction
+    of the outer normal of each facet of its convex hull. The optimum is either a new vertex or it
+    proves that the facet belongs to the projection. Thus, only one LP per vertex and facet is needed.
+    Yield axes with a common denominator are treated in the same way, since the linear fractional
+    projection of the flux space is a polytope as well.
+    
+    Args:
+        problem (FluxProblem):
+            The prepared problem of the model (including the constraints of the plot).
+        axes (list of lists), ax_type (list of str):
+            The parsed axes and their types ('rate' or 'yield').
+        tol (optional (float)): (Default: 1e-8)
+            Tolerance (relative to the range of the axes) by which a new vertex must lie outside of
+            the current approximation.
+    
+    Returns:
+        (Tuple):
+            (vertices, faces). The vertices of the projection and the lists of vertex indices that form
+            the faces of its boundary: the edges in counterclockwise order (2D) or triangles with outward
+            orientation (3D). Lower-dimensional projections have fewer vertices: a polygon in 3D is
+            returned as a fan of triangles, a line segment as a single edge and a point without faces.
+    """
+    if not flux_space_projectable(axes, ax_type):
+        raise Exception('The exact projection is only possible for rate axes or for yield axes with a common denominator.')
+    dim = len(axes)
+    den = axes[0][1] if ax_type[0] == 'yield' else None
+
+    def evaluate(expr, fluxes):
+        return sum(v * fluxes[r] for r, v in expr.items())
+
+    def support(c):
+        # maximize the linear combination c of the axes and return the projection of the optimal flux vector
+        obj = {}
+        for ax, c_i in zip(axes, c):
+            for r, v in ax[0].items():
+                obj[r] = obj.get(r, 0.0) + c_i * v
+        if den is None:
+            sol = problem.fba(obj=obj, obj_sense='maximize')
+        else:
+            sol = problem.yopt(obj, den, obj_sense='maximize')
+        if sol.status != OPTIMAL or getattr(sol, 'scalable', False):
+            raise Exception('The projection of the flux space is unbounded or undefined or the problem is infeasible.')
+        d = evaluate(den, sol.fluxes) if den is not None else 1.0
+        return [evaluate(ax[0], sol.fluxes) / d for ax in axes]
+
+    # points that minimize and maximize the single axes
+    P = array([support([s * (j == i) for j in range(dim)]) for i in range(dim) for s in [-1, 1]])
+    # The support function is evaluated on coordinates that are scaled to the unit box, such that the
+    # tolerance does not depend on the units and the ranges of the axes.
+    origin = P.min(0)
+    scale = P.max(0) - origin
+    scale[scale <= 0] = 1.0
+
+    def support_unit(n):
+        return array(support(n / scale))
+
+    # find the affine hull of the projection by optimizing in the directions orthogonal to the points found
+    while True:
+        U = (P - origin) / scale
+        center = U.mean(0)
+        _, sigma, Vt = svd(U - center)
+        rank = int(sum(sigma > tol / 2))
+        found = False
+        for n in Vt[rank:]:
+            for s in [-1, 1]:
+                p = support_unit(s * n)
+                if s * n.dot((p - origin) / scale - center) > tol:
+                    P = vstack((P, p))
+                    found = True
+                    break
+            if found:
+                break
+        if not found:
+            break
+    B = Vt[:rank]  # orthonormal basis of the affine hull
+    W = ((P - origin) / scale - center).dot(B.T)
+    if rank == 0:
+        return [P[0].tolist()], []
+    elif rank == 1:
+        # the single axes are already optimized at the endpoints of the segment
+        return [P[W[:, 0].argmin()].tolist(), P[W[:, 0].argmax()].tolist()], [[0, 1]]
+    verified = []
+    while True:
+        hull = ConvexHull(W)
+        for eq in hull.equations:
+            if any(abs(eq - v).max() <= tol for v in verified):
+                continue
+            p = support_unit(eq[:-1].dot(B))
+            w = ((p - origin) / scale - center).dot(B.T)
+            if eq[:-1].dot(w) + eq[-1] > tol and abs(W - w).max(1).min() > tol:
+                P = vstack((P, p))
+                W = vstack((W, w))
+                break
+            verified.append(eq)
+        else:
+            break
+    vertices = P[hull.vertices].tolist()
+    if rank == 2 and dim == 2:
+        # the vertices of 2D hulls are ordered counterclockwise
+        return vertices, [[i, (i + 1) % len(vertices)] for i in range(len(vertices))]
+    elif rank == 2:
+        return vertices, [[0, i, i + 1] for i in range(1, len(vertices) - 1)]
+    index = {k: i for i, k in enumerate(hull.vertices)}
+    faces = []
+    for simplex, eq in zip(hull.simplices, hull.equations):
+        a, b, c = P[simplex]
+        if cross(b - a, c - a).dot(eq[:-1].dot(B) / scale) < 0:
+            simplex = simplex[[0, 2, 1]]
+        faces += [[index[k] for k in simplex]]
+    return vertices, faces
+
+
+def project_flux_space(model, axes, **kwargs) -> Tuple[list, list]:
+    """Compute the exact projection of the space of steady-state flux vectors onto two or three dimensions.
+    
+    Computes the vertices and the boundary of the projection of the flux space onto the given axes
+    without plotting it (see plot_flux_space() with exact=True). All axes must be either *linear*
+    expressions or *fractional-linear* expressions with a common denominator, such that the
+    projection is a polytope. Its vertices are found with the support function method that requires
+    one LP per vertex and facet of the projection.
+    
+    Example:
+        vertices, faces = project_flux_space(model,('BIOMASS_Ecoli_core_w_GAM','EX_etoh_e'))
     
     Args:
         model (cobra.Model):
@@ -742,43 +1919,98 @@ def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
         axes ((list of lists) or (list of str)):
             A set of linear expressions that specify which reactions/expressions/dimensions should be
             used on the axis. Examples: axes=['BIOMASS_Ecoli_core_w_GAM','EX_etoh_e'] or 
-            axes=[['BIOMASS_Ecoli_core_w_GAM','-EX_glc_e'],['EX_etoh_e','-EX_glc_e']] or
-            axes=[['BIOMASS_Ecoli_core_w_GAM'],['EX_etoh_e','-EX_glc_e']]
+            axes=[['BIOMASS_Ecoli_core_w_GAM','-EX_glc_e'],['EX_etoh_e','-EX_glc_e']]
             
         solver (optional (str)):
-            The solver that should be used for scanning the flux space.
+            The solver that should be used.
             
         constraints (optional (str) or (list of str) or (list of [dict,str,float])): (Default: '')
-            List of *linear* constraints to be applied on top of the model: signs + or -, scalar 
-            factors for reaction rates, inclusive (in)equalities and a float value on the right hand 
-            side. The parsing of the constraints input allows for some flexibility. Correct (and 
-            identical) inputs are, for instance: 
-            constraints='-EX_o2_e <= 5, ATPM = 20' or
-            constraints=['-EX_o2_e <= 5', 'ATPM = 20'] or
-            constraints=[[{'EX_o2_e':-1},'<=',5], [{'ATPM':1},'=',20]]
-            
-        plt_backend (optional (str)):
-            The matplotlib backend that should be used for plotting:
-            interactive backends: GTK3Agg, GTK3Cairo, GTK4Agg, GTK4Cairo, MacOSX, nbAgg, QtAgg, QtCairo,
-                                  TkAgg, TkCairo, WebAgg, WX, WXAgg, WXCairo, Qt5Agg, Qt5Cairo
-            non-interactive backends: agg, cairo, pdf, pgf, ps, svg, template
-            
-        show (optional (bool)): (Default: True)
-            Should matplotlib show the plot or should it stop after plot generation. show=False can
-            be useful if multiple flux spaces should be plotted at once or the plot should be modified
-            before been shown.
-        
-        points (optional (int)): (Default: 25 (3D) or 40 (2D))
-            The number of intervals in which the flux space should be sampled along each axis. A higher
-            number will increase resoltion but also computation time.
+            List of *linear* constraints to be applied on top of the model (see plot_flux_space()).
 
     Returns:
         (Tuple):
-            (datapoints, triang, plot1). The array of datapoints from which the plot was generated. These
-            datapoints are optimal values for different optimizations within the flux space. The triang
-            variable contains information about which datapoints need to be connected in triangles to
-            render a consistend 3-D surface with Delaunay triangles (Delaunay triangulation). The last
-            variable contains the matplotlib object.
+            (vertices, faces). The vertices of the projection and the lists of vertex indices that form
+            the faces of its boundary: the edges in counterclockwise order (2D) or triangles with outward
+            orientation (3D).
+    """
+    reaction_ids = model.reactions.list_attr("id")
+    if CONSTRAINTS in kwargs:
+        constraints = parse_constraints(kwargs[CONSTRAINTS], reaction_ids)
+    else:
+        constraints = []
+    solver = select_solver(kwargs[SOLVER] if SOLVER in kwargs else None, model)
+    axes, ax_type, _ = flux_space_axes(axes, reaction_ids)
+    from straindesign.fluxProblem import FluxProblem
+    problem = FluxProblem(model, solver=solver, constraints=constraints)
+    return flux_space_projection(problem, axes, ax_type)
+
+
+def flux_space_mesh(datapoints, datapoints_top, datapoints_bottom) -> list:
+    """Helper function for 3D flux space plots
+    
+    Triangulate the surface of a 3D flux space that was sampled on a structured grid. The grid has one
+    column of points (ascending in y) for each sampled x value and a lower and upper point (in z) for
+    each (x, y) pair. The triangles are constructed directly from the indices of the grid: The strips
+    between neighboring columns of the top and bottom surface are zipped together by always advancing on
+    the column with the next lower y value. The four side surfaces are made of quadrilaterals. All
+    triangles are oriented outward and degenerate triangles (e.g. where upper and lower point coincide)
+    are removed.
+    
+    Args:
+        datapoints (list of arrays):
+            The points of the grid.
+        datapoints_top, datapoints_bottom (list of lists of int):
+            The indices of the upper and lower points in each column.
+    
+    Returns:
+        (list of lists):
+            The triangles as lists of three point indices.
+    """
+    points = array(datapoints)
+    top = [array(t, dtype=int) for t in datapoints_top]
+    bottom = [array(b, dtype=int) for b in datapoints_bottom]
+    triang = []
+    for i in range(len(top) - 1):
+        n, m = len(top[i]), len(top[i + 1])
+        # advance on the left (False) or right (True) column, ordered by the y value of the next point
+        y = concatenate((points[top[i][1:], 1], points[top[i + 1][1:], 1]))
+        right = concatenate((zeros(n - 1, dtype=bool), ones(m - 1, dtype=bool)))[argsort(y, kind='stable')]
+        k_l = concatenate(([0], cumsum(~right)))[:-1]
+        k_r = concatenate(([0], cumsum(right)))[:-1]
+        for col, flipped in [(top, False), (bottom, True)]:
+            tri = column_stack((col[i][k_l], col[i + 1][k_r],
+                                where(right, col[i + 1][minimum(k_r + 1, m - 1)], col[i][minimum(k_l + 1, n - 1)])))
+            triang += [tri[:, ::-1] if flipped else tri]
+
+    def quads(a, b, c, d, flipped):
+        # two triangles for each quadrilateral a-b-c-d
+        tri = vstack((column_stack((a, b, d)), column_stack((b, c, d))))
+        return tri[:, ::-1] if flipped else tri
+
+    front_bottom = array([b[0] for b in bottom])
+    front_top = array([t[0] for t in top])
+    back_bottom = array([b[-1] for b in bottom])
+    back_top = array([t[-1] for t in top])
+    triang += [quads(front_bottom[:-1], front_bottom[1:], front_top[1:], front_top[:-1], False)]
+    triang += [quads(back_bottom[:-1], back_bottom[1:], back_top[1:], back_top[:-1], True)]
+    triang += [quads(bottom[0][:-1], bottom[0][1:], top[0][1:], top[0][:-1], True)]
+    triang += [quads(bottom[-1][:-1], bottom[-1][1:], top[-1][1:], top[-1][:-1], False)]
+    triang = vstack(triang)
+    p = points[triang]
+    area = norm(cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]), axis=1)
+    return triang[area > 0].tolist()
+
+
+def flux_space_data(model, axes, **kwargs) -> Tuple[list, list, list, list]:
+    """Helper function for flux space plots
+    
+    Compute the datapoints and the triangles of a flux space plot without plotting it. The arguments
+    are the same as for plot_flux_space().
+    
+    Returns:
+        (Tuple):
+            (datapoints, triang, ax_name, ax_limits). The datapoints and triangles of the plot, the labels
+            of the axes and the limits of the plot area.
     """
     reaction_ids = model.reactions.list_attr("id")
 
@@ -791,19 +2023,8 @@ def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
         kwargs[SOLVER] = None
     solver = select_solver(kwargs[SOLVER], model)
 
-    if 'plt_backend' in kwargs:
-        set_matplotlib_backend(kwargs['plt_backend'])
-
-    if 'show' not in kwargs:
-        show = True
-    else:
-        show = kwargs['show']
-
-    axes = [list(ax) if not isinstance(ax, str) else [ax] for ax in axes]  # cast to list of lists
+    axes, ax_type, ax_name = flux_space_axes(axes, reaction_ids)
     num_axes = len(axes)
-    if num_axes not in [2, 3]:
-        raise Exception('Please define 2 or 3 axes as a list of tuples [ax1, ax2, (optional) ax3] with ax1 = (den,num).\n'+\
-                        '"den" and "num" being linear expressions.')
 
     if 'points' in kwargs:
         points = kwargs['points']
@@ -813,30 +2034,24 @@ def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
         else:
             points = 25
 
-    ax_name = ["" for _ in range(num_axes)]
+    # All LPs are solved on one prepared problem. The constraints that fix the coordinates of a point
+    # are pushed onto the problem once and only their values are replaced for each point.
+    from straindesign.fluxProblem import FluxProblem
+    problem = FluxProblem(model, solver=solver, constraints=kwargs[CONSTRAINTS])
+
     ax_limits = [(nan, nan) for _ in range(num_axes)]
     val_limits = [(nan, nan) for _ in range(num_axes)]
-    ax_type = ["" for _ in range(num_axes)]
     for i, ax in enumerate(axes):
-        if len(ax) == 1:
-            ax_type[i] = 'rate'
-        elif len(ax) == 2:
-            ax_type[i] = 'yield'
         if ax_type[i] == 'rate':
-            ax[0] = parse_linexpr(ax[0], reaction_ids)[0]
-            ax_name[i] = linexprdict2str(ax[0])
-            sol_min = fba(model, obj=ax[0], constraints=kwargs[CONSTRAINTS], solver=solver, obj_sense='minimize')
-            sol_max = fba(model, obj=ax[0], constraints=kwargs[CONSTRAINTS], solver=solver, obj_sense='maximize')
+            sol_min = problem.fba(obj=ax[0], obj_sense='minimize')
+            sol_max = problem.fba(obj=ax[0], obj_sense='maximize')
             # abort if any of the fluxes are unbounded or undefined
             inval = [i + 1 for i, v in enumerate([sol_min, sol_max]) if v.status == UNBOUNDED or v.status == INFEASIBLE]
             if any(inval):
                 raise Exception('One of the specified reactions is unbounded or problem is infeasible. Plot cannot be generated.')
         elif ax_type[i] == 'yield':
-            ax[0] = parse_linexpr(ax[0], reaction_ids)[0]
-            ax[1] = parse_linexpr(ax[1], reaction_ids)[0]
-            ax_name[i] = '(' + linexprdict2str(ax[0]) + ') / (' + linexprdict2str(ax[1]) + ')'
-            sol_min = yopt(model, obj_num=ax[0], obj_den=ax[1], constraints=kwargs[CONSTRAINTS], solver=solver, obj_sense='minimize')
-            sol_max = yopt(model, obj_num=ax[0], obj_den=ax[1], constraints=kwargs[CONSTRAINTS], solver=solver, obj_sense='maximize')
+            sol_min = problem.yopt(ax[0], ax[1], obj_sense='minimize')
+            sol_max = problem.yopt(ax[0], ax[1], obj_sense='maximize')
             # abort if any of the yields are unbounded or undefined
             inval = [i + 1 for i, v in enumerate([sol_min, sol_max]) if v.status == UNBOUNDED or v.status == INFEASIBLE]
             if any(inval):
@@ -844,24 +2059,45 @@ def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
         val_limits[i] = [ceil_dec(sol_min.objective_value, 8), floor_dec(sol_max.objective_value, 8)]
         ax_limits[i] = [min((0, val_limits[i][0])), max((0, val_limits[i][1]))]
 
+    exact = 'exact' in kwargs and kwargs['exact']
+    if exact and not flux_space_projectable(axes, ax_type):
+        logging.warning('The exact projection requires rate axes or yield axes with a common denominator. '
+                        'The flux space is sampled instead.')
+        exact = False
+    if exact:
+        vertices, faces = flux_space_projection(problem, axes, ax_type)
+        if num_axes == 3 and len(vertices) < 3:
+            logging.warning('The flux space projection is not two-dimensional. The flux space is sampled instead.')
+            exact = False
+
     # compute points
-    x_space = linspace(val_limits[0][0], val_limits[0][1], num=points).tolist()
-    lb = full(points, nan)
-    ub = full(points, nan)
-    for i, x in enumerate(x_space):
-        constr = kwargs[CONSTRAINTS].copy()
-        if ax_type[0] == 'rate':
-            constr += [[axes[0][0], '=', x]]
-        elif ax_type[0] == 'yield':
-            constr += [[{**axes[0][0], **{k: -v * x for k, v in axes[0][1].items()}}, '=', 0]]
-        if ax_type[1] == 'rate':
-            sol_vmin = fba(model, constraints=constr, obj=axes[1][0], obj_sense='minimize')
-            sol_vmax = fba(model, constraints=constr, obj=axes[1][0], obj_sense='maximize')
-        elif ax_type[1] == 'yield':
-            sol_vmin = yopt(model, constraints=constr, obj_num=axes[1][0], obj_den=axes[1][1], obj_sense='minimize')
-            sol_vmax = yopt(model, constraints=constr, obj_num=axes[1][0], obj_den=axes[1][1], obj_sense='maximize')
-        lb[i] = ceil_dec(sol_vmin.objective_value, 9)
-        ub[i] = floor_dec(sol_vmax.objective_value, 9)
+    if exact:
+        if num_axes == 2:
+            # lower and upper envelope at the x-coordinates of the vertices of the projected polygon
+            x_space = sorted(set(v[0] for v in vertices))
+            lb = []
+            ub = []
+            for x in x_space:
+                y = []
+                for k, (x_a, y_a) in enumerate(vertices):
+                    x_b, y_b = vertices[(k + 1) % len(vertices)]
+                    if x_a == x:
+                        y += [y_a]
+                    elif min(x_a, x_b) < x < max(x_a, x_b):
+                        y += [y_a + (y_b - y_a) * (x - x_a) / (x_b - x_a)]
+                lb += [min(y)]
+                ub += [max(y)]
+    else:
+        problem.push_constraints(flux_space_fix(axes, ax_type, [val_limits[0][0]]))
+        if 'adaptive' in kwargs and kwargs['adaptive']:
+            x_space, lb, ub = flux_space_adaptive(problem, axes, ax_type, val_limits[0], val_limits[1], points)
+        else:
+            x_space = linspace(val_limits[0][0], val_limits[0][1], num=points).tolist()
+            lb = full(points, nan)
+            ub = full(points, nan)
+            for i, x in enumerate(x_space):
+                lb[i], ub[i] = flux_space_point(problem, axes, ax_type, [x])
+        problem.pop_constraints()
 
     if num_axes == 2:
         datapoints = [[x, l] for x, l in zip(x_space, lb)] + [[x, u] for x, u in zip(x_space, ub)]
@@ -878,6 +2114,185 @@ def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
                     triang += [[temp_points[idx] for idx in p] for p in triang_temp]
             except:
                 logging.warning('Computing matrix rank or Delaunay simplices failed.')
+
+    elif num_axes == 3:
+        if exact:
+            # the faces of the exact projection are triangles with outward orientation
+            datapoints = [array(v) for v in vertices]
+            triang = faces
+        else:
+            max_diff_y = max([abs(l - u) for l, u in zip(lb, ub)])
+            y_spaces = []
+            for l, u in zip(lb, ub):
+                if l != u:
+                    y_spaces += [linspace(l, u, int(-(-points // (max_diff_y / abs(l - u))))).tolist()]
+                else:
+                    y_spaces += [[l]]
+            tasks = [(k, [x, y]) for k, (x, y) in enumerate((x, y) for x, y_space in zip(x_space, y_spaces) for y in y_space)]
+            # The grid points are distributed over a process pool with one prepared problem per worker.
+            values = [None] * len(tasks)
+            processes = get_processes(kwargs[PROCESSES] if PROCESSES in kwargs else None)
+            processes = min(processes, len(tasks))
+            if processes > 1 and len(tasks) > 300:
+                # the workers only receive the matrix and the bounds, which are shared through memory-mapped files
+                initargs = (problem.S, array(problem.lb, dtype=float), array(problem.ub, dtype=float), problem.reaction_ids, solver,
+                            kwargs[CONSTRAINTS], axes, ax_type)
+                with parallel_pool(processes, initializer=flux_space_worker_init, initargs=initargs) as pool:
+                    chunk_size = max(1, len(tasks) // (10 * processes))
+                    results = pool.imap_unordered(flux_space_worker_compute, tasks, chunksize=chunk_size)
+                    for done, (k, v_min, v_max) in enumerate(results, 1):
+                        values[k] = (v_min, v_max)
+                        flux_space_progress(done, len(tasks))
+            else:
+                problem.push_constraints(flux_space_fix(axes, ax_type, tasks[0][1]))
+                for k, coords in tasks:
+                    values[k] = flux_space_point(problem, axes, ax_type, coords)
+                    flux_space_progress(k + 1, len(tasks))
+                problem.pop_constraints()
+            datapoints = []
+            datapoints_top = []
+            datapoints_bottom = []
+            values = iter(values)
+            for i, (x, y_space) in enumerate(zip(x_space.copy(), y_spaces)):
+                datapoints_top += [[]]
+                datapoints_bottom += [[]]
+                for j, y in enumerate(y_space):
+                    v_min, v_max = next(values)
+                    datapoints_top[-1] += [len(datapoints)]
+                    datapoints += [array([x, y, v_max])]
+                    datapoints_bottom[-1] += [len(datapoints)]
+                    datapoints += [array([x, y, v_min])]
+                if any([isnan(datapoints[d][2]) for d in datapoints_top[-1] + datapoints_bottom[-1]]):
+                    logging.warning('warning: An optimization finished infeasible. Some sample points are missing.')
+                    datapoints_top = datapoints_top[:-1]
+                    datapoints_bottom = datapoints_bottom[:-1]
+                    x_space.remove(x)
+
+            triang = flux_space_mesh(datapoints, datapoints_top, datapoints_bottom)
+    return datapoints, triang, ax_name, ax_limits
+
+
+def compute_flux_space(model, axes, **kwargs) -> Tuple[ndarray, ndarray]:
+    """Compute projections of the space of steady-state flux vectors onto two or three dimensions.
+    
+    This function computes the same datapoints and triangles as plot_flux_space(), but does not
+    plot them and does not import matplotlib. It is suited for batch computations and for
+    custom plots.
+    
+    Example:
+        points, triangles = compute_flux_space(model,('BIOMASS_Ecoli_core_w_GAM','EX_etoh_e'))
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        axes ((list of lists) or (list of str)):
+            A set of linear expressions or pairs of linear expressions (yields) that specify the axes
+            (see plot_flux_space()).
+            
+        **kwargs:
+            solver, constraints, points, processes, adaptive and exact as in plot_flux_space().
+
+    Returns:
+        (Tuple):
+            (points, triangles). An array with one datapoint per row and an integer array with the
+            indices of three datapoints per row that form the triangles of the plotted area (2D) or
+            surface (3D).
+    """
+    datapoints, triang, _, _ = flux_space_data(model, axes, **kwargs)
+    return array(datapoints, dtype=float).reshape(-1, len(axes)), array(triang, dtype=int).reshape(-1, 3)
+
+
+def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
+    """Plot projections of the space of steady-state flux vectors onto two or three dimensions.
+    
+    This function uses LP and matplotlib to generate lower dimensional representations of the 
+    flux space. Custom *linear* or *fractional-linear* expressions can be used for the plot
+    axis. The most commonly used flux space reprentations are the *production envelope* that
+    plots the growth rate (x) vs the product synthesis rate (y) and the *yield space plot*
+    that plots the biomass yield (x) vs the product yiel (y). One may specify additional
+    constraints to investigate subspaces of the metabolic steady-state flux space. To compute the
+    datapoints without plotting them, use compute_flux_space().
+    
+    Example:
+        plot_flux_space(model,('BIOMASS_Ecoli_core_w_GAM','EX_etoh_e'))
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        axes ((list of lists) or (list of str)):
+            A set of linear expressions that specify which reactions/expressions/dimensions should be
+            used on the axis. Examples: axes=['BIOMASS_Ecoli_core_w_GAM','EX_etoh_e'] or 
+            axes=[['BIOMASS_Ecoli_core_w_GAM','-EX_glc_e'],['EX_etoh_e','-EX_glc_e']] or
+            axes=[['BIOMASS_Ecoli_core_w_GAM'],['EX_etoh_e','-EX_glc_e']]
+            
+        solver (optional (str)):
+            The solver that should be used for scanning the flux space.
+            
+        constraints (optional (str) or (list of str) or (list of [dict,str,float])): (Default: '')
+            List of *linear* constraints to be applied on top of the model: signs + or -, scalar 
+            factors for reaction rates, inclusive (in)equalities and a float value on the right hand 
+            side. The parsing of the constraints input allows for some flexibility. Correct (and 
+            identical) inputs are, for instance: 
+            constraints='-EX_o2_e <= 5, ATPM = 20' or
+            constraints=['-EX_o2_e <= 5', 'ATPM = 20'] or
+            constraints=[[{'EX_o2_e':-1},'<=',5], [{'ATPM':1},'=',20]]
+            
+        plt_backend (optional (str)):
+            The matplotlib backend that should be used for plotting:
+            interactive backends: GTK3Agg, GTK3Cairo, GTK4Agg, GTK4Cairo, MacOSX, nbAgg, QtAgg, QtCairo,
+                                  TkAgg, TkCairo, WebAgg, WX, WXAgg, WXCairo, Qt5Agg, Qt5Cairo
+            non-interactive backends: agg, cairo, pdf, pgf, ps, svg, template
+            
+        show (optional (bool)): (Default: True)
+            Should matplotlib show the plot or should it stop after plot generation. show=False can
+            be useful if multiple flux spaces should be plotted at once or the plot should be modified
+            before been shown.
+        
+        points (optional (int)): (Default: 25 (3D) or 40 (2D))
+            The number of intervals in which the flux space should be sampled along each axis. A higher
+            number will increase resoltion but also computation time.
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            The number of processes that are used to sample 3D flux spaces.
+            
+        adaptive (optional (bool)): (Default: False)
+            Sample the first axis adaptively instead of in equidistant steps. Intervals are only refined
+            where the envelope is not linear. If both plotted axes are rates, the envelope is piecewise
+            linear and the returned datapoints are its exact vertices. For yield axes, the envelope is
+            refined until it deviates from the sampled points by less than 0.1 % of the plot range.
+
+        exact (optional (bool)): (Default: False)
+            Compute the exact vertices of the projected flux space instead of sampling it (see
+            project_flux_space()). Only possible if all axes are rates or all axes are yields with a
+            common denominator. Otherwise, the flux space is sampled.
+
+    Returns:
+        (Tuple):
+            (datapoints, triang, plot1). The array of datapoints from which the plot was generated. These
+            datapoints are optimal values for different optimizations within the flux space. The triang
+            variable contains information about which datapoints need to be connected in triangles to
+            render a consistend 3-D surface with Delaunay triangles (Delaunay triangulation). The last
+            variable contains the matplotlib object.
+    """
+    import matplotlib
+    if 'plt_backend' in kwargs:
+        matplotlib.use(kwargs['plt_backend'])
+    import matplotlib.pyplot as plt
+    from matplotlib.cm import get_cmap
+
+    if 'show' not in kwargs:
+        show = True
+    else:
+        show = kwargs['show']
+
+    datapoints, triang, ax_name, ax_limits = flux_space_data(model, axes, **kwargs)
+    if len(ax_name) == 2:
+        n = len(datapoints) // 2
+        x_space = [d[0] for d in datapoints[:n]]
+        lb = [d[1] for d in datapoints[:n]]
+        ub = [d[1] for d in datapoints[n:]]
         # Plot
         x = [v for v in x_space] + [v for v in reversed(x_space)]
         y = [v for v in lb] + [v for v in reversed(ub)]
@@ -900,93 +2315,7 @@ def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
         plot1.axes.set_ylabel(ax_name[1])
         plot1.axes.set_xlim(ax_limits[0][0] * 1.05, ax_limits[0][1] * 1.05)
         plot1.axes.set_ylim(ax_limits[1][0] * 1.05, ax_limits[1][1] * 1.05)
-        if show:
-            plt.show()
-        return datapoints, triang, plot1
-
-    elif num_axes == 3:
-        max_diff_y = max([abs(l - u) for l, u in zip(lb, ub)])
-        datapoints = []
-        datapoints_top = []
-        datapoints_bottom = []
-        for i, (x, l, u) in enumerate(zip(x_space.copy(), lb, ub)):
-            if l != u:
-                y_space = linspace(l, u, int(-(-points // (max_diff_y / abs(l - u)))))
-            else:
-                y_space = [l]
-            datapoints_top += [[]]
-            datapoints_bottom += [[]]
-            for j, y in enumerate(y_space):
-                constr = kwargs[CONSTRAINTS].copy()
-                if ax_type[0] == 'rate':
-                    constr += [[axes[0][0], '=', x]]
-                elif ax_type[0] == 'yield':
-                    constr += [[{**axes[0][0], **{k: -v * x for k, v in axes[0][1].items()}}, '=', 0]]
-                if ax_type[1] == 'rate':
-                    constr += [[axes[1][0], '=', y]]
-                elif ax_type[1] == 'yield':
-                    constr += [[{**axes[1][0], **{k: -v * y for k, v in axes[1][1].items()}}, '=', 0]]
-                if ax_type[2] == 'rate':
-                    sol_vmin = fba(model, constraints=constr, obj=axes[2][0], obj_sense='minimize')
-                    sol_vmax = fba(model, constraints=constr, obj=axes[2][0], obj_sense='maximize')
-                elif ax_type[2] == 'yield':
-                    sol_vmin = yopt(model, constraints=constr, obj_num=axes[2][0], obj_den=axes[2][1], obj_sense='minimize')
-                    sol_vmax = yopt(model, constraints=constr, obj_num=axes[2][0], obj_den=axes[2][1], obj_sense='maximize')
-                datapoints_top[-1] += [len(datapoints)]
-                datapoints += [array([x, y, floor_dec(sol_vmax.objective_value, 9)])]
-                datapoints_bottom[-1] += [len(datapoints)]
-                datapoints += [array([x, y, ceil_dec(sol_vmin.objective_value, 9)])]
-            if any([isnan(datapoints[d][2]) for d in datapoints_top[-1] + datapoints_bottom[-1]]):
-                logging.warning('warning: An optimization finished infeasible. Some sample points are missing.')
-                datapoints_top = datapoints_top[:-1]
-                datapoints_bottom = datapoints_bottom[:-1]
-                x_space.remove(x)
-
-        # Construct Denaunay triangles for plotting from all 6 perspectives
-        triang = []
-        # triangles top
-        for i in range(len(datapoints_top) - 1):
-            temp_points = datapoints_top[i] + datapoints_top[i + 1]
-            pts = [array([datapoints[idx_p][0], datapoints[idx_p][1]]) for idx_p in temp_points]
-            if matrix_rank(pts - pts[0]) > 1:
-                triang_temp = Delaunay(pts).simplices
-                triang += [[temp_points[idx] for idx in p] for p in triang_temp]
-        # triangles bottom
-        for i in range(len(datapoints_bottom) - 1):
-            temp_points = datapoints_bottom[i] + datapoints_bottom[i + 1]
-            pts = [array([datapoints[idx_p][0], datapoints[idx_p][1]]) for idx_p in temp_points]
-            if matrix_rank(pts - pts[0]) > 1:
-                triang_temp = Delaunay(pts).simplices
-                triang += [[temp_points[idx] for idx in flip(p)] for p in triang_temp]
-        # triangles front
-        for i in range(len(x_space) - 1):
-            temp_points = [datapoints_top[i][0], datapoints_top[i + 1][0], datapoints_bottom[i][0], datapoints_bottom[i + 1][0]]
-            pts = [array([datapoints[idx_p][0], datapoints[idx_p][2]]) for idx_p in temp_points]
-            if matrix_rank(pts - pts[0]) > 1:
-                triang_temp = Delaunay(pts).simplices
-                triang += [[temp_points[idx] for idx in flip(p)] for p in triang_temp]
-        # triangles back
-        for i in range(len(x_space) - 1):
-            temp_points = [datapoints_top[i][-1], datapoints_top[i + 1][-1], datapoints_bottom[i][-1], datapoints_bottom[i + 1][-1]]
-            pts = [array([datapoints[idx_p][0], datapoints[idx_p][2]]) for idx_p in temp_points]
-            if matrix_rank(pts - pts[0]) > 1:
-                triang_temp = Delaunay(pts).simplices
-                triang += [[temp_points[idx] for idx in flip(p)] for p in triang_temp]
-        # triangles left
-        for i in range(len(datapoints_top[0]) - 1):
-            temp_points = [datapoints_top[0][i], datapoints_top[0][i + 1], datapoints_bottom[0][i], datapoints_bottom[0][i + 1]]
-            pts = [array([datapoints[idx_p][1], datapoints[idx_p][2]]) for idx_p in temp_points]
-            if matrix_rank(pts - pts[0]) > 1:
-                triang_temp = Delaunay(pts).simplices
-                triang += [[temp_points[idx] for idx in p] for p in triang_temp]
-        # triangles right
-        for i in range(len(datapoints_top[-1]) - 1):
-            temp_points = [datapoints_top[-1][i], datapoints_top[-1][i + 1], datapoints_bottom[-1][i], datapoints_bottom[-1][i + 1]]
-            pts = [array([datapoints[idx_p][1], datapoints[idx_p][2]]) for idx_p in temp_points]
-            if matrix_rank(pts - pts[0]) > 1:
-                triang_temp = Delaunay(pts).simplices
-                triang += [[temp_points[idx] for idx in p] for p in triang_temp]
-
+    else:
         # hull = ConvexHull(datapoints)
         x = [d[0] for d in datapoints]
         y = [d[1] for d in datapoints]
@@ -1004,23 +2333,17 @@ def plot_flux_space(model, axes, **kwargs) -> Tuple[list, list, list]:
         ax.set_zlabel(ax_name[2])
         # set higher color value for 'larger' values in all dimensions
         # use middle value of triangles instead of means and then norm
-        colors = [nan for _ in triang]
-        for i, t in enumerate(triang):
-            p = [datapoints[i] for i in t]
-            interior_point = [0.0, 0.0, 0.0]
-            for d in range(3):
-                v = [q[d] for q in p]
-                interior_point[d] = mean([max(v), min(v)]) / max(abs(array(ax_limits[d])))
-            colors[i] = sum(interior_point)  # norm(interior_point)
+        p = array(datapoints)[array(triang)]
+        colors = ((p.max(1) + p.min(1)) / 2 / abs(array(ax_limits)).max(1)).sum(1)
         lw = min([1, 6.0 / len(triang)])
         plot1 = ax.plot_trisurf(x, y, z, triangles=triang, linewidth=lw, edgecolors='black', antialiased=True,
                                 alpha=0.90)  #  array=colors, cmap=plt.cm.winter
         colors = colors / max(colors)
         colors = get_cmap("Spectral")(colors)
         plot1.set_fc(colors)
-        if show:
-            plt.show()
-        return datapoints, triang, plot1
+    if show:
+        plt.show()
+    return datapoints, triang, plot1
 
 
 def ceil_dec(v, n):
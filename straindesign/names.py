@@ -63,6 +63,8 @@
         SCIP = 'scip'
         
         GLPK = 'glpk'
+        
+        HIGHS = 'highs'
 
         OPTIMAL = 'optimal' # from optlang interface
         
@@ -76,6 +78,16 @@
         
         ERROR = 'error'
         
+    Simplex basis status
+    
+        BASIC = 'basic'
+        
+        AT_LOWER = 'at_lower'
+        
+        AT_UPPER = 'at_upper'
+        
+        FREE = 'free'
+        
     Strain design setup
 
         KOCOST = 'ko_cost'
@@ -98,6 +110,8 @@
         
         T_LIMIT = 'time_limit'
         
+        PROCESSES = 'processes'
+        
         SOLUTION_APPROACH = 'solution_approach'
         
         ANY = 'any'
@@ -106,6 +120,8 @@
         
         POPULATE = 'populate'
         
+        LAZY = 'lazy'
+        
     Analysis
     
         MAXIMIZE = 'maximize'
@@ -137,6 +153,7 @@ CPLEX = 'cplex'
 GUROBI = 'gurobi'
 SCIP = 'scip'
 GLPK = 'glpk'
+HIGHS = 'highs'
 from optlang.interface import OPTIMAL,    \
                               INFEASIBLE, \
                               TIME_LIMIT, \
@@ -145,6 +162,12 @@ from optlang.interface import OPTIMAL,    \
 TIME_LIMIT_W_SOL = 'time_limit_w_sols'
 ERROR = 'error'
 
+# Simplex basis status of variables and constraints (constraints: status of the row activity)
+BASIC = 'basic'
+AT_LOWER = 'at_lower'
+AT_UPPER = 'at_upper'
+FREE = 'free'
+
 # Strain design setup
 KOCOST = 'ko_cost'
 KICOST = 'ki_cost'
@@ -156,10 +179,12 @@ SETUP = 'sd_setup'
 MAX_SOLUTIONS = 'max_solutions'
 MAX_COST = 'max_cost'
 T_LIMIT = 'time_limit'
+PROCESSES = 'processes'
 SOLUTION_APPROACH = 'solution_approach'
 ANY = 'any'
 BEST = 'best'
 POPULATE = 'populate'
+LAZY = 'lazy'
 
 # Analysis
 MAXIMIZE = 'maximize'
@@ -25,9 +25,8 @@ from sympy import Rational, nsimplify, parse_expr, to_dnf
 from typing import Dict, List
 import jpype
 from cobra import Model, Metabolite, Reaction, Configuration
-from cobra.util.array import create_stoichiometric_matrix
 import straindesign.efmtool as efm
-from straindesign import fva, select_solver, parse_constraints
+from straindesign import fva, effective_bounds, select_solver, parse_constraints, get_stoichiometry, invalidate_stoichiometry
 from straindesign.names import *
 import logging
 
@@ -721,7 +720,7 @@ def compress_model_parallel(model, protected_rxns=set()):
     old_num_reac = len(model.reactions)
     old_objective = [r.objective_coefficient for r in model.reactions]
     old_reac_ids = [r.id for r in model.reactions]
-    stoichmat_T = create_stoichiometric_matrix(model, 'lil').transpose()
+    stoichmat_T = get_stoichiometry(model)[0].transpose().tolil()
     factor = [d[0] if d else 1.0 for d in stoichmat_T.data]
     A = (sparse.diags(factor) @ stoichmat_T)
     lb = [r.lower_bound for r in model.reactions]
@@ -790,8 +789,8 @@ def remove_ext_mets(model):
     """Remove (unbalanced) external metabolites from the compartment External_Species"""
     external_mets = [i for i, cpts in zip(model.metabolites, model.metabolites.list_attr("compartment")) if cpts == 'External_Species']
     model.remove_metabolites(external_mets)
-    stoich_mat = create_stoichiometric_matrix(model)
-    obsolete_reacs = [reac for reac, b_rempty in zip(model.reactions, np.any(stoich_mat, 0)) if not b_rempty]
+    stoich_mat = get_stoichiometry(model)[0]
+    obsolete_reacs = [reac for reac, b_rempty in zip(model.reactions, stoich_mat.getnnz(0)) if not b_rempty]
     model.remove_reactions(obsolete_reacs)
 
 
@@ -800,7 +799,7 @@ def remove_conservation_relations(model):
     
     This reduces the number of metabolites in a model while maintaining the 
     original flux space. This is a compression technique."""
-    stoich_mat = create_stoichiometric_matrix(model, array_type='lil')
+    stoich_mat = get_stoichiometry(model)[0]
     basic_metabolites = efm.basic_columns_rat(stoich_mat.transpose().toarray(), tolerance=0)
     dependent_metabolites = [model.metabolites[i].id for i in set(range(len(model.metabolites))) - set(basic_metabolites)]
     for m in dependent_metabolites:
@@ -826,6 +825,7 @@ def stoichmat_coeff2rational(model):
                 model.reactions[i]._metabolites[k] = v  # only changes coefficient in the model, not in the solver
             elif not isinstance(v, Rational):
                 raise TypeError
+    invalidate_stoichiometry(model)
 
 
 # replace all stoichiometric coefficients with ints and floats
@@ -838,6 +838,7 @@ def stoichmat_coeff2float(model):
                 model.reactions[i]._metabolites[k] = float(v)
             else:
                 raise Exception('unknown data type')
+    invalidate_stoichiometry(model)
 
 
 def modules_coeff2rational(sd_modules):
@@ -887,19 +888,44 @@ def remove_dummy_bounds(model):
                 model.reactions[i].upper_bound = np.inf
 
 
-def bound_blocked_or_irrevers_fva(model, solver=None):
+def bound_blocked_or_irrevers_fva(model, solver=None, processes=None, engine='lp'):
     """Use FVA to determine the flux ranges. Use this information to update the model bounds
     
     If flux ranges for a reaction are narrower than its bounds in the mode, these bounds can be omitted, 
     since other reactions must constrain the reaction flux. If (upper or lower) flux bounds are found to 
     be zero, the model bounds are updated to reduce the model complexity.
+    
+    Args:
+        model (cobra.Model):
+            A metabolic model that is an instance of the cobra.Model class.
+            
+        solver (optional (str)):
+            The solver that should be used.
+            
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for the LPs.
+            
+        engine (optional (str)): (Default: 'lp')
+            'lp' uses effective_bounds(), which first solves a few LPs over batches of reactions
+            and computes flux limits only where needed. 'fva' runs a full FVA. Both engines
+            return the same bounds.
     """
-    # FVAs to identify blocked and irreversible reactions, as well as non-bounding bounds
-    flux_limits = fva(model)
-    if select_solver(solver) in [SCIP, GLPK]:
+    if select_solver(solver) in [SCIP, GLPK, HIGHS]:
         tol = 1e-10  # use tolerance for tightening problem bounds
     else:
         tol = 0.0
+    if engine == 'lp':
+        bounds = effective_bounds(model, solver=solver, processes=processes, tol=tol)
+        for (reac_id, b) in bounds.iterrows():
+            r = model.reactions.get_by_id(reac_id)
+            # modify _lower_bound and _upper_bound to make changes permanent
+            r._lower_bound = b.lower_bound
+            r._upper_bound = b.upper_bound
+        return
+    elif engine != 'fva':
+        raise Exception("Unknown engine '" + str(engine) + "'. Use 'lp' or 'fva'.")
+    # FVAs to identify blocked and irreversible reactions, as well as non-bounding bounds
+    flux_limits = fva(model, solver=solver, processes=processes)
     for (reac_id, limits) in flux_limits.iterrows():
         r = model.reactions.get_by_id(reac_id)
         # modify _lower_bound and _upper_bound to make changes permanent
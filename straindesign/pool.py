@@ -18,20 +18,36 @@
 #
 """Provide a process pool with enhanced performance on Windows, copied and slightly adapted from cobra."""
 
-from multiprocessing.pool import Pool
+from multiprocessing.pool import Pool, ThreadPool
 from multiprocessing import get_context
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from concurrent.futures import ThreadPoolExecutor
+from threading import local, BoundedSemaphore
+from queue import Queue
+from itertools import islice
+from cobra import Configuration
+from numpy import ndarray, save, load
+from scipy import sparse
 import os
 import sys
 import pickle
 from os.path import isfile
 from platform import system
-from tempfile import mkstemp
+from shutil import rmtree
+from tempfile import mkstemp, mkdtemp
+from io import StringIO
 from typing import Callable, Optional, Tuple
 
 RUN = 0
 CLOSE = 1
 TERMINATE = 2
 
+_session = None  # currently active ParallelSession
+_session_job = None  # parallel phase whose initializer was last run on this worker
+SHARED_MIN_BYTES = 65536  # numpy arrays of this size or larger are shared through memory-mapped files
+_solver_thread = None  # single thread of this process that owns thread-affine solver objects
+_thread_worker = local()  # marks the worker threads of thread pools (see parallel_pool)
+
 # __all__ = ("Pool",)
 
 
@@ -118,3 +134,362 @@ class SDPool(Pool):
         """Remove the dump file if it exists"""
         if self._filename is not None and isfile(self._filename):
             os.remove(self._filename)
+
+
+def _init_session_worker() -> None:
+    """Import straindesign once when a worker of a parallel session is started."""
+    import straindesign
+
+
+def _run_session_task(task):
+    """Run a task of a parallel phase on a worker of a parallel session.
+
+    Before the first task of a phase is executed on a worker, the initializer of
+    the phase is loaded from a pickle file and called.
+    """
+    global _session_job
+    job, filename, func, args = task
+    if _session_job != job:
+        if filename is not None:
+            _init_win_worker(filename)
+        _session_job = job
+    return func(*args)
+
+
+class ParallelSession:
+    """Persistent process pool that is shared by all parallel computations of straindesign
+    
+    Starting worker processes is expensive, since every worker needs to start a Python
+    interpreter and import straindesign (including the Java VM for efmtool). Inside a
+    parallel session, all parallel phases (FVA, bounding of the strain design MILP, ...)
+    reuse the same workers until the session is closed. Each phase ships its LP to the
+    workers only once via a pickle file. Use parallel_session() to create a session.
+    
+    Args:
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of worker processes.
+    """
+
+    def __init__(self, processes: Optional[int] = None):
+        if processes is None:
+            processes = Configuration().processes
+        self.processes = processes
+        self.pool = None
+        self._previous = None
+        self._num_jobs = 0
+
+    def __enter__(self):
+        global _session
+        self.pool = SDPool(self.processes, initializer=_init_session_worker)
+        self._previous = _session
+        _session = self
+        return self
+
+    def __exit__(self, exit_type, exit_value, exit_traceback):
+        global _session
+        _session = self._previous
+        if exit_type is None:
+            self.pool.close()
+        else:
+            self.pool.terminate()
+        self.pool.join()
+        self.pool = None
+
+    def phase(self, initializer: Optional[Callable] = None, initargs: Tuple = (), processes: Optional[int] = None):
+        """Start a new parallel phase with its own worker initialization that runs on up to processes workers"""
+        self._num_jobs += 1
+        processes = self.processes if processes is None else min(processes, self.processes)
+        return SessionPhase(self.pool, (os.getpid(), id(self), self._num_jobs), processes, initializer, initargs)
+
+
+class SessionPhase:
+    """A parallel phase that runs on the workers of a ParallelSession
+    
+    The phase provides the same methods as a process pool (imap_unordered, apply_async)
+    for submitting tasks. The initializer is pickled to a file once, and each worker calls
+    it before it processes its first task of this phase. At most processes tasks of the
+    phase run at the same time, even if the session has more workers.
+    """
+
+    def __init__(self, pool: Pool, job: Tuple, processes: int, initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        self.pool = pool
+        self.job = job
+        self.processes = processes
+        self._slots = BoundedSemaphore(processes)
+        self._filename = None
+        if initializer is not None:
+            descriptor, self._filename = mkstemp(suffix=".pkl")
+            with os.fdopen(descriptor, mode="wb") as handle:
+                pickle.dump((initializer,) + initargs, handle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        """Remove the dump file"""
+        if self._filename is not None and isfile(self._filename):
+            os.remove(self._filename)
+
+    def imap_unordered(self, func: Callable, iterable, chunksize: int = 1):
+        """Equivalent of multiprocessing.Pool.imap_unordered"""
+        args = iter(iterable)
+        chunks = iter(lambda: list(islice(args, chunksize)), [])
+        finished = Queue()
+        in_flight = 0
+        for chunk in islice(chunks, self.processes):
+            self.apply_async(_map_chunk, (func, chunk), callback=finished.put, error_callback=finished.put)
+            in_flight += 1
+        while in_flight:
+            results = finished.get()
+            in_flight -= 1
+            if isinstance(results, BaseException):
+                raise results
+            for chunk in islice(chunks, 1):
+                self.apply_async(_map_chunk, (func, chunk), callback=finished.put, error_callback=finished.put)
+                in_flight += 1
+            yield from results
+
+    def apply_async(self, func: Callable, args: Tuple = (), callback=None, error_callback=None):
+        """Equivalent of multiprocessing.Pool.apply_async (waits while processes tasks of the phase are running)"""
+        self._slots.acquire()
+
+        def done(value):
+            self._slots.release()
+            if callback is not None:
+                callback(value)
+
+        def failed(error):
+            self._slots.release()
+            if error_callback is not None:
+                error_callback(error)
+
+        return self.pool.apply_async(_run_session_task, ((self.job, self._filename, func, args),), callback=done, error_callback=failed)
+
+
+def _map_chunk(func: Callable, chunk: list) -> list:
+    return [func(arg) for arg in chunk]
+
+
+class SharedArray:
+    """Handle to a numpy array that is stored in a memory-mapped temporary file
+    
+    When the handle is sent to a worker process, only the file path is pickled. Workers
+    map the file into memory (copy-on-write), so that all processes share the same physical
+    copy of the data instead of holding one unpickled copy each.
+    
+    Args:
+        array (numpy.ndarray):
+            The array that should be shared.
+        path (str):
+            The path of the file in which the array is stored.
+    """
+
+    def __init__(self, array: ndarray, path: str):
+        save(path, array, allow_pickle=False)
+        self.path = path
+
+    def load(self) -> ndarray:
+        """Map the array into the memory of the current process"""
+        return load(self.path, mmap_mode='c')
+
+
+class SharedSparse:
+    """Handle to a sparse CSR or CSC matrix whose data, indices and index pointers are shared
+    
+    Args:
+        matrix (scipy.sparse matrix):
+            The matrix that should be shared. Other formats than CSR and CSC are converted to CSR.
+        path (str):
+            Path prefix for the files in which the arrays are stored.
+    """
+
+    def __init__(self, matrix, path: str):
+        if matrix.format not in ['csr', 'csc']:
+            matrix = matrix.tocsr()
+        self.format = matrix.format
+        self.shape = matrix.shape
+        self.data = SharedArray(matrix.data, path + '_data.npy')
+        self.indices = SharedArray(matrix.indices, path + '_indices.npy')
+        self.indptr = SharedArray(matrix.indptr, path + '_indptr.npy')
+
+    def load(self):
+        """Construct the sparse matrix on top of the memory-mapped arrays"""
+        arrays = (self.data.load(), self.indices.load(), self.indptr.load())
+        if self.format == 'csc':
+            return sparse.csc_matrix(arrays, shape=self.shape, copy=False)
+        return sparse.csr_matrix(arrays, shape=self.shape, copy=False)
+
+
+def share(obj, dirname: str):
+    """Replace sparse matrices and large numpy arrays in obj by handles to memory-mapped files
+    
+    Tuples and lists are searched recursively. All other objects are returned unchanged.
+    
+    Args:
+        obj:
+            An object, e.g., the initargs of a worker initializer.
+        dirname (str):
+            Directory in which the files are created. The caller is responsible for its removal.
+            
+    Returns:
+        A copy of obj in which matrices and arrays are replaced by SharedSparse and SharedArray handles.
+    """
+    if sparse.issparse(obj):
+        descriptor, path = mkstemp(dir=dirname)
+        os.close(descriptor)
+        return SharedSparse(obj, path)
+    elif isinstance(obj, ndarray) and obj.dtype != object and obj.nbytes >= SHARED_MIN_BYTES:
+        descriptor, path = mkstemp(suffix='.npy', dir=dirname)
+        os.close(descriptor)
+        return SharedArray(obj, path)
+    elif isinstance(obj, (tuple, list)):
+        return type(obj)(share(o, dirname) for o in obj)
+    return obj
+
+
+def unshare(obj):
+    """Replace all SharedSparse and SharedArray handles in obj by the memory-mapped matrices and arrays"""
+    if isinstance(obj, (SharedArray, SharedSparse)):
+        return obj.load()
+    elif isinstance(obj, (tuple, list)):
+        return type(obj)(unshare(o) for o in obj)
+    return obj
+
+
+def _init_shared_worker(initializer: Callable, initargs: Tuple) -> None:
+    """Attach to the shared initialization arguments and call the initializer"""
+    initializer(*unshare(initargs))
+
+
+def parallel_session(processes: Optional[int] = None) -> ParallelSession:
+    """Open a session with a persistent process pool for all parallel computations
+    
+    Inside the session, FVAs, the bounding of strain design MILPs and other parallel
+    computations reuse the same worker processes instead of spawning new ones every time.
+    
+    Example:
+        with parallel_session(processes=8):
+            flux_ranges = fva(model)
+            sols = compute_strain_designs(model, sd_modules=modules)
+    
+    Args:
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of worker processes.
+            
+    Returns:
+        (ParallelSession):
+            A context manager that keeps the worker processes alive until it is left.
+    """
+    return ParallelSession(processes)
+
+
+def get_processes(processes: Optional[int] = None) -> int:
+    """Determine the number of processes for a parallel computation
+    
+    A number specified for the individual call takes precedence over the number of processes
+    of an active parallel session, which in turn takes precedence over cobra.Configuration().processes.
+    
+    Args:
+        processes (optional (int)): (Default: None)
+            Number of processes requested for the individual call.
+            
+    Returns:
+        (int):
+            The number of processes.
+    """
+    if processes is not None:
+        return processes
+    if _session is not None:
+        return _session.processes
+    return Configuration().processes
+
+
+def run_on_solver_thread(func: Callable, *args):
+    """Run a function on the solver thread of the current process
+    
+    Some solvers (GLPK) do not allow that a problem is used from another thread than the one
+    that created it. Each process therefore owns a single-threaded executor. A problem that is
+    built and solved only through this function is pinned to this thread and can be kept alive
+    (e.g. with its basis) across all tasks that a pool worker receives.
+    
+    Args:
+        func (function):
+            The function to be called.
+        *args:
+            Arguments of the function.
+            
+    Returns:
+        The return value of func(*args).
+    """
+    global _solver_thread
+    # a forked process does not inherit the thread of its parent
+    if _solver_thread is None or _solver_thread[0] != os.getpid():
+        _solver_thread = (os.getpid(), ThreadPoolExecutor(max_workers=1))
+    return _solver_thread[1].submit(func, *args).result()
+
+
+def _init_thread_worker(initializer: Optional[Callable], initargs: Tuple) -> None:
+    _thread_worker.active = True
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def in_thread_worker() -> bool:
+    """Return True, if called on a worker thread of a thread pool (see parallel_pool)
+    
+    Worker threads share sys.stdout and sys.stderr with all other threads of the process. Output
+    can therefore not be redirected on worker threads without affecting the other threads.
+    """
+    return getattr(_thread_worker, 'active', False)
+
+
+@contextmanager
+def suppress_output():
+    """Redirect stdout and stderr of a worker to an empty stream (except on worker threads, see in_thread_worker)"""
+    if in_thread_worker():
+        yield
+    else:
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            yield
+
+
+@contextmanager
+def parallel_pool(processes: int, initializer: Optional[Callable] = None, initargs: Tuple = (), threads: bool = False):
+    """Provide a process pool for a parallel computation
+    
+    Inside a parallel session, up to processes workers of the session are used at the same time.
+    Otherwise, a new SDPool is spawned and closed afterwards. Sparse matrices and large arrays
+    in initargs are not pickled but passed to the workers through memory-mapped files, so that
+    all workers share one copy of the data.
+    
+    With threads=True, a thread pool is used instead. Nothing is spawned or pickled and all workers
+    share the (read-only) initargs. The initializer runs on each worker thread, so that worker state
+    must be kept in thread-local storage (threading.local). Threads only run in parallel while the
+    solver releases the global interpreter lock (CPLEX, Gurobi).
+    
+    Args:
+        processes (int):
+            Number of processes (or threads).
+        initializer (optional (function)), initargs (optional (tuple)):
+            Function and arguments that initialize the workers.
+        threads (optional (bool)): (Default: False)
+            Use worker threads instead of worker processes.
+    """
+    if threads:
+        with ThreadPool(processes, initializer=_init_thread_worker, initargs=(initializer, initargs)) as pool:
+            yield pool
+        return
+    shared_dir = None
+    if initializer is not None:
+        shared_dir = mkdtemp(prefix='straindesign_')
+        initializer, initargs = _init_shared_worker, (initializer, share(initargs, shared_dir))
+    try:
+        if _session is not None and _session.pool is not None:
+            with _session.phase(initializer, initargs, processes) as pool:
+                yield pool
+        else:
+            with SDPool(processes, initializer=initializer, initargs=initargs) as pool:
+                yield pool
+    finally:
+        if shared_dir is not None:
+            rmtree(shared_dir, ignore_errors=True)
@@ -28,6 +28,14 @@ import time as t
 import logging
 
 
+def row_entries(A) -> List[List[Tuple[int, float]]]:
+    """Lists of (column, value) pairs of the nonzero entries in each row of a sparse matrix"""
+    A = sparse.csr_matrix(A)
+    A.sum_duplicates()
+    indptr, indices, data = A.indptr.tolist(), A.indices.tolist(), A.data.tolist()
+    return [list(zip(indices[indptr[i]:indptr[i + 1]], data[indptr[i]:indptr[i + 1]])) for i in range(A.shape[0])]
+
+
 class SCIP_MILP(pso.Model):
     """SCIP interface for MILP
     
@@ -119,19 +127,9 @@ class SCIP_MILP(pso.Model):
 
         self.constr = []
         # add inequality constraints
-        ineqs = [self.addCons(pso.Expr() <= b_i) for b_i in b_ineq]
-        for row, a_ineq in zip(ineqs, A_ineq):
-            X = [x[i] for i in a_ineq.indices]
-            for col, coeff in zip(X, a_ineq.data):
-                self.addConsCoeff(row, col, coeff)
-        self.constr += ineqs
+        self.constr += [self.addCons(e <= b_i) for e, b_i in zip(self.row_exprs(A_ineq), b_ineq)]
         # add equality constraints
-        eqs = [self.addCons(pso.Expr() == b_i) for b_i in b_eq]
-        for row, a_eq in zip(eqs, A_eq):
-            X = [x[i] for i in a_eq.indices]
-            for col, coeff in zip(X, a_eq.data):
-                self.addConsCoeff(row, col, coeff)
-        self.constr += eqs
+        self.constr += [self.addCons(e == b_i) for e, b_i in zip(self.row_exprs(A_eq), b_eq)]
 
         self.setMinimize()
         # add indicator constraints
@@ -150,11 +148,9 @@ class SCIP_MILP(pso.Model):
                 else:
                     A = indic_constr.A[i]
                     b = [indic_constr.b[i]]
-                for k in range(A.shape[0]):
-                    for a in A[k]:
-                        e = pso.scip.Expr({self.trms[j]: d for j, d in zip(a.indices, a.data)})
-                        f = pso.scip.ExprCons(e, lhs=None, rhs=b[k])
-                        self.constr += [self.addConsIndicator(f, binvar=z, initial=False)]
+                for e, b_k in zip(self.row_exprs(A), b):
+                    f = pso.scip.ExprCons(e, lhs=None, rhs=b_k)
+                    self.constr += [self.addConsIndicator(f, binvar=z, initial=False)]
 
         # set parameters
         self.max_tlim = self.getParam('limits/time')
@@ -348,12 +344,7 @@ class SCIP_MILP(pso.Model):
                 The right hand side vector
         """
         self.freeTransform()
-        ineqs = [self.addCons(pso.Expr() <= b_i) for b_i in b_ineq]
-        for row, a_ineq in zip(ineqs, A_ineq):
-            X = [self.vars[i] for i in a_ineq.indices]
-            for col, coeff in zip(X, a_ineq.data):
-                self.addConsCoeff(row, col, float(coeff))
-        self.constr += ineqs
+        self.constr += [self.addCons(e <= float(b_i)) for e, b_i in zip(self.row_exprs(A_ineq), b_ineq)]
 
     def add_eq_constraints(self, A_eq, b_eq):
         """Add equality constraints to the model
@@ -370,12 +361,7 @@ class SCIP_MILP(pso.Model):
                 The right hand side vector
         """
         self.freeTransform()
-        eqs = [self.addCons(pso.Expr() == b_i) for b_i in b_eq]
-        for row, a_eq in zip(eqs, A_eq):
-            X = [self.vars[i] for i in a_eq.indices]
-            for col, coeff in zip(X, a_eq.data):
-                self.addConsCoeff(row, col, float(coeff))
-        self.constr += eqs
+        self.constr += [self.addCons(e == float(b_i)) for e, b_i in zip(self.row_exprs(A_eq), b_eq)]
 
     def set_ineq_constraint(self, idx, a_ineq, b_ineq):
         """Replace a specific inequality constraint
@@ -397,15 +383,34 @@ class SCIP_MILP(pso.Model):
         # changing old constraints would be better but doesn't work
         self.chgRhs(self.constr[idx], None)
         # add new constraint and replace constraint pointer in list
-        self.constr[idx] = self.addCons(pso.Expr() <= 0)
-        for i, a in enumerate(a_ineq):
-            self.addConsCoeff(self.constr[idx], self.vars[i], a)
+        self.constr[idx] = self.addCons(self.row_exprs(sparse.csr_matrix(a_ineq))[0] <= 0)
         if isinf(b_ineq):
             self.chgRhs(self.constr[idx], None)
         else:
             self.chgRhs(self.constr[idx], b_ineq)
         pass
 
+    def get_basis(self) -> Tuple[List, List]:
+        """The simplex basis of the LP relaxation is not accessible for SCIP MILPs"""
+        return None
+
+    def set_basis(self, var_stat, constr_stat):
+        """Starting bases are not supported for SCIP MILPs. The basis is ignored."""
+        pass
+
+    def set_mip_start(self, x):
+        """Add the integer part of a solution vector as a partial solution that is completed by SCIP"""
+        self.freeTransform()
+        sol = self.createPartialSol()
+        for var, v in zip(self.vars, x):
+            if var.vtype() != 'CONTINUOUS':
+                self.setSolVal(sol, var, float(v))
+        self.addSol(sol)
+
+    def row_exprs(self, A) -> List:
+        """Linear expressions of the rows of a sparse matrix (constructed row-wise for fast problem construction)"""
+        return [pso.Expr({self.trms[j]: v for j, v in row}) for row in row_entries(A)]
+
     def getSolution(self) -> list:
         """Retrieve solution from SCIP backend"""
         return [self.getVal(x) for x in self.vars]
@@ -492,13 +497,12 @@ class SCIP_LP(pso.LP):
         # add variables and constraints
         self.addCols([()] * len(c), objs=c, lbs=lb, ubs=ub)
         # add inequality constraints
-        self.addRows([[(i,v) for i,v in zip(rows.indices,rows.data)] for rows in A_ineq], \
-                     lhss = [-self.infinity()]*A_ineq.shape[0],\
-                     rhss = b_ineq)
+        rows = row_entries(A_ineq)
+        self.addRows(rows, lhss=[-self.infinity()] * A_ineq.shape[0], rhss=b_ineq)
+        # remember the nonzero columns of inequalities, so that they can be replaced efficiently
+        self.ineq_cols = [{i for i, _ in row} for row in rows]
         # add equality constraints
-        self.addRows([[(i,v) for i,v in zip(rows.indices,rows.data)] for rows in A_eq], \
-                     lhss = b_eq,\
-                     rhss = b_eq)
+        self.addRows(row_entries(A_eq), lhss=b_eq, rhss=b_eq)
         self.optimize = super().solve
 
     def solve(self) -> Tuple[List, float, float]:
@@ -580,9 +584,7 @@ class SCIP_LP(pso.LP):
             b_ineq (list of float):
                 The right hand side vector
         """
-        self.addRows([[(i,v) for i,v in zip(rows.indices,rows.data)] for rows in A_ineq], \
-                        lhss = [-self.infinity()]*A_ineq.shape[0],\
-                        rhss = b_ineq)
+        self.addRows(row_entries(A_ineq), lhss=[-self.infinity()] * A_ineq.shape[0], rhss=b_ineq)
 
     def add_eq_constraints(self, A_eq, b_eq):
         """Add equality constraints to the model
@@ -598,6 +600,45 @@ class SCIP_LP(pso.LP):
             b_eq (list of float):
                 The right hand side vector
         """
-        self.addRows([[(i,v) for i,v in zip(rows.indices,rows.data)] for rows in A_eq], \
-                        lhss = b_eq,\
-                        rhss = b_eq)
+        self.addRows(row_entries(A_eq), lhss=b_eq, rhss=b_eq)
+
+    def set_ineq_constraint(self, idx, a_ineq, b_ineq):
+        """Replace a specific inequality constraint
+        
+        Replace the constraint with the index idx with the constraint a_ineq*x ~ b_ineq
+        
+        Args:
+            idx (int):
+                Index of the constraint
+                
+            a_ineq (list of float):
+                The coefficient vector
+                
+            b_ineq (float):
+                The right hand side value
+        """
+        cols = {i for i, a in enumerate(a_ineq) if a}
+        for i in self.ineq_cols[idx] - cols:
+            self.chgCoef(idx, i, 0.0)
+        for i in cols:
+            self.chgCoef(idx, i, float(a_ineq[i]))
+        self.ineq_cols[idx] = cols
+        self.chgSide(idx, -self.infinity(), b_ineq if not isinf(b_ineq) else self.infinity())
+
+    def get_basis(self) -> Tuple[List, List]:
+        """Retrieve the simplex basis from SoPlex"""
+        stat_map = {0: AT_LOWER, 1: BASIC, 2: AT_UPPER, 3: FREE}
+        try:
+            var_stat, constr_stat = self.getBase()
+        except:
+            return None
+        return [stat_map[v] for v in var_stat], [stat_map[v] for v in constr_stat]
+
+    def set_basis(self, var_stat, constr_stat):
+        """Set a starting basis for the next simplex solve"""
+        stat_map = {AT_LOWER: 0, BASIC: 1, AT_UPPER: 2, FREE: 3}
+        self.setBase([stat_map[v] for v in var_stat], [stat_map[v] for v in constr_stat])
+
+    def set_mip_start(self, x):
+        """MIP starts do not apply to LPs. The start is ignored."""
+        pass
@@ -18,7 +18,7 @@
 #
 """Unified solver interface for LPs and MILPs (MILP_LP)"""
 
-from numpy import inf, isinf, isnan, unique
+from numpy import inf, isinf, isnan, unique, cumsum, concatenate, isin, full
 from scipy import sparse
 from typing import List, Tuple
 from straindesign import avail_solvers
@@ -26,6 +26,59 @@ from straindesign.names import *
 import logging
 
 
+class RowBuffer(object):
+    """Append-friendly row store of a sparse matrix
+    
+    Stores the rows of a constraint matrix in a list of blocks. Appending rows and replacing single
+    rows only records the change (amortized O(1)). The blocks and replaced rows are assembled into
+    one CSR matrix (in a single COO-to-CSR conversion) only when the matrix is accessed. As long as
+    the matrix consists of one unchanged block, this block is returned as it was stored, so that
+    modifications of the returned matrix persist.
+    
+    Example:
+        buffer = RowBuffer(sparse.csr_matrix((0, 10)))
+        buffer.append(A)
+        buffer.replace(0, a)
+        A_full = buffer.matrix()
+    
+    Args:
+        A (sparse matrix):
+            The initial matrix.
+    """
+
+    def __init__(self, A):
+        self.blocks = [A]
+        self.replaced = {}
+        self.shape = A.shape
+
+    def append(self, A):
+        """Append the rows of a sparse matrix"""
+        self.blocks.append(A)
+        self.shape = (self.shape[0] + A.shape[0], self.shape[1])
+
+    def replace(self, idx, a):
+        """Replace the row idx with a sparse row vector"""
+        self.replaced[idx] = a
+
+    def matrix(self):
+        """Return the assembled matrix (CSR format, if it has been changed)"""
+        if len(self.blocks) > 1 or self.replaced:
+            blocks = [sparse.coo_matrix(A) for A in self.blocks]
+            offsets = cumsum([0] + [A.shape[0] for A in blocks[:-1]])
+            rows = concatenate([A.row + o for A, o in zip(blocks, offsets)])
+            cols = concatenate([A.col for A in blocks])
+            data = concatenate([A.data for A in blocks])
+            if self.replaced:
+                keep = ~isin(rows, list(self.replaced))
+                new = [(i, sparse.coo_matrix(a)) for i, a in self.replaced.items()]
+                rows = concatenate([rows[keep]] + [full(a.nnz, i) for i, a in new])
+                cols = concatenate([cols[keep]] + [a.col for _, a in new])
+                data = concatenate([data[keep]] + [a.data for _, a in new])
+            self.blocks = [sparse.csr_matrix((data, (rows, cols)), shape=self.shape)]
+            self.replaced = {}
+        return self.blocks[0]
+
+
 class MILP_LP(object):
     """Unified MILP and LP interface
     
@@ -84,7 +137,7 @@ class MILP_LP(object):
             is provided, 1000 is used.
             
         solver (str): (Default: taken from avail_solvers)
-            Solver backend that should be used: 'cplex', 'gurobi', 'glpk' or 'scip'
+            Solver backend that should be used: 'cplex', 'gurobi', 'glpk', 'scip' or 'highs'
 
         skip_checks (bool): (Default: False)
             Upon MILP construction, the dimensions of all provided vectors and matrices
@@ -118,7 +171,7 @@ class MILP_LP(object):
                 self.solver = avail_solvers[0]
             else:
                 raise Exception('No solver available. Please ensure that one of the following '\
-                    'solvers is avaialable in your Python environment: CPLEX, Gurobi, SCIP, GLPK')
+                    'solvers is avaialable in your Python environment: CPLEX, Gurobi, SCIP, GLPK, HiGHS')
         elif self.solver not in avail_solvers:
             raise Exception("Selected solver '" + self.solver + "' is not installed / set up correctly.")
         # Copy parameters to object
@@ -136,15 +189,15 @@ class MILP_LP(object):
         if self.b_ineq is None:
             self.b_ineq = []
         # Remove unbounded constraints
-        if self.A_eq == None:
+        if self.A_eq is None:
             self.A_eq = sparse.csr_matrix((0, numvars))
-        if self.b_eq == None:
+        if self.b_eq is None:
             self.b_eq = []
-        if self.lb == None:
+        if self.lb is None:
             self.lb = [-inf] * numvars
-        if self.ub == None:
+        if self.ub is None:
             self.ub = [inf] * numvars
-        if self.vtype == None:
+        if self.vtype is None:
             self.vtype = 'C' * numvars
         # check dimensions
         if not self.skip_checks == True:
@@ -164,8 +217,8 @@ class MILP_LP(object):
                         len(self.indic_constr.sense)==num_ic and len(self.indic_constr.indicval)==num_ic):
                     raise Exception("Check dimensions of indicator constraints.")
         # Cast variables as float
-        self.A_ineq = self.A_ineq.astype(float)
-        self.A_eq = self.A_eq.astype(float)
+        self.A_ineq = self.A_ineq.astype(float, copy=False)
+        self.A_eq = self.A_eq.astype(float, copy=False)
         self.c = [float(v) for v in self.c]
         self.b_ineq = [float(v) for v in self.b_ineq]
         self.b_eq = [float(v) for v in self.b_eq]
@@ -174,9 +227,9 @@ class MILP_LP(object):
         if self.indic_constr:
             self.indic_constr.A = self.indic_constr.A.astype(float)
             self.indic_constr.b = [float(v) for v in self.indic_constr.b]
-        if not self.solver == GLPK and self.M and not (isnan(self.M) or isinf(self.M)) and \
+        if self.solver not in [GLPK, HIGHS] and self.M and not (isnan(self.M) or isinf(self.M)) and \
            self.indic_constr and self.indic_constr.A.shape[0]:
-            logging.warning('Provided big M value is ignored unless glpk is used.')
+            logging.warning('Provided big M value is ignored unless glpk or highs is used.')
         # Create backend
         if self.solver == CPLEX:
             from straindesign.cplex_interface import Cplex_MILP_LP
@@ -199,11 +252,33 @@ class MILP_LP(object):
             from straindesign.glpk_interface import GLPK_MILP_LP
             self.backend = GLPK_MILP_LP(self.c, self.A_ineq, self.b_ineq, self.A_eq, self.b_eq, self.lb, self.ub, self.vtype,
                                         self.indic_constr, self.M)
+        elif self.solver == HIGHS:
+            from straindesign.highs_interface import HiGHS_MILP_LP
+            self.backend = HiGHS_MILP_LP(self.c, self.A_ineq, self.b_ineq, self.A_eq, self.b_eq, self.lb, self.ub, self.vtype,
+                                         self.indic_constr, self.M)
         if self.tlim is None:
             self.set_time_limit(inf)
         else:
             self.set_time_limit(self.tlim)
 
+    @property
+    def A_ineq(self):
+        """The inequality constraint matrix (assembled from its row buffer on access)"""
+        return self._A_ineq.matrix() if self._A_ineq is not None else None
+
+    @A_ineq.setter
+    def A_ineq(self, A):
+        self._A_ineq = RowBuffer(A) if A is not None else None
+
+    @property
+    def A_eq(self):
+        """The equality constraint matrix (assembled from its row buffer on access)"""
+        return self._A_eq.matrix() if self._A_eq is not None else None
+
+    @A_eq.setter
+    def A_eq(self, A):
+        self._A_eq = RowBuffer(A) if A is not None else None
+
     def solve(self) -> Tuple[List, float, float]:
         """Solve the MILP or LP
         
@@ -291,7 +366,7 @@ class MILP_LP(object):
         A_ineq = sparse.csr_matrix(A_ineq)
         A_ineq.eliminate_zeros()
         b_ineq = [float(b) for b in b_ineq]
-        self.A_ineq = sparse.vstack((self.A_ineq, A_ineq))
+        self._A_ineq.append(A_ineq)
         self.b_ineq += b_ineq
         self.backend.add_ineq_constraints(A_ineq, b_ineq)
 
@@ -312,7 +387,7 @@ class MILP_LP(object):
         A_eq = sparse.csr_matrix(A_eq)
         A_eq.eliminate_zeros()
         b_eq = [float(b) for b in b_eq]
-        self.A_eq = sparse.vstack((self.A_eq, A_eq))
+        self._A_eq.append(A_eq)
         self.b_eq += b_eq
         self.backend.add_eq_constraints(A_eq, b_eq)
 
@@ -331,12 +406,115 @@ class MILP_LP(object):
             b_ineq (float):
                 The right hand side value
         """
-        self.A_ineq = self.A_ineq.tolil()
-        self.A_ineq[idx] = sparse.lil_matrix(a_ineq)
-        self.A_ineq = self.A_ineq.tocsr()
+        self._A_ineq.replace(idx, sparse.csr_matrix(a_ineq, dtype=float))
         self.b_ineq[idx] = b_ineq
         self.backend.set_ineq_constraint(idx, a_ineq, b_ineq)
 
+    def get_basis(self) -> Tuple[List, List]:
+        """Return the simplex basis of the last LP solve
+
+        The basis can be passed to set_basis() of another problem with the same variables to warm-start
+        the solution of a related LP, e.g., after bounds, the objective or the right hand sides were changed.
+        The status of each variable and each constraint is one of BASIC, AT_LOWER, AT_UPPER or FREE.
+        The status of a constraint refers to its activity, i.e., an inequality that holds with equality is
+        AT_UPPER. Constraints are ordered as they were added to the problem (starting with the initial
+        inequalities followed by the initial equalities).
+
+        Example:
+            basis = lp.get_basis()
+
+        Returns:
+            (Tuple[List, List]):
+
+            variable_status, constraint_status. None, if no basis is available (e.g., for MILPs or if
+            the solver does not give access to the basis).
+        """
+        return self.backend.get_basis()
+
+    def set_basis(self, basis):
+        """Set a starting basis for the next LP solve
+
+        A basis from get_basis() is adapted to the current problem: Constraints that were added after
+        the basis was retrieved become basic, surplus constraints are dropped and the number of basic
+        variables is corrected if necessary. Solvers that cannot be warm-started ignore the basis.
+
+        Example:
+            lp.set_basis(other_lp.get_basis())
+
+        Args:
+            basis (Tuple[List, List]):
+                The status of all variables and of the constraints (see get_basis()).
+        """
+        if basis is None:
+            return
+        var_stat, constr_stat = basis
+        if len(var_stat) != len(self.c):
+            raise Exception("The basis must contain the status of all " + str(len(self.c)) + " variables.")
+        numrows = len(self.b_ineq) + len(self.b_eq)
+        var_stat = list(var_stat)
+        constr_stat = list(constr_stat[:numrows]) + [BASIC] * (numrows - len(constr_stat))
+        # a valid basis contains as many basic variables and constraints as there are constraints
+        excess = var_stat.count(BASIC) + constr_stat.count(BASIC) - numrows
+        for i in reversed(range(len(var_stat))):
+            if excess <= 0:
+                break
+            if var_stat[i] == BASIC:
+                var_stat[i] = FREE if isinf(self.lb[i]) else AT_LOWER
+                excess -= 1
+        for i in range(numrows):
+            if excess >= 0:
+                break
+            if constr_stat[i] != BASIC:
+                constr_stat[i] = BASIC
+                excess += 1
+        self.backend.set_basis(var_stat, constr_stat)
+
+    def solve_lazy(self, separate) -> Tuple[List, float, float]:
+        """Solve the MILP and check every new incumbent with a function that may reject it with lazy constraints
+
+        Instead of restarting the MILP after each solution, the solution process continues after the rejected
+        candidate has been cut off. The lazy constraints are not added to the constraint matrices of this object.
+        Only supported by CPLEX and Gurobi.
+
+        Example:
+            x, min_cx, status = milp.solve_lazy(lambda x: [(sparse.csr_matrix(x), sum(x) - 1)])
+
+        Args:
+            separate (function):
+                Function separate(x) that receives a candidate solution x and returns a list of cuts (a, b) of
+                a sparse row vector a and a value b that cut off x by a * x <= b, an empty list to accept x as a
+                new incumbent or None to stop the solution process.
+
+        Returns:
+            (Tuple[List, float, float])
+
+            solution_vector, optimal_value, optimization_status
+        """
+        if self.solver not in [CPLEX, GUROBI]:
+            raise Exception("Lazy constraints are only supported by CPLEX and Gurobi.")
+        x, min_cx, status = self.backend.solve_lazy(separate)
+        if status not in [INFEASIBLE, UNBOUNDED, TIME_LIMIT, ERROR]:
+            x = [x[i] if self.vtype[i] == 'C' else int(round(x[i])) for i in range(len(x))]
+        return x, min_cx, status
+
+    def set_mip_start(self, x):
+        """Provide a (feasible) solution as a starting point for the next MILP solve
+
+        Only the values of the integer and binary variables are passed to the solver. The solver completes
+        the continuous part. The start is ignored by solvers without support for MIP starts (GLPK) and for LPs.
+
+        Example:
+            milp.set_mip_start(x)
+
+        Args:
+            x (list of float):
+                A value for each variable.
+        """
+        if len(x) != len(self.c):
+            raise Exception("The MIP start must contain a value for all " + str(len(self.c)) + " variables.")
+        if any(v != 'C' for v in self.vtype) and not any(isnan(x)):
+            self.backend.set_mip_start([x[i] if self.vtype[i] == 'C' else float(round(x[i])) for i in range(len(x))])
+
     def clear_objective(self):
         """Clear objective
         
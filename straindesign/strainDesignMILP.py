@@ -67,7 +67,7 @@ class SDMILP(SDProblem, MILP_LP):
         
         solver (optional (str)): (Default: same as defined in model / COBRApy)
             The solver that should be used for preparing and carrying out the strain design computation.
-            Allowed values are 'cplex', 'gurobi', 'scip' and 'glpk'.
+            Allowed values are 'cplex', 'gurobi', 'scip', 'glpk' and 'highs'.
             
         M (optional (int)): (Default: None)
             If this value is specified (and non-zero, not None), the computation uses the big-M 
@@ -79,6 +79,10 @@ class SDMILP(SDProblem, MILP_LP):
             A set of reactions that are marked as addable and that are essential for at least one of the
             strain design modules. Providing such "essential knock-ins" may speed up the strain design computation.
             
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for bounding the MILP with LPs. Overrides the number of processes
+            of an active parallel session (see parallel_session()).
+            
     Returns:
         (SDMILP):
             An instance of SDProblem containing the strain design MILP and providing several functions for its solution
@@ -100,36 +104,57 @@ class SDMILP(SDProblem, MILP_LP):
                          indic_constr=self.indic_constr,
                          M=self.M,
                          solver=self.solver)
+        # simplex basis of the last valid strain design in verify_sd (refers to the variables and constraints of cont_MILP)
+        self.verify_basis = None
 
     def add_exclusion_constraints(self, z):
         """Exclude binary solution in z and all supersets from MILP"""
         for i in range(z.shape[0]):
-            # introduce constraint to make MILP infeasible. Some solvers cannot handle empty rows
-            if z[i].nnz == 0:
-                A_ineq = sparse.csr_matrix([1.0] * z[i].shape[1])
-                A_ineq.resize((1, self.A_ineq.shape[1]))
-                b_ineq = -1
-                self.add_ineq_constraints(A_ineq, [b_ineq])
-            # otherwise, introduce integer cut constraint
-            elif z[i].nnz == 1:
+            # single interventions are excluded through the variable bounds
+            if z[i].nnz == 1:
                 interv_idx = int(z[i].indices[0])
                 self.z_non_targetable[interv_idx] = True
                 self.set_ub([[interv_idx, 0.0]])
             # otherwise, introduce integer cut constraint
             else:
-                A_ineq = z[i].copy()
-                A_ineq.resize((1, self.A_ineq.shape[1]))
-                b_ineq = np.sum(z[i]) - 1
+                A_ineq, b_ineq = self.exclusion_cut(z[i])
                 self.add_ineq_constraints(A_ineq, [b_ineq])
 
+    def exclusion_cut(self, z) -> Tuple[sparse.csr_matrix, float]:
+        """Integer cut a * x <= b that excludes a binary solution z (one row) and all its supersets"""
+        # the empty solution is excluded with a constraint that makes the MILP infeasible. Some solvers cannot handle empty rows
+        if z.nnz == 0:
+            a = sparse.csr_matrix([1.0] * z.shape[1])
+            b = -1.0
+        else:
+            a = sparse.csr_matrix(z, dtype=float)
+            b = np.sum(z) - 1.0
+        a.resize((1, len(self.c)))
+        return a, float(b)
+
+    def reduce_sd(self, z) -> sparse.csr_matrix:
+        """Remove interventions from a valid binary solution z (one row) as long as it stays valid (irreducibility)"""
+        z = z.toarray()
+        for i in sorted(np.nonzero(z[0])[0], key=lambda i: -self.cost[i]):
+            z_i = z.copy()
+            z_i[0, i] = 0.0
+            if self.verify_sd(sparse.csr_matrix(z_i))[0]:
+                z = z_i
+        return sparse.csr_matrix(z)
+
     def add_exclusion_constraints_ineq(self, z):
         """Exclude binary solution in z (but not its supersets) from MILP"""
         for j in range(z.shape[0]):
-            A_ineq = [1.0 if z[j, i] else -1.0 for i in self.idx_z]
-            A_ineq.resize((1, self.A_ineq.shape[1]))
-            b_ineq = np.sum(z[j]) - 1
+            A_ineq, b_ineq = self.nogood_cut(z[j])
             self.add_ineq_constraints(A_ineq, [b_ineq])
 
+    def nogood_cut(self, z) -> Tuple[sparse.csr_matrix, float]:
+        """Integer cut a * x <= b that excludes exactly the binary solution z (one row), but not its supersets"""
+        z = z.toarray()[0]
+        a = sparse.csr_matrix([1.0 if z[i] else -1.0 for i in self.idx_z])
+        a.resize((1, len(self.c)))
+        return a, float(np.sum(z) - 1.0)
+
     def sd2dict(self, sol, *args) -> Dict:
         """Translate binary solution vector to dictionary for human-readable output"""
         output = {}
@@ -213,7 +238,23 @@ class SDMILP(SDProblem, MILP_LP):
                          lb=[self.cont_MILP.lb[i] for i in active_vars],
                          ub=[self.cont_MILP.ub[i] for i in active_vars],
                          solver=self.solver)
+            # warm-start from the basis of the previously verified strain design
+            num_ineqs = len(self.cont_MILP.b_ineq)
+            if self.verify_basis is not None:
+                var_stat, constr_stat = self.verify_basis
+                lp.set_basis(([var_stat[j] for j in active_vars],
+                              [constr_stat[k] for k in active_ineqs] + [constr_stat[num_ineqs + k] for k in active_eqs]))
             valid[i] = not np.isnan(lp.slim_solve())
+            basis = lp.get_basis() if valid[i] else None
+            if basis is not None:
+                if self.verify_basis is None:
+                    self.verify_basis = ([FREE if np.isinf(l) else AT_LOWER for l in self.cont_MILP.lb],
+                                         [BASIC] * (num_ineqs + len(self.cont_MILP.b_eq)))
+                var_stat, constr_stat = self.verify_basis
+                for j, v in zip(active_vars, basis[0]):
+                    var_stat[j] = v
+                for k, v in zip(active_ineqs + [num_ineqs + k for k in active_eqs], basis[1]):
+                    constr_stat[k] = v
         return valid
 
     def compute_optimal(self, **kwargs):
@@ -265,7 +306,7 @@ class SDMILP(SDProblem, MILP_LP):
             self.resetTargetableZ()
             self.resetObjective()
             self.fixObjective(self.c_bu, np.inf)
-            z, _, opt, status = self.solveZ()
+            z, x, opt, status = self.solveZ()
             if np.isnan(z[0, 0]):
                 break
             output = self.sd2dict(z)
@@ -286,6 +327,7 @@ class SDMILP(SDProblem, MILP_LP):
                 self.fixObjective(self.c_bu, opt)
                 self.setMinIntvCostObjective()
                 self.setTargetableZ(z)
+                self.set_mip_start(x)  # the solution is feasible in the subspace
                 while sols.shape[0] < self.max_solutions and \
                         status == OPTIMAL and \
                         endtime-time.time() > 0:
@@ -381,6 +423,7 @@ class SDMILP(SDProblem, MILP_LP):
                 self.resetObjective()
                 self.setTargetableZ(z)
                 self.fixObjective(self.c_bu, np.sum([c * x for c, x in zip(self.c_bu, x)]))
+                self.set_mip_start(x)
                 z1, _, _, status1 = self.solveZ()
                 if status1 == OPTIMAL and not self.verify_sd(z1):
                     self.add_exclusion_constraints(z1)
@@ -405,6 +448,7 @@ class SDMILP(SDProblem, MILP_LP):
             self.setMinIntvCostObjective()
             self.setTargetableZ(z)
             self.fixObjective(self.c_bu, cx)
+            self.set_mip_start(x)  # the solution is feasible in the subspace
             while sols.shape[0] < self.max_solutions and \
                     status == OPTIMAL and \
                     endtime-time.time() > 0:
@@ -440,6 +484,107 @@ class SDMILP(SDProblem, MILP_LP):
             sd_dict += [self.sd2dict(sol, self.show_no_ki)]
         return self.build_sd_solution(sd_dict, status, ANY)
 
+    # Enumerate MCS in a single MILP solve, in which solutions are verified and excluded through lazy constraints
+    def compute_lazy(self, **kwargs):
+        """Enumerate strain designs in a single MILP solve using lazy constraints (CPLEX and Gurobi)
+        
+        Every new incumbent of the MILP is verified, reduced to an irreducible strain design and cut off together
+        with all its supersets through a lazy constraint. Invalid incumbents are cut off without their supersets. In contrast to compute_optimal, the MILP is not solved
+        again from scratch after each solution, but the solver continues with the same branch-and-bound tree until
+        no further solutions exist. If all solutions are enumerated, the results are the same as with compute_optimal.
+        This approach is only available for MCS computations with CPLEX or Gurobi. Otherwise, compute_optimal is used.
+        
+        Args:
+            max_solutions (optional (int)): (Default: inf)
+                The maximum number of MILP solutions that are generated for a strain design problem.
+                
+            time_limit (optional (int)): (Default: inf)
+                The time limit in seconds for the MILP-solver.
+                
+            show_no_ki (optional (bool)): (Default: True)
+                Indicate non-added addition candidates in a solution specifically with a value of 0
+                
+        Returns:
+            (SDSolutions):
+            Strain design solutions provided as an SDSolutions object
+        """
+        if self.solver not in [CPLEX, GUROBI] or not self.is_mcs_computation:
+            logging.warning('Lazy enumeration is only available for MCS computations with CPLEX or Gurobi. ' \
+                  'Computing optimal strain designs instead.')
+            return self.compute_optimal(**kwargs)
+        keys = {MAX_SOLUTIONS, T_LIMIT, 'show_no_ki'}
+        # set keys passed in kwargs
+        for key, value in kwargs.items():
+            if key in keys:
+                setattr(self, key, value)
+        # set all remaining keys to None
+        for key in keys:
+            if key not in kwargs.keys():
+                setattr(self, key, None)
+        if self.max_solutions is None:
+            self.max_solutions = np.inf
+        if self.time_limit is None:
+            self.time_limit = np.inf
+        if self.show_no_ki is None:
+            self.show_no_ki = True
+        # first check if strain doesn't already fulfill the strain design setup
+        if self.verify_sd(sparse.csr_matrix((1, self.num_z)))[0]:
+            logging.warning('The strain already meets the requirements defined in the strain design setup. ' \
+                  'No interventions are needed.')
+            return self.build_sd_solution([{}], OPTIMAL, LAZY)
+        endtime = time.time() + self.time_limit
+        found = {}
+        logging.info('Enumerating strain designs with lazy constraints ...')
+
+        def separate(x):
+            z = sparse.csr_matrix([round(x[i], 5) for i in self.idx_z])
+            if self.verify_sd(z)[0]:
+                z = self.reduce_sd(z)
+                if tuple(z.indices) not in found:
+                    logging.info('Strain design with cost ' + str(round((z * self.cost)[0], 6)) + ': ' + str(self.sd2dict(z)))
+                    found[tuple(z.indices)] = z
+                cut = self.exclusion_cut(z)
+            else:
+                logging.info('Invalid (minimal) solution found: ' + str(self.sd2dict(z)))
+                # supersets of an invalid solution may still be valid strain designs
+                cut = self.nogood_cut(z)
+            if len(found) >= self.max_solutions:
+                return None
+            return [cut]
+
+        self.set_time_limit(self.time_limit)
+        self.resetTargetableZ()
+        self.resetObjective()
+        self.fixObjective(self.c_bu, np.inf)
+        _, _, status = self.solve_lazy(separate)
+        # keep only irreducible solutions (a solution may have been found before one of its subsets)
+        sols = [z for k, z in found.items() if not any(set(l) < set(k) for l in found)]
+        sols = sorted(sols, key=lambda z: (z * self.cost)[0])
+        if sols:
+            sols = sparse.vstack(sols)
+            self.add_exclusion_constraints(sols)
+        else:
+            sols = sparse.csr_matrix((0, self.num_z))
+        if (status == INFEASIBLE and sols.shape[0] > 0) or sols.shape[0] >= self.max_solutions:  # all or enough solutions found
+            status = OPTIMAL
+        if status == TIME_LIMIT and sols.shape[0] > 0:  # some solutions found, timelimit reached
+            status = TIME_LIMIT_W_SOL
+        if endtime - time.time() > 0 and sols.shape[0] > 0:
+            logging.info('Finished solving strain design MILP. ')
+            if 'strainDesignMILP' in self.__module__:
+                logging.info(str(sols.shape[0]) + ' solutions to MILP found.')
+        elif endtime - time.time() > 0:
+            logging.info('Finished solving strain design MILP.')
+            if 'strainDesignMILP' in self.__module__:
+                logging.info(' No solutions exist.')
+        else:
+            logging.info('Time limit reached.')
+        # Translate solutions into dict
+        sd_dict = []
+        for sol in sols:
+            sd_dict += [self.sd2dict(sol, self.show_no_ki)]
+        return self.build_sd_solution(sd_dict, status, LAZY)
+
     # Enumerate iteratively optimal strain designs using the populate function
     # output format: list of 'dict' (default) or 'sparse'
     def enumerate(self, **kwargs):
@@ -485,8 +630,8 @@ class SDMILP(SDProblem, MILP_LP):
                 "An high-level implementation of populate is used. " + \
                 "Consider using compute_optimal instead of enumerate, as " + \
                 "it returns the same results but faster.")
-        if self.solver == 'glpk':
-            warn("GLPK does not natively support solution pool generation. "+ \
+        if self.solver in ['glpk', 'highs']:
+            warn(self.solver.upper() + " does not natively support solution pool generation. "+ \
                 "An instable high-level implementation of populate is used. "
                 "Consider using compute_optimal instead of enumerate, as " + \
                 "it returns the same results but faster." )
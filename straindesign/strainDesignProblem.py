@@ -29,11 +29,12 @@ edit matrices for improved speed and memory."""
 
 import numpy as np
 from scipy import sparse
-from cobra.util import create_stoichiometric_matrix
 from cobra import Model, Configuration
 from typing import List, Tuple
-from straindesign import SDModule, IndicatorConstraints, lineqlist2mat, linexprdict2mat, MILP_LP, SDPool, \
-                         avail_solvers, select_solver, remove_dummy_bounds, SDModule
+from straindesign import SDModule, IndicatorConstraints, lineqlist2mat, linexprdict2mat, MILP_LP, parallel_pool, \
+                         get_processes, run_on_solver_thread, in_thread_worker, solve_on_threads, avail_solvers, select_solver, \
+                         remove_dummy_bounds, SDModule, get_stoichiometry
+from threading import local
 from straindesign.names import *
 import logging
 
@@ -73,7 +74,7 @@ class SDProblem:
             
         solver (optional (str)): (Default: same as defined in model / COBRApy)
             The solver that should be used for preparing and carrying out the strain design computation.
-            Allowed values are 'cplex', 'gurobi', 'scip' and 'glpk'.
+            Allowed values are 'cplex', 'gurobi', 'scip', 'glpk' and 'highs'.
             
         M (optional (int)): (Default: None)
             If this value is specified (and non-zero, not None), the computation uses the big-M 
@@ -85,13 +86,18 @@ class SDProblem:
             A set of reactions that are marked as addable and that are essential for at least one of the
             strain design modules. Providing such "essential knock-ins" may speed up the strain design computation.
             
+        processes (optional (int)): (Default: cobra.Configuration().processes)
+            Number of processes used for bounding the MILP with LPs. Overrides the number of processes
+            of an active parallel session (see parallel_session()). With CPLEX and Gurobi, threads are
+            used instead of processes.
+            
     Returns:
         (SDProblem):
             An instance of SDProblem containing the strain design MILP
     """
 
     def __init__(self, model: Model, sd_modules: List[SDModule], *args, **kwargs):
-        allowed_keys = {KOCOST, KICOST, SOLVER, MAX_COST, 'M', 'essential_kis'}
+        allowed_keys = {KOCOST, KICOST, SOLVER, MAX_COST, 'M', 'essential_kis', PROCESSES}
         # set all keys passed in kwargs
         for key, value in dict(kwargs).items():
             if key in allowed_keys:
@@ -111,13 +117,13 @@ class SDProblem:
                 self.solver = avail_solvers[0]
             else:
                 raise Exception('No solver available. Please ensure that one of the following '\
-                    'solvers is avaialable in your Python environment: CPLEX, Gurobi, SCIP, GLPK')
+                    'solvers is avaialable in your Python environment: CPLEX, Gurobi, SCIP, GLPK, HiGHS')
         self.solver = select_solver(self.solver, model)
         cobra_conf = Configuration()
         bound_thres = max((abs(cobra_conf.lower_bound), abs(cobra_conf.upper_bound)))
-        if self.M is None and self.solver == 'glpk':
+        if self.M is None and self.solver in [GLPK, HIGHS]:
             logging.warning(
-                'GLPK only supports strain design computation with the bigM method. Using cobra bound: '+str(bound_thres)+\
+                self.solver.upper() + ' only supports strain design computation with the bigM method. Using cobra bound: '+str(bound_thres)+\
                 ' as M.')
             self.M = bound_thres
         elif self.M is None:
@@ -479,11 +485,11 @@ class SDProblem:
         # M_A(i)*x + z*M <= b + M
         # b is the right hand side value
         M_A = self.A_ineq[[True if i in knockable_constr_ineq else False for i in range(0, self.A_ineq.shape[0])], :][:, cont_vars]
-        M_A = [(-M_A[i, :])[0].toarray()[0] for i in range(len(knockable_constr_ineq))]
+        M_A = -M_A.tocsr()
         M_b = [self.b_ineq[i] for i in range(0, self.A_ineq.shape[0]) if i in knockable_constr_ineq]
 
-        processes = Configuration().processes
-        num_Ms = len(M_A)
+        processes = get_processes(self.processes)
+        num_Ms = M_A.shape[0]
         processes = min(processes, num_Ms)
 
         max_Ax = [np.nan] * num_Ms
@@ -494,8 +500,13 @@ class SDProblem:
 
         logging.info('  Bounding MILP.')
         if processes > 1 and num_Ms > 1000:
-            with SDPool(processes, initializer=worker_init,
-                        initargs=(M_A, M_A_ineq, M_b_ineq, M_A_eq, M_b_eq, M_lb, M_ub, self.solver)) as pool:
+            # matrices and bound vectors are passed to worker processes through shared memory-mapped files
+            # and shared with worker threads (CPLEX, Gurobi)
+            with parallel_pool(processes,
+                               initializer=worker_init,
+                               initargs=(M_A, M_A_ineq, np.array(M_b_ineq, dtype=float), M_A_eq, np.array(M_b_eq, dtype=float),
+                                         np.array(M_lb, dtype=float), np.array(M_ub, dtype=float), self.solver),
+                               threads=solve_on_threads(self.solver)) as pool:
                 chunk_size = num_Ms // processes
                 for i, value in pool.imap_unordered(worker_compute, range(num_Ms), chunksize=chunk_size):
                     max_Ax[i] = value
@@ -667,14 +678,12 @@ def build_primal_from_cbm(model, V_ineq=None, v_ineq=None, V_eq=None, v_eq=None,
         v_eq = []
     if c is None:
         c = [i.objective_coefficient for i in model.reactions]
-    S = sparse.csr_matrix(create_stoichiometric_matrix(model))
+    S, lb, ub, _ = get_stoichiometry(model)
     # fill matrices
     A_eq = sparse.vstack((S, V_eq))
     b_eq = [0 for _ in range(S.shape[0])] + v_eq
     A_ineq = V_ineq.copy()
     b_ineq = v_ineq.copy()
-    lb = [v.lower_bound for v in model.reactions]
-    ub = [v.upper_bound for v in model.reactions]
     z_map_vars = sparse.identity(numr, 'd', format="csc")
     z_map_constr_eq = sparse.csc_matrix((numr, A_eq.shape[0]))
     z_map_constr_ineq = sparse.csc_matrix((numr, A_ineq.shape[0]))
@@ -1026,21 +1035,40 @@ def prevent_boundary_knockouts(A_ineq, b_ineq, lb, ub, z_map_constr_ineq, z_map_
     return A_ineq, b_ineq, lb, ub, z_map_constr_ineq
 
 
+bound_glob = local()  # LP of a worker that bounds linear expressions, separate for each worker thread
+
+
 def worker_init(A, A_ineq, b_ineq, A_eq, b_eq, lb, ub, solver):
     """Helper function for determining bounds on linear expressions"""
-    global lp_glob
-    lp_glob = MILP_LP(A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, solver=solver)
-    if lp_glob == CPLEX:
-        lp_glob.backend.parameters.lpmethod.set(1)
-        if Configuration().processes > 1:
-            lp_glob.backend.parameters.threads.set(2)
-    lp_glob.solver = solver
-    lp_glob.A = A
+
+    def build():
+        lp = MILP_LP(A_ineq=A_ineq, b_ineq=b_ineq, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, solver=solver)
+        if lp == CPLEX:
+            lp.backend.parameters.lpmethod.set(1)
+            if get_processes() > 1:
+                lp.backend.parameters.threads.set(2)
+        if solver == CPLEX and in_thread_worker():
+            lp.backend.parameters.threads.set(1)  # the worker threads already solve in parallel
+        lp.solver = solver
+        lp.A = A
+        return lp
+
+    # GLPK problems are pinned to the thread that created them
+    if solver == GLPK:
+        bound_glob.lp = run_on_solver_thread(build)
+    else:
+        bound_glob.lp = build()
 
 
 def worker_compute(i) -> Tuple[int, float]:
     """Helper function for determining bounds on linear expressions"""
-    global lp_glob
-    lp_glob.set_objective(lp_glob.A[i])
-    min_cx = -lp_glob.slim_solve()
-    return i, min_cx
+    lp = bound_glob.lp
+
+    def compute():
+        lp.set_objective(lp.A[[i], :].toarray()[0])
+        min_cx = -lp.slim_solve()
+        return i, min_cx
+
+    if lp.solver == GLPK:
+        return run_on_solver_thread(compute)
+    return compute()
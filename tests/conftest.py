@@ -6,13 +6,13 @@ cobra_conf = Configuration()
 bound_thres = max((abs(cobra_conf.lower_bound), abs(cobra_conf.upper_bound)))
 
 
-@pytest.fixture(params=[CPLEX, GUROBI, SCIP, GLPK], scope="session")
+@pytest.fixture(params=[CPLEX, GUROBI, SCIP, GLPK, HIGHS], scope="session")
 def curr_solver(request: pytest.FixtureRequest) -> str:
     """Provide session-level fixture for parametrized solver names."""
     return request.param
 
 
-@pytest.fixture(params=[ANY, BEST, POPULATE], scope="session")
+@pytest.fixture(params=[ANY, BEST, POPULATE, LAZY], scope="session")
 def comp_approach(request: pytest.FixtureRequest) -> str:
     """Provide session-level fixture for computation modes."""
     return request.param
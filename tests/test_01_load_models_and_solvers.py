@@ -2,6 +2,7 @@
 from os.path import dirname, abspath
 from cobra.io import read_sbml_model
 from cobra import Configuration
+from scipy import sparse
 import straindesign as sd
 from straindesign.names import *
 import pytest
@@ -40,6 +41,38 @@ def test_solver_loading(curr_solver):
     assert (milp.solve() == ([], 0.0, OPTIMAL))
 
 
+def test_incremental_constraints(curr_solver):
+    """Test that added and replaced constraints are reflected in the matrices and the solution."""
+    milp = sd.MILP_LP(c=[-1.0, -1.0], A_ineq=sparse.csr_matrix([[1.0, 0.0]]), b_ineq=[3.0], ub=[10.0, 10.0], solver=curr_solver)
+    for k in range(5):
+        milp.add_ineq_constraints(sparse.csr_matrix([[0.0, 1.0]]), [float(10 - k)])
+    milp.add_eq_constraints(sparse.csr_matrix([[1.0, -1.0]]), [0.0])
+    milp.set_ineq_constraint(0, [2.0, 0.0], 4.0)
+    assert (milp.A_ineq.toarray().tolist() == [[2.0, 0.0]] + [[0.0, 1.0]] * 5)
+    assert (milp.A_eq.toarray().tolist() == [[1.0, -1.0]])
+    x, opt, status = milp.solve()
+    assert (status == OPTIMAL and abs(opt + 4.0) < 1e-9)
+
+
+def test_basis_transfer(curr_solver):
+    """Test warm start of an extended LP with the basis of a related LP and MIP starts."""
+    A_ineq = sparse.csr_matrix([[1.0, 1.0], [1.0, -1.0]])
+    lp = sd.MILP_LP(c=[-1.0, -0.5], A_ineq=A_ineq, b_ineq=[1.0, 5.0], lb=[0.0, -10.0], ub=[0.7, 10.0], solver=curr_solver)
+    lp.solve()
+    basis = lp.get_basis()
+    lp2 = sd.MILP_LP(c=[-1.0, -0.5], A_ineq=A_ineq, b_ineq=[1.0, 5.0], lb=[0.0, -10.0], ub=[0.7, 10.0], solver=curr_solver)
+    lp2.add_ineq_constraints(sparse.csr_matrix([[1.0, 0.0]]), [0.5])
+    lp2.set_basis(basis)
+    x, opt, status = lp2.solve()
+    assert (status == OPTIMAL and abs(opt + 0.75) < 1e-9)
+    if basis is not None:
+        assert (len(basis[0]) == 2 and len(basis[1]) == 2 and basis[1][0] == AT_UPPER)
+    milp = sd.MILP_LP(c=[-1.0, -1.0], A_ineq=sparse.csr_matrix([[2.0, 2.0]]), b_ineq=[3.0], ub=[1.0, 1.0], vtype='BC', solver=curr_solver)
+    milp.set_mip_start([1.0, 0.5])
+    x, opt, status = milp.solve()
+    assert (status == OPTIMAL and abs(opt + 1.5) < 1e-9)
+
+
 def test_load_solvers(model_small_example):
     """Test solver choice."""
 
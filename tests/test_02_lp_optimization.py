@@ -1,7 +1,16 @@
 """Test if basic lp-functions finish correctly (FBA, FVA, yield optimization)."""
 from .test_01_load_models_and_solvers import *
 import straindesign as sd
-from numpy import inf, isinf, isnan
+from cobra.io import load_model
+from cobra.util import create_stoichiometric_matrix
+from scipy import sparse
+from pickle import dumps, loads
+from tempfile import TemporaryDirectory
+from threading import get_ident
+from multiprocessing.pool import ThreadPool
+from random import Random
+from time import sleep, time
+from numpy import inf, isinf, isnan, nan, array
 
 
 def test_fba(curr_solver, model_gpr):
@@ -41,6 +50,112 @@ def test_fva_infeasible(curr_solver, model_gpr):
     assert (isnan(sol.values[1, 1]))
 
 
+def test_fva_step_order(curr_solver):
+    """Test FVA steps in shuffled order on one warm-started LP (GLPK may declare feasible LPs infeasible)."""
+    model = load_model('textbook')
+    numr = len(model.reactions)
+    S = sparse.csr_matrix(create_stoichiometric_matrix(model))
+    sol = sd.fva(model, solver=curr_solver)
+    lp = sd.MILP_LP(A_eq=S,
+                    b_eq=[0] * S.shape[0],
+                    lb=[r.lower_bound for r in model.reactions],
+                    ub=[r.upper_bound for r in model.reactions],
+                    solver=curr_solver)
+    steps = list(range(2 * numr))
+    Random(4).shuffle(steps)
+    for i in steps:
+        c = [0.0] * numr
+        c[i // 2] = -1.0 if i % 2 == 0 else 1.0
+        lp.set_objective(c)
+        opt = -sol.maximum.values[i // 2] if i % 2 == 0 else sol.minimum.values[i // 2]
+        assert (abs(lp.slim_solve() - opt) < 1e-6)
+
+
+def test_cplex_time_limit():
+    """Test that a CPLEX LP that hits the time limit before finding a solution reports no solution."""
+    model = load_model('textbook')
+    S = sparse.csr_matrix(create_stoichiometric_matrix(model))
+    lp = sd.MILP_LP(c=[-r.objective_coefficient for r in model.reactions],
+                    A_eq=S,
+                    b_eq=[0] * S.shape[0],
+                    lb=[r.lower_bound for r in model.reactions],
+                    ub=[r.upper_bound for r in model.reactions],
+                    solver=CPLEX)
+    lp.set_time_limit(0)
+    x, opt, status = lp.solve()
+    assert (status in [OPTIMAL, TIME_LIMIT])
+    if status == TIME_LIMIT:
+        assert (isnan(opt) and all(isnan(x)))
+        assert (isnan(lp.slim_solve()))
+
+
+def test_highs_indicator_bigM():
+    """Test that HiGHS translates indicator constraints into big-M rows, with equalities split into two rows."""
+    # z = 0 -> x <= 2 and z = 1 -> y - x = -3
+    indic_constr = sd.IndicatorConstraints([2, 2], sparse.csr_matrix([[1.0, 0.0, 0.0], [-1.0, 1.0, 0.0]]), [2.0, -3.0], 'LE', [0, 1])
+    milp = sd.MILP_LP(c=[-1.0, -1.0, 4.0],
+                      A_ineq=sparse.csr_matrix((0, 3)),
+                      b_ineq=[],
+                      lb=[0.0, 0.0, 0.0],
+                      ub=[10.0, 10.0, 1.0],
+                      vtype='CCB',
+                      indic_constr=indic_constr,
+                      M=100.0,
+                      solver=HIGHS)
+    assert (milp.backend.highs.getNumRow() == 3)
+    x, opt, status = milp.solve()
+    assert (status == OPTIMAL and abs(opt + 13.0) < 1e-9)
+    assert (all(abs(array(x) - [10.0, 7.0, 1.0]) < 1e-9))
+
+
+def test_highs_basis_added_rows():
+    """Test that HiGHS accepts the basis of an LP for the same LP with additional rows, which become basic."""
+    A_ineq = sparse.csr_matrix([[1.0, 1.0], [1.0, -1.0]])
+    lp = sd.MILP_LP(c=[-1.0, -0.5], A_ineq=A_ineq, b_ineq=[1.0, 5.0], lb=[0.0, -10.0], ub=[0.7, 10.0], solver=HIGHS)
+    lp.solve()
+    var_stat, constr_stat = lp.get_basis()
+    lp2 = sd.MILP_LP(c=[-1.0, -0.5], A_ineq=A_ineq, b_ineq=[1.0, 5.0], lb=[0.0, -10.0], ub=[0.7, 10.0], solver=HIGHS)
+    lp2.add_ineq_constraints(sparse.csr_matrix([[1.0, 0.0]]), [0.5])
+    lp2.set_basis((var_stat, constr_stat))
+    assert (lp2.get_basis() == (var_stat, constr_stat + [BASIC]))
+    x, opt, status = lp2.solve()
+    assert (status == OPTIMAL and abs(opt + 0.75) < 1e-9)
+
+
+def test_highs_populate_time_limit():
+    """Test that a HiGHS solution pool that hits the time limit keeps its solutions and removes its auxiliary rows."""
+    n = 20
+    milp = sd.MILP_LP(c=[0.0] * n, A_ineq=sparse.csr_matrix([[1.0] * n]), b_ineq=[n], ub=[1.0] * n, vtype='B' * n, solver=HIGHS)
+    milp.set_time_limit(0.5)
+    sols, opt, status = milp.populate(inf)
+    assert (status == TIME_LIMIT_W_SOL and opt == 0.0)
+    assert (0 < len(sols) < 2**n and len(set(tuple(x) for x in sols)) == len(sols))
+    assert (milp.backend.highs.getNumRow() == 1)
+
+
+def test_highs_time_limit():
+    """Test that a HiGHS MILP that hits the time limit before finding a solution reports no solution."""
+    model = load_model('textbook')
+    S = sparse.csr_matrix(create_stoichiometric_matrix(model))
+    numr = S.shape[1]
+    # flux vectors with indicators for active reactions
+    milp = sd.MILP_LP(c=[-r.objective_coefficient for r in model.reactions] + [0.0] * numr,
+                      A_ineq=sparse.hstack((sparse.eye(numr), -1000 * sparse.eye(numr))),
+                      b_ineq=[0] * numr,
+                      A_eq=sparse.hstack((S, sparse.csr_matrix(S.shape))),
+                      b_eq=[0] * S.shape[0],
+                      lb=[r.lower_bound for r in model.reactions] + [0] * numr,
+                      ub=[r.upper_bound for r in model.reactions] + [1] * numr,
+                      vtype='C' * numr + 'B' * numr,
+                      solver=HIGHS)
+    milp.set_time_limit(0)
+    x, opt, status = milp.solve()
+    assert (status == TIME_LIMIT and isnan(opt) and all(isnan(x)))
+    assert (isnan(milp.slim_solve()))
+    sols, opt, status = milp.populate(3)
+    assert (status == TIME_LIMIT and not sols)
+
+
 def test_fva_unbounded(curr_solver, model_small_example):
     """Test FVA that is partially unbounded."""
     for r in model_small_example.reactions:
@@ -54,6 +169,189 @@ def test_fva_unbounded(curr_solver, model_small_example):
     assert (isinf(sol.values[1, 1]))
 
 
+def test_fva_prune(curr_solver, model_small_example):
+    """Test FVA with solution-vector pruning against regular FVA."""
+    for r in model_small_example.reactions:
+        if r.name in ['R2', 'R3', 'R9']:
+            if r._lower_bound < 0:
+                r._lower_bound = -inf
+            if r._upper_bound > 0:
+                r._upper_bound = inf
+    sol = sd.fva(model_small_example, solver=curr_solver, constraints=['R5 = 1.5'])
+    sol_prune = sd.fva(model_small_example, solver=curr_solver, constraints=['R5 = 1.5'], prune=True)
+    assert (sol.shape == sol_prune.shape)
+    assert (all(isinf(sol.values.flatten()) == isinf(sol_prune.values.flatten())))
+    assert (all(abs(sol.values[~isinf(sol.values)] - sol_prune.values[~isinf(sol.values)]) < 1e-7))
+
+
+def test_fva_batch(curr_solver, model_gpr):
+    """Test multi-scenario FVA against single FVAs."""
+    scenarios = [['r3 <= 3', 'r5 = 1.5'], 'r3 <= -3', '']
+    sols = sd.fva_batch(model_gpr, scenarios, solver=curr_solver)
+    assert (len(sols) == 3)
+    assert (all(isnan(sols[1].values.flatten())))
+    for constr, sol in zip(scenarios, sols):
+        if constr != 'r3 <= -3':
+            sol_single = sd.fva(model_gpr, solver=curr_solver, constraints=constr)
+            assert (all(abs(sol.values.flatten() - sol_single.values.flatten()) < 1e-7))
+
+
+def test_iter_fva(curr_solver, model_gpr):
+    """Test streaming FVA on a subset of reactions and stopping it early."""
+    sol = sd.fva(model_gpr, solver=curr_solver, constraints='r3 <= 3')
+    reacs = ['r3', 'r5', 'r_bm']
+    limits = {r: (lb, ub) for r, lb, ub in sd.iter_fva(model_gpr, reactions=reacs, solver=curr_solver, constraints='r3 <= 3')}
+    assert (set(limits.keys()) == set(reacs))
+    assert (all(abs(sol.minimum[r] - lb) < 1e-7 and abs(sol.maximum[r] - ub) < 1e-7 for r, (lb, ub) in limits.items()))
+    for r, lb, ub in sd.iter_fva(model_gpr, solver=curr_solver):
+        break
+    assert (r in model_gpr.reactions)
+
+
+def test_essential_reactions(curr_solver, model_small_example):
+    """Test identification of essential reactions against FVA."""
+    for constr in ['', 'R5 = 1.5', 'R5 <= -1']:
+        sol = sd.fva(model_small_example, solver=curr_solver, constraints=constr)
+        essential = set(r for r, l in sol.iterrows() if min(abs(l)) > 1e-10 and l.minimum * l.maximum > 0)
+        assert (sd.find_essential_reactions(model_small_example, constraints=constr, solver=curr_solver) == essential)
+
+
+def test_parallel_session(model_gpr):
+    """Test two parallel phases on the persistent workers of a parallel session."""
+    numr = len(model_gpr.reactions)
+    S = sparse.csr_matrix(create_stoichiometric_matrix(model_gpr))
+    lb = [r.lower_bound for r in model_gpr.reactions]
+    ub = [r.upper_bound for r in model_gpr.reactions]
+    sol = sd.fva(model_gpr, solver=sd.GLPK)
+    with sd.parallel_session(processes=2) as session:
+        assert (sd.get_processes() == 2)
+        assert (sd.get_processes(1) == 1)
+        for _ in range(2):
+            x = [nan] * 2 * numr
+            with sd.parallel_pool(2, initializer=sd.fva_worker_init,
+                                  initargs=(sparse.csr_matrix((0, numr)), [], S, [0] * S.shape[0], lb, ub, sd.GLPK)) as pool:
+                assert (isinstance(pool, sd.SessionPhase))
+                for i, value in pool.imap_unordered(sd.fva_worker_compute, range(2 * numr)):
+                    x[i] = value
+            assert (all(abs(array(x[1::2]) - sol.minimum.values) < 1e-7))
+            assert (all(abs(-array(x[0::2]) - sol.maximum.values) < 1e-7))
+        # a phase with fewer processes than the session never runs two tasks at the same time
+        with sd.parallel_pool(1) as pool:
+            intervals = sorted(pool.imap_unordered(timed_task, range(6)))
+        assert (all(end <= start for (_, end), (start, _) in zip(intervals, intervals[1:])))
+    assert (session.pool is None)
+
+
+def timed_task(_):
+    """Task for the parallel session test that returns its start and end time."""
+    start = time()
+    sleep(0.05)
+    return start, time()
+
+
+def test_glpk_solver_thread(model_gpr):
+    """Test parallel FVA with GLPK problems that are pinned to the solver thread of each worker."""
+    thread = sd.run_on_solver_thread(get_ident)
+    assert (thread != get_ident() and sd.run_on_solver_thread(get_ident) == thread)
+    scenarios = ['r3 <= ' + str(k) for k in range(30)]
+    sols = sd.fva_batch(model_gpr, scenarios, solver=sd.GLPK, processes=1)
+    sols_parallel = sd.fva_batch(model_gpr, scenarios, solver=sd.GLPK, processes=2)
+    for sol, sol_parallel in zip(sols, sols_parallel):
+        assert (all(abs(sol.values.flatten() - sol_parallel.values.flatten()) < 1e-7))
+
+
+def test_thread_pool(curr_solver, model_gpr):
+    """Test parallel FVA on worker threads that each own a copy of the LP."""
+    numr = len(model_gpr.reactions)
+    S = sparse.csr_matrix(create_stoichiometric_matrix(model_gpr))
+    lb = [r.lower_bound for r in model_gpr.reactions]
+    ub = [r.upper_bound for r in model_gpr.reactions]
+    sol = sd.fva(model_gpr, solver=curr_solver, processes=1)
+    x = [nan] * 2 * numr
+    with sd.parallel_pool(2, initializer=sd.fva_worker_init, initargs=(sparse.csr_matrix((0, numr)), [], S, [0] * S.shape[0], lb, ub, curr_solver),
+                          threads=True) as pool:
+        assert (isinstance(pool, ThreadPool))
+        for i, value in pool.imap_unordered(sd.fva_worker_compute, range(2 * numr)):
+            x[i] = value
+    assert (all(abs(array(x[1::2]) - sol.minimum.values) < 1e-7))
+    assert (all(abs(-array(x[0::2]) - sol.maximum.values) < 1e-7))
+    if sd.solve_on_threads(curr_solver):
+        scenarios = ['r3 <= ' + str(k) for k in range(30)]
+        sols = sd.fva_batch(model_gpr, scenarios, solver=curr_solver, processes=1)
+        sols_parallel = sd.fva_batch(model_gpr, scenarios, solver=curr_solver, processes=2)
+        for sol, sol_parallel in zip(sols, sols_parallel):
+            assert (all(abs(sol.values.flatten() - sol_parallel.values.flatten()) < 1e-7))
+
+
+def test_shared_initargs(model_gpr):
+    """Test passing LP matrices and bounds through memory-mapped files."""
+    S = sparse.csr_matrix(create_stoichiometric_matrix(model_gpr))
+    lb = array([r.lower_bound for r in model_gpr.reactions] * 1000)
+    with TemporaryDirectory() as dirname:
+        initargs = sd.share((S, S.tocsc(), [lb, 'glpk']), dirname)
+        assert (isinstance(initargs[0], sd.SharedSparse))
+        assert (isinstance(initargs[2][0], sd.SharedArray))
+        S_1, S_2, [lb_1, solver] = sd.unshare(loads(dumps(initargs)))
+        assert ((S_1 != S).nnz == 0 and (S_2 != S).nnz == 0)
+        assert (S_2.format == 'csc')
+        assert (all(lb_1 == lb) and solver == 'glpk')
+        del S_1, S_2, lb_1
+
+
+def test_result_cache(curr_solver, model_weak_coupling):
+    """Test storing and retrieving FVA, FBA and yield optimization results in the on-disk cache."""
+    constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
+    with TemporaryDirectory() as dirname:
+        sd.enable_cache(dirname + '/cache.sqlite')
+        try:
+            sols_y = []
+            for _ in range(2):
+                flux_ranges = sd.fva(model_weak_coupling, solver=curr_solver, constraints=constr)
+                sol = sd.fba(model_weak_coupling, solver=curr_solver, constraints=constr, obj='r_P', obj_sense='max')
+                sol_y = sd.yopt(model_weak_coupling, solver=curr_solver, constraints=constr, obj_num='r_P', obj_den='r_S')
+                sols_y += [sol_y]
+            assert (sd.cache_stats()['hits'] == 3 and sd.cache_stats()['misses'] == 3)
+            assert (sols_y[1].scalable == sols_y[0].scalable)
+            sd.disable_cache()
+            assert (sd.cache_stats() is None)
+            assert (all((flux_ranges == sd.fva(model_weak_coupling, solver=curr_solver, constraints=constr)).values.flatten()))
+            sol_new = sd.fba(model_weak_coupling, solver=curr_solver, constraints=constr, obj='r_P', obj_sense='max')
+            assert (sol.objective_value == sol_new.objective_value and dict(sol.fluxes) == dict(sol_new.fluxes))
+            assert (round(sol_y.objective_value, 9) == 0.6)
+            # least recently used results are evicted
+            cache = sd.enable_cache(dirname + '/cache.sqlite')
+            cache.max_bytes = cache.stats()['bytes']
+            model_weak_coupling.reactions.get_by_id('r_S').upper_bound = 5
+            sd.fva(model_weak_coupling, solver=curr_solver, constraints=constr)
+            assert (cache.stats()['misses'] == 1 and cache.stats()['bytes'] <= cache.max_bytes)
+            sd.fva(model_weak_coupling, solver=curr_solver, constraints=constr)
+            assert (cache.stats()['hits'] == 1)
+        finally:
+            sd.disable_cache()
+
+
+def test_stoichiometry_cache(model_small_example):
+    """Test that the cached stoichiometric matrix is reused and invalidated on model changes."""
+    S, lb, ub, reaction_ids = sd.get_stoichiometry(model_small_example)
+    assert ((S != sparse.csr_matrix(create_stoichiometric_matrix(model_small_example))).nnz == 0)
+    # modifying an LP that was built from the returned matrix leaves the cached matrix unchanged
+    lp = sd.MILP_LP(A_eq=S, b_eq=[0] * S.shape[0], lb=lb, ub=ub, solver=sd.GLPK)
+    lp.A_eq.data[:] = 0.0
+    S = sd.get_stoichiometry(model_small_example)[0]
+    assert ((S != sparse.csr_matrix(create_stoichiometric_matrix(model_small_example))).nnz == 0)
+    version = sd.model_version(model_small_example)
+    model_small_example.reactions.get_by_id('R4').upper_bound = 7
+    _, _, ub, _ = sd.get_stoichiometry(model_small_example)
+    assert (sd.model_version(model_small_example) == version and ub[reaction_ids.index('R4')] == 7)
+    model_small_example.reactions.get_by_id('R4').add_metabolites({model_small_example.metabolites[0]: 2.0})
+    assert ((sd.get_stoichiometry(model_small_example)[0] != S).nnz == 1)
+    model_small_example.reactions.get_by_id('R4')._metabolites[model_small_example.metabolites[0]] += 1.0
+    sd.invalidate_stoichiometry(model_small_example)
+    assert (sd.get_stoichiometry(model_small_example)[0][0, reaction_ids.index('R4')] == S[0, reaction_ids.index('R4')] + 3.0)
+    model_small_example.remove_reactions(['R4'])
+    assert (sd.get_stoichiometry(model_small_example)[0].shape == (S.shape[0], S.shape[1] - 1))
+
+
 def test_yield_opt(curr_solver, model_weak_coupling):
     """Test yield optimization."""
     constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
@@ -65,6 +363,21 @@ def test_yield_opt(curr_solver, model_weak_coupling):
     assert (round(sol.objective_value, 9) == 0.2)
 
 
+def test_yield_opt_batch(curr_solver, model_weak_coupling):
+    """Test yield optimization for several numerators with a common denominator."""
+    constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
+    nums = ['r_P', 'r_BM', {'r_P': 2}]
+    for sense in ['max', 'min']:
+        yields = sd.yopt_batch(model_weak_coupling, nums, 'r_S', obj_sense=sense, solver=curr_solver, constraints=constr)
+        assert (list(yields.index) == ['r_P', 'r_BM', '2 r_P'])
+        for num, y, scalable in zip(nums, yields['yield'], yields['scalable']):
+            sol = sd.yopt(model_weak_coupling, obj_num=num, obj_den='r_S', obj_sense=sense, solver=curr_solver, constraints=constr)
+            assert (round(sol.objective_value, 9) == round(y, 9))
+            assert (sol.scalable == scalable)
+    yields = sd.yopt_batch(model_weak_coupling, nums, 'r_S', solver=curr_solver, constraints='r_S = 0')
+    assert (all(yields['status'] == sd.INFEASIBLE))
+
+
 def test_yield_opt_unbounded(curr_solver, model_small_example):
     """Test yield optimization that is unbounded."""
     num = 'R4'
@@ -80,3 +393,37 @@ def test_yield_opt_infeasible(curr_solver, model_small_example):
     den = 'R1'
     sol = sd.yopt(model_small_example, obj_num=num, obj_den=den, constraints=constr, solver=curr_solver)
     assert (sol.status == sd.INFEASIBLE)
+
+
+def test_flux_problem(curr_solver, model_weak_coupling):
+    """Test repeated FBA, pFBA and yield optimization on a prepared FluxProblem."""
+    problem = sd.FluxProblem(model_weak_coupling, solver=curr_solver)
+    for constr in [['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4'], 'r_BM >= 4', 'r_S <= -20']:
+        problem.push_constraints(constr)
+        sol = problem.fba()
+        ref = sd.fba(model_weak_coupling, solver=curr_solver, constraints=constr)
+        assert (sol.status == ref.status)
+        if ref.status == sd.OPTIMAL:
+            assert (round(sol.objective_value, 9) == round(ref.objective_value, 9))
+            sol = problem.pfba()
+            ref = sd.fba(model_weak_coupling, solver=curr_solver, constraints=constr, pfba=1)
+            assert (round(sum(abs(v) for v in sol.fluxes.values()), 6) == round(sum(abs(v) for v in ref.fluxes.values()), 6))
+            sol = problem.yopt('r_P', 'r_S', 'min')
+            ref = sd.yopt(model_weak_coupling, obj_num='r_P', obj_den='r_S', obj_sense='min', solver=curr_solver, constraints=constr)
+            assert (round(sol.objective_value, 9) == round(ref.objective_value, 9))
+        problem.pop_constraints()
+    assert (not problem.constraints)
+    # move a fixed value without popping and pushing the constraint
+    problem.push_constraints([[{'r_BM': 1.0}, '=', 0.0]])
+    for v in [1.0, 2.0]:
+        problem.replace_constraints([[{'r_BM': 1.0}, '=', v]])
+        sol = problem.yopt('r_P', 'r_S', 'min')
+        constr = 'r_BM = ' + str(v)
+        ref = sd.yopt(model_weak_coupling, obj_num='r_P', obj_den='r_S', obj_sense='min', solver=curr_solver, constraints=constr)
+        assert (round(sol.objective_value, 9) == round(ref.objective_value, 9))
+    # prepare the problem from the stoichiometric matrix and the bounds only
+    S, lb, ub, reaction_ids = sd.get_stoichiometry(model_weak_coupling)
+    problem = sd.FluxProblem.from_matrices(S, lb, ub, reaction_ids, solver=curr_solver, constraints='r_BM >= 4')
+    sol = problem.fba(obj='r_P', obj_sense='max')
+    ref = sd.fba(model_weak_coupling, obj='r_P', obj_sense='max', solver=curr_solver, constraints='r_BM >= 4')
+    assert (round(sol.objective_value, 9) == round(ref.objective_value, 9))
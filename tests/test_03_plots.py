@@ -1,6 +1,9 @@
 """Test if basic plotting functions finish correctly (flux space, yield space, mixed 3d-space)."""
 from .test_01_load_models_and_solvers import *
 import straindesign as sd
+from numpy import interp, array, cross
+import subprocess
+import sys
 
 
 def test_plot_2d_flux_space(curr_solver, model_weak_coupling):
@@ -19,3 +22,118 @@ def test_plot_3d_space(curr_solver, model_weak_coupling):
     """Test plot with constraints."""
     constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
     sd.plot_flux_space(model_weak_coupling, (('r_P', 'r_S'), 'r_BM', 'r_Q'), constraints=constr, solver=curr_solver, plt_backend='template')
+
+
+def test_plot_2d_envelope_values(curr_solver, model_weak_coupling):
+    """Test that the envelope points are the optimal values of the second axis."""
+    constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
+    datapoints, triang, _ = sd.plot_flux_space(model_weak_coupling, ('r_P', 'r_S'),
+                                               constraints=constr,
+                                               solver=curr_solver,
+                                               points=5,
+                                               plt_backend='template',
+                                               show=False)
+    assert (len(datapoints) == 10)
+    for x, y in datapoints[:5]:
+        sol = sd.fba(model_weak_coupling, obj='r_S', obj_sense='min', constraints=constr + ['r_P = ' + str(x)], solver=curr_solver)
+        assert (abs(sol.objective_value - y) < 1e-6)
+    for x, y in datapoints[5:]:
+        sol = sd.fba(model_weak_coupling, obj='r_S', obj_sense='max', constraints=constr + ['r_P = ' + str(x)], solver=curr_solver)
+        assert (abs(sol.objective_value - y) < 1e-6)
+
+
+def test_plot_2d_adaptive(curr_solver, model_weak_coupling):
+    """Test that adaptive sampling returns the vertices of the envelope."""
+    constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
+    dense, _, _ = sd.plot_flux_space(model_weak_coupling, ('r_P', 'r_S'), constraints=constr, solver=curr_solver, plt_backend='template', show=False)
+    vertices, _, _ = sd.plot_flux_space(model_weak_coupling, ('r_P', 'r_S'),
+                                        constraints=constr,
+                                        solver=curr_solver,
+                                        adaptive=True,
+                                        plt_backend='template',
+                                        show=False)
+    assert (len(vertices) < len(dense))
+    n, m = len(dense) // 2, len(vertices) // 2
+    x = [d[0] for d in vertices[:m]]
+    for d in dense[:n]:
+        assert (abs(interp(d[0], x, [v[1] for v in vertices[:m]]) - d[1]) < 1e-6)
+    for d in dense[n:]:
+        assert (abs(interp(d[0], x, [v[1] for v in vertices[m:]]) - d[1]) < 1e-6)
+    # a fixed flux on the x-axis reduces each envelope to a single point
+    fixed, _, _ = sd.plot_flux_space(model_weak_coupling, ('r_P', 'r_S'),
+                                     constraints=constr + ['r_P = 3'],
+                                     solver=curr_solver,
+                                     adaptive=True,
+                                     plt_backend='template',
+                                     show=False)
+    assert (len(fixed) == 2 and all(abs(d[0] - 3.0) < 1e-9 for d in fixed))
+
+
+def test_project_flux_space(curr_solver, model_weak_coupling):
+    """Test that the exact projection is supported by the optima of the single axes."""
+    constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
+    axes = ('r_P', 'r_S', 'r_Q')
+    vertices, faces = sd.project_flux_space(model_weak_coupling, axes, constraints=constr, solver=curr_solver)
+    assert (all(len(f) == 3 for f in faces))
+    for i, r in enumerate(axes):
+        for sense, extreme in [('max', max), ('min', min)]:
+            sol = sd.fba(model_weak_coupling, obj=r, obj_sense=sense, constraints=constr, solver=curr_solver)
+            assert (abs(extreme(v[i] for v in vertices) - sol.objective_value) < 1e-6)
+
+
+def test_plot_exact(curr_solver, model_weak_coupling):
+    """Test plots of the exact projection of flux and yield spaces."""
+    constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
+    dense, _, _ = sd.plot_flux_space(model_weak_coupling, ('r_P', 'r_S'), constraints=constr, solver=curr_solver, plt_backend='template', show=False)
+    exact, _, _ = sd.plot_flux_space(model_weak_coupling, ('r_P', 'r_S'),
+                                     constraints=constr,
+                                     solver=curr_solver,
+                                     exact=True,
+                                     plt_backend='template',
+                                     show=False)
+    n, m = len(dense) // 2, len(exact) // 2
+    x = [d[0] for d in exact[:m]]
+    for d in dense[:n]:
+        assert (abs(interp(d[0], x, [v[1] for v in exact[:m]]) - d[1]) < 1e-6)
+    for d in dense[n:]:
+        assert (abs(interp(d[0], x, [v[1] for v in exact[m:]]) - d[1]) < 1e-6)
+    sd.plot_flux_space(model_weak_coupling, (('r_P', 'r_S'), ('r_Q', 'r_S'), ('r_BM', 'r_S')),
+                       constraints=constr,
+                       solver=curr_solver,
+                       exact=True,
+                       plt_backend='template',
+                       show=False)
+
+
+def test_compute_flux_space(curr_solver, model_weak_coupling):
+    """Test that the headless computation returns the datapoints of the plot."""
+    constr = ['r4 = 0', 'r7 = 0', 'r9 = 0', 'r_BM >= 4']
+    axes = (('r_P', 'r_S'), 'r_BM', 'r_Q')
+    points, triangles = sd.compute_flux_space(model_weak_coupling, axes, constraints=constr, solver=curr_solver, points=10)
+    datapoints, triang, _ = sd.plot_flux_space(model_weak_coupling, axes, constraints=constr, solver=curr_solver, points=10, plt_backend='template', show=False)
+    assert (points.shape == (len(datapoints), 3))
+    assert (triangles.shape == (len(triang), 3))
+    assert (abs(points - array(datapoints)).max() < 1e-6)
+
+
+def test_import_without_matplotlib():
+    """Test that matplotlib is only imported for plotting."""
+    code = 'import sys, straindesign; assert "matplotlib.pyplot" not in sys.modules'
+    assert (subprocess.run([sys.executable, '-c', code]).returncode == 0)
+
+
+def test_flux_space_mesh():
+    """Test that the mesh of a sampled 3D grid encloses the volume of the grid with outward triangles."""
+    datapoints, top, bottom = [], [], []
+    for x, y_space in [(0.0, [0.0, 0.5, 1.0]), (1.0, [0.0, 1.0]), (2.0, [0.5])]:
+        top += [[]]
+        bottom += [[]]
+        for y in y_space:
+            top[-1] += [len(datapoints)]
+            datapoints += [array([x, y, 1.0])]
+            bottom[-1] += [len(datapoints)]
+            datapoints += [array([x, y, 0.0])]
+    triang = sd.flux_space_mesh(datapoints, top, bottom)
+    p = array(datapoints)[array(triang)]
+    volume = (p[:, 0] * cross(p[:, 1], p[:, 2])).sum() / 6
+    assert (abs(volume - 1.5) < 1e-9)
@@ -36,3 +36,17 @@ def test_gpr_extension_compression2(model_gpr):
     assert (len(model_gpr.reactions) == 40)
     sd.compress_model(model_gpr, set(('g5', 'g9')))
     assert (len(model_gpr.reactions) == 18)
+
+
+def test_bound_blocked_or_irrevers(curr_solver, model_gpr):
+    """Test if the LP engine for bound tightening matches the FVA engine."""
+    model_gpr.reactions.get_by_id('r3').upper_bound = 3.0
+    for dummy in [False, True]:
+        model_fva = model_gpr.copy()
+        model_lp = model_gpr.copy()
+        if dummy:
+            sd.networktools.remove_dummy_bounds(model_fva)
+            sd.networktools.remove_dummy_bounds(model_lp)
+        sd.networktools.bound_blocked_or_irrevers_fva(model_fva, solver=curr_solver, engine='fva')
+        sd.networktools.bound_blocked_or_irrevers_fva(model_lp, solver=curr_solver)
+        assert ([r.bounds for r in model_fva.reactions] == [r.bounds for r in model_lp.reactions])
@@ -1,7 +1,7 @@
 """Test if all strain design functions run correctly."""
 from .test_01_load_models_and_solvers import *
 import straindesign as sd
-from numpy import inf
+from numpy import inf, nan, zeros
 
 
 def test_mcs(curr_solver, model_small_example, comp_approach, bigM, compression):
@@ -58,6 +58,35 @@ def test_mcs_opt(curr_solver, model_weak_coupling, comp_approach, bigM, compress
     assert (len(solution.reaction_sd) == 3)
 
 
+def test_mcs_lazy_invalid_incumbent(model_small_example):
+    """Test that lazy enumeration keeps the valid supersets of an invalid incumbent."""
+    modules = [sd.SDModule(model_small_example, SUPPRESS, constraints=["R3 - 0.5 R1 <= 0.0", "R2 <= 0", "R1 >= 0.1"])]
+    modules += [
+        sd.SDModule(model_small_example, SUPPRESS, constraints=["1.0 R3 - 0.5 R1 - 0.5 R2 <= 0.0 ", "1.0 R2 >= 0.0 ", "1.0 R1 >= 0.1 "])
+    ]
+    modules += [sd.SDModule(model_small_example, PROTECT, constraints=["1.0 R3 >= 1.0 "])]
+    sd_milp = sd.SDMILP(model_small_example, modules, solver=CPLEX)
+    reac_ids = model_small_example.reactions.list_attr('id')
+    # treat the cut set {R2, R4} as invalid, like a MILP incumbent that fails verification for numerical reasons
+    invalid = {reac_ids.index('R2'), reac_ids.index('R4')}
+    verify_sd = sd_milp.verify_sd
+    sd_milp.verify_sd = lambda sols: [v and set(z.indices) != invalid for v, z in zip(verify_sd(sols), sols)]
+
+    def solve_lazy(separate):
+        # offer the invalid incumbent and then its superset, unless a lazy constraint excludes it
+        cuts = []
+        for interv in [['R2', 'R4'], ['R2', 'R4', 'R5']]:
+            x = zeros(len(sd_milp.c))
+            x[[reac_ids.index(r) for r in interv]] = 1.0
+            if all(a.dot(x)[0] <= b for a, b in cuts):
+                cuts += separate(x)
+        return x, nan, INFEASIBLE
+
+    sd_milp.solve_lazy = solve_lazy
+    sols = sd_milp.compute_lazy().get_reaction_sd()
+    assert ({'R2': -1.0, 'R4': -1.0, 'R5': -1.0} in sols)
+
+
 def test_mcs_gpr(model_gpr, comp_approach):
     """Test MCS computation with gpr rules."""
     modules = [sd.SDModule(model_gpr, SUPPRESS, constraints=["1.0 rd_ex >= 1.0 "])]